@@ -4,7 +4,14 @@ import os
 from dotenv import load_dotenv
 
 # Importar configuração do banco
+from backend.config import timeouts
+from backend.config.async_database import AsyncDatabase
 from backend.config.database import Database
+from backend.models.avaliacoes_diarias import AvaliacoesDiariasModel
+from backend.models.colunar import MotorColunar
+from backend.models.contadores import ContadoresModel
+from backend.models.respostas_buffer import BufferRespostas
+from backend.models.respostas_frequencia import RespostasFrequenciaModel
 
 # Importar controllers
 from backend.controllers import (
@@ -30,6 +37,17 @@ try:
 except Exception as e:
     print(f"[AVISO] Não foi possível conectar ao banco de dados: {e}")
     print("[AVISO] O servidor irá iniciar, mas as rotas da API não funcionarão.")
+else:
+    # Corrige os contadores do dashboard e agenda a reconciliação periódica
+    ContadoresModel.iniciar_reconciliacao()
+    # Confere o agregado diário das séries temporais (reconstrói se defasado)
+    AvaliacoesDiariasModel.verificar()
+    # Confere o histograma de respostas dos gráficos de distribuição
+    RespostasFrequenciaModel.verificar()
+    # Motor colunar opcional do dashboard (DB_COLUNAR=1, exige numpy)
+    MotorColunar.iniciar()
+    # Buffer opcional de gravação das respostas (DB_RESPOSTAS_WRITE_BEHIND=1)
+    BufferRespostas.iniciar()
 
 # ==========================================
 # CONSTANTES DE ROTAS
@@ -48,18 +66,40 @@ ADMIN_PREFIX = f'{API_PREFIX}/admin'
 # ROTAS API - DASHBOARD
 # ==========================================
 
-app.route(f'{DASHBOARD_PREFIX}/estatisticas', methods=['GET'], endpoint='dashboard_estatisticas')(DashboardController.get_estatisticas_gerais)
-app.route(f'{DASHBOARD_PREFIX}/avaliacoes-mes', methods=['GET'], endpoint='dashboard_avaliacoes_mes')(DashboardController.get_avaliacoes_mes)
-app.route(f'{DASHBOARD_PREFIX}/motivos-saida', methods=['GET'], endpoint='dashboard_motivos_saida')(DashboardController.get_motivos_saida)
-app.route(f'{DASHBOARD_PREFIX}/status-avaliacoes', methods=['GET'], endpoint='dashboard_status_avaliacoes')(DashboardController.get_status_avaliacoes)
-app.route(f'{DASHBOARD_PREFIX}/atividades-recentes', methods=['GET'], endpoint='dashboard_atividades_recentes')(DashboardController.get_atividades_recentes)
-app.route(f'{DASHBOARD_PREFIX}/questionarios-usados', methods=['GET'], endpoint='dashboard_questionarios_usados')(DashboardController.get_questionarios_usados)
-app.route(f'{DASHBOARD_PREFIX}/avaliacoes-por-questionario', methods=['GET'], endpoint='dashboard_avaliacoes_por_questionario')(DashboardController.get_avaliacoes_por_questionario)
-app.route(f'{DASHBOARD_PREFIX}/respostas-frequencia', methods=['GET'], endpoint='dashboard_respostas_frequencia')(DashboardController.get_respostas_frequencia)
-app.route(f'{DASHBOARD_PREFIX}/avaliacoes-tempo', methods=['GET'], endpoint='dashboard_avaliacoes_tempo')(DashboardController.get_avaliacoes_tempo)
-app.route(f'{DASHBOARD_PREFIX}/avaliacoes-setor', methods=['GET'], endpoint='dashboard_avaliacoes_setor')(DashboardController.get_avaliacoes_setor)
-app.route(f'{DASHBOARD_PREFIX}/avaliadores-por-setor', methods=['GET'], endpoint='dashboard_avaliadores_por_setor')(DashboardController.get_avaliadores_por_setor)
-app.route(f'{DASHBOARD_PREFIX}/pontos-por-data', methods=['GET'], endpoint='dashboard_pontos_por_data')(DashboardController.get_pontos_por_data)
+def _dashboard_assincrono():
+    """DB_ASYNC_DASHBOARD=1 liga as views assíncronas (exigem `pip install "flask[async]"`)"""
+    if os.getenv('DB_ASYNC_DASHBOARD', '').lower() not in ('1', 'true', 'sim'):
+        return False
+    try:
+        import asgiref  # noqa: F401
+    except ImportError:
+        print("[AVISO] DB_ASYNC_DASHBOARD ativo, mas o pacote asgiref não está instalado; "
+              "usando as rotas síncronas do dashboard")
+        return False
+    return True
+
+DASHBOARD_ASYNC = _dashboard_assincrono()
+
+def dashboard_view(nome):
+    """Escolhe a variante síncrona ou assíncrona de uma rota do dashboard"""
+    if DASHBOARD_ASYNC:
+        return getattr(DashboardController, f'{nome}_async')
+    return getattr(DashboardController, nome)
+
+app.route(f'{DASHBOARD_PREFIX}/estatisticas', methods=['GET'], endpoint='dashboard_estatisticas')(dashboard_view('get_estatisticas_gerais'))
+app.route(f'{DASHBOARD_PREFIX}/avaliacoes-mes', methods=['GET'], endpoint='dashboard_avaliacoes_mes')(dashboard_view('get_avaliacoes_mes'))
+app.route(f'{DASHBOARD_PREFIX}/motivos-saida', methods=['GET'], endpoint='dashboard_motivos_saida')(dashboard_view('get_motivos_saida'))
+app.route(f'{DASHBOARD_PREFIX}/status-avaliacoes', methods=['GET'], endpoint='dashboard_status_avaliacoes')(dashboard_view('get_status_avaliacoes'))
+app.route(f'{DASHBOARD_PREFIX}/atividades-recentes', methods=['GET'], endpoint='dashboard_atividades_recentes')(dashboard_view('get_atividades_recentes'))
+app.route(f'{DASHBOARD_PREFIX}/atividades-recentes/stream', methods=['GET'], endpoint='dashboard_atividades_stream')(DashboardController.stream_atividades)
+app.route(f'{DASHBOARD_PREFIX}/questionarios-usados', methods=['GET'], endpoint='dashboard_questionarios_usados')(dashboard_view('get_questionarios_usados'))
+app.route(f'{DASHBOARD_PREFIX}/avaliacoes-por-questionario', methods=['GET'], endpoint='dashboard_avaliacoes_por_questionario')(dashboard_view('get_avaliacoes_por_questionario'))
+app.route(f'{DASHBOARD_PREFIX}/respostas-frequencia', methods=['GET'], endpoint='dashboard_respostas_frequencia')(dashboard_view('get_respostas_frequencia'))
+app.route(f'{DASHBOARD_PREFIX}/avaliacoes-tempo', methods=['GET'], endpoint='dashboard_avaliacoes_tempo')(dashboard_view('get_avaliacoes_tempo'))
+app.route(f'{DASHBOARD_PREFIX}/avaliacoes-setor', methods=['GET'], endpoint='dashboard_avaliacoes_setor')(dashboard_view('get_avaliacoes_setor'))
+app.route(f'{DASHBOARD_PREFIX}/avaliadores-por-setor', methods=['GET'], endpoint='dashboard_avaliadores_por_setor')(dashboard_view('get_avaliadores_por_setor'))
+app.route(f'{DASHBOARD_PREFIX}/pontos-por-data', methods=['GET'], endpoint='dashboard_pontos_por_data')(dashboard_view('get_pontos_por_data'))
+app.route(f'{DASHBOARD_PREFIX}/snapshot', methods=['GET'], endpoint='dashboard_snapshot')(dashboard_view('get_snapshot'))
 
 # ==========================================
 # ROTAS API - PERGUNTAS
@@ -81,6 +121,7 @@ app.route(f'{FUNCIONARIOS_PREFIX}/total', methods=['GET'], endpoint='funcionario
 app.route(f'{FUNCIONARIOS_PREFIX}/estatisticas', methods=['GET'], endpoint='funcionarios_get_estatisticas')(FuncionariosController.get_estatisticas)
 app.route(f'{FUNCIONARIOS_PREFIX}/<funcionario_id>', methods=['GET'], endpoint='funcionarios_buscar_por_id')(FuncionariosController.buscar_por_id)
 app.route(f'{FUNCIONARIOS_PREFIX}', methods=['POST'], endpoint='funcionarios_criar')(FuncionariosController.criar)
+app.route(f'{FUNCIONARIOS_PREFIX}/importar', methods=['POST'], endpoint='funcionarios_importar')(FuncionariosController.importar)
 app.route(f'{FUNCIONARIOS_PREFIX}/<funcionario_id>', methods=['PUT'], endpoint='funcionarios_atualizar')(FuncionariosController.atualizar)
 app.route(f'{FUNCIONARIOS_PREFIX}/<funcionario_id>', methods=['DELETE'], endpoint='funcionarios_deletar')(FuncionariosController.deletar)
 app.route(f'{API_PREFIX}/departamentos', methods=['GET'], endpoint='funcionarios_listar_departamentos')(FuncionariosController.listar_departamentos)
@@ -96,6 +137,7 @@ app.route(f'{AVALIACOES_PREFIX}', methods=['POST'], endpoint='avaliacoes_criar')
 app.route(f'{AVALIACOES_PREFIX}/<int:avaliacao_id>/status', methods=['PUT'], endpoint='avaliacoes_atualizar_status')(AvaliacoesController.atualizar_status)
 app.route(f'{AVALIACOES_PREFIX}/<int:avaliacao_id>', methods=['PUT'], endpoint='avaliacoes_atualizar')(AvaliacoesController.atualizar)
 app.route(f'{AVALIACOES_PREFIX}/respostas', methods=['POST'], endpoint='avaliacoes_salvar_resposta')(AvaliacoesController.salvar_resposta)
+app.route(f'{AVALIACOES_PREFIX}/<int:avaliacao_id>/respostas', methods=['POST'], endpoint='avaliacoes_salvar_respostas')(AvaliacoesController.salvar_respostas)
 app.route(f'{AVALIACOES_PREFIX}/<int:avaliacao_id>/grafico-respostas', methods=['GET'], endpoint='avaliacoes_grafico_respostas')(AvaliacoesController.get_grafico_respostas_avaliacao)
 app.route(f'{QUESTIONARIOS_PREFIX}/<int:questionario_id>/grafico-respostas', methods=['GET'], endpoint='questionarios_grafico_respostas')(AvaliacoesController.get_grafico_respostas_questionario)
 app.route(f'{API_PREFIX}/questoes/<int:questao_id>/respostas', methods=['GET'], endpoint='questoes_respostas')(AvaliacoesController.get_respostas_questao)
@@ -128,6 +170,17 @@ app.route(f'{API_PREFIX}/funcionario-treinamento', methods=['DELETE'], endpoint=
 # ==========================================
 
 app.route(f'{ADMIN_PREFIX}/limpar-banco', methods=['DELETE'], endpoint='admin_limpar_banco')(AdminController.limpar_banco_dados)
+app.route(f'{ADMIN_PREFIX}/pool', methods=['GET'], endpoint='admin_pool_stats')(AdminController.get_pool_stats)
+app.route(f'{ADMIN_PREFIX}/statement-cache', methods=['GET'], endpoint='admin_statement_cache_stats')(AdminController.get_statement_cache_stats)
+app.route(f'{ADMIN_PREFIX}/dashboard-cache', methods=['GET'], endpoint='admin_dashboard_cache_stats')(AdminController.get_dashboard_cache_stats)
+app.route(f'{ADMIN_PREFIX}/dashboard-cache', methods=['DELETE'], endpoint='admin_limpar_dashboard_cache')(AdminController.limpar_dashboard_cache)
+app.route(f'{ADMIN_PREFIX}/contadores/reconciliar', methods=['POST'], endpoint='admin_reconciliar_contadores')(AdminController.reconciliar_contadores)
+app.route(f'{ADMIN_PREFIX}/colunar', methods=['GET'], endpoint='admin_colunar_stats')(AdminController.get_colunar_stats)
+app.route(f'{ADMIN_PREFIX}/colunar/verificar', methods=['POST'], endpoint='admin_verificar_colunar')(AdminController.verificar_colunar)
+app.route(f'{ADMIN_PREFIX}/motivos-saida', methods=['GET'], endpoint='admin_motivos_saida')(AdminController.get_motivos_saida)
+app.route(f'{ADMIN_PREFIX}/motivos-saida', methods=['PUT'], endpoint='admin_definir_motivos_saida')(AdminController.definir_motivos_saida)
+app.route(f'{ADMIN_PREFIX}/respostas-buffer', methods=['GET'], endpoint='admin_respostas_buffer_stats')(AdminController.get_respostas_buffer_stats)
+app.route(f'{ADMIN_PREFIX}/metrics', methods=['GET'], endpoint='admin_metrics')(AdminController.get_metrics)
 
 # ==========================================
 # ROTAS FRONTEND (devem vir por último!)
@@ -170,10 +223,15 @@ def log_request():
     if app.debug:
         print(f"[REQUEST] {request.method} {request.path}")
 
+@app.after_request
+def ajustar_falhas_de_tempo(response):
+    """Consulta cancelada por tempo vira 504; pool esgotado vira 503"""
+    return timeouts.ajustar_resposta(response)
+
 @app.teardown_appcontext
 def shutdown_session(exception=None):
-    """Fecha conexões ao encerrar"""
-    pass
+    """Devolve ao pool a conexão usada pela requisição"""
+    Database.release_request_connection(exception)
 
 # ==========================================
 # EXECUÇÃO
@@ -195,4 +253,7 @@ if __name__ == '__main__':
         host = os.getenv('FLASK_HOST', '0.0.0.0')
         app.run(host=host, port=port, debug=debug)
     finally:
+        # Respostas ainda na fila são gravadas antes de as conexões fecharem
+        BufferRespostas.encerrar()
+        AsyncDatabase.close()
         Database.close_all_connections()
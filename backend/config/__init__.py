@@ -1,7 +1,20 @@
 """
 Módulo de configuração do backend
 """
-from .database import Database, get_db_connection, execute_query, execute_many
+from .database import Database, Transaction, get_db_connection, execute_query, execute_many, iter_query, bulk_insert
+from .pool import ConnectionPool, PoolTimeoutError
+from .statement_cache import PreparedStatementCache
 
-__all__ = ['Database', 'get_db_connection', 'execute_query', 'execute_many']
+__all__ = [
+    'Database',
+    'Transaction',
+    'get_db_connection',
+    'execute_query',
+    'execute_many',
+    'iter_query',
+    'bulk_insert',
+    'ConnectionPool',
+    'PoolTimeoutError',
+    'PreparedStatementCache'
+]
 
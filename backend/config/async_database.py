@@ -0,0 +1,385 @@
+"""
+Caminho assíncrono (asyncio) de acesso ao PostgreSQL
+Usa o modo assíncrono do próprio psycopg2, sem dependências extras
+"""
+import asyncio
+import itertools
+import os
+import threading
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import PoolError
+
+from backend.config import metrics, timeouts
+from backend.config.database import Database, replicas_configuradas, somente_leitura
+from backend.config.pool import PoolTimeoutError
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def _env_float(nome, padrao):
+    valor = os.getenv(nome)
+    return float(valor) if valor not in (None, '') else padrao
+
+
+async def _aguardar(conn):
+    """Espera a conexão assíncrona concluir a operação pendente sem bloquear o loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        estado = conn.poll()
+        if estado == extensions.POLL_OK:
+            return
+
+        futuro = loop.create_future()
+
+        def pronto():
+            if not futuro.done():
+                futuro.set_result(None)
+
+        descritor = conn.fileno()
+        if estado == extensions.POLL_READ:
+            loop.add_reader(descritor, pronto)
+            try:
+                await futuro
+            finally:
+                loop.remove_reader(descritor)
+        elif estado == extensions.POLL_WRITE:
+            loop.add_writer(descritor, pronto)
+            try:
+                await futuro
+            finally:
+                loop.remove_writer(descritor)
+        else:
+            raise psycopg2.OperationalError(f"Estado inesperado da conexão assíncrona: {estado}")
+
+
+class AsyncConnectionPool:
+    """
+    Pool de conexões assíncronas do psycopg2 para uso dentro de um event loop
+
+    Deve ser usado sempre a partir do mesmo loop. Conexões assíncronas
+    trabalham em autocommit, então este pool serve para consultas avulsas
+    (leituras do dashboard), não para unidades de trabalho.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=30.0, nome=None, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Parâmetros inválidos: é preciso 0 <= minconn <= maxconn e maxconn >= 1")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.nome = nome or f"{connect_kwargs.get('host', 'localhost')}:{connect_kwargs.get('port', 5432)}"
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = asyncio.Condition()
+        self._idle = deque()
+        self._em_uso = 0
+        self._total = 0
+        self._waiters = 0
+        self._closed = False
+
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._opened = 0
+        self._discarded = 0
+
+    async def _connect(self):
+        conn = psycopg2.connect(async_=True, **self._connect_kwargs)
+        try:
+            await _aguardar(conn)
+        except BaseException:
+            conn.close()
+            raise
+        self._opened += 1
+        return conn
+
+    async def abrir(self):
+        """Abre as `minconn` conexões iniciais"""
+        for _ in range(self.minconn):
+            conn = await self._connect()
+            async with self._cond:
+                self._total += 1
+                self._idle.append(conn)
+
+    async def acquire(self, timeout=None):
+        """
+        Obtém uma conexão, esperando até `timeout` segundos
+
+        Raises:
+            PoolTimeoutError: se nenhuma conexão ficar disponível a tempo
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        limite = loop.time() + timeout
+
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Pool de conexões assíncronas fechado")
+
+                if self._idle:
+                    conn = self._idle.pop()
+                    if conn.closed:
+                        self._total -= 1
+                        self._discarded += 1
+                        continue
+                    break
+
+                if self._total < self.maxconn:
+                    self._total += 1
+                    conn = None
+                    break
+
+                restante = limite - loop.time()
+                if restante <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Tempo de espera esgotado ({timeout:.1f}s) aguardando conexão assíncrona "
+                        f"({self.maxconn} conexões em uso)"
+                    )
+
+                self._waiters += 1
+                try:
+                    await asyncio.wait_for(self._cond.wait(), restante)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._waiters -= 1
+
+            self._em_uso += 1
+            self._acquisitions += 1
+
+        if conn is None:
+            try:
+                conn = await self._connect()
+            except BaseException:
+                async with self._cond:
+                    self._total -= 1
+                    self._em_uso -= 1
+                    self._cond.notify()
+                raise
+
+        return conn
+
+    async def release(self, conn, close=False):
+        """Devolve a conexão (ou a descarta, se `close` ou se estiver fechada)"""
+        async with self._cond:
+            self._em_uso -= 1
+            if close or self._closed or conn.closed:
+                self._total -= 1
+                self._discarded += 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+            self._total = self._em_uso
+            self._cond.notify_all()
+
+    def stats(self):
+        return {
+            'minconn': self.minconn,
+            'maxconn': self.maxconn,
+            'total': self._total,
+            'em_uso': self._em_uso,
+            'ociosas': len(self._idle),
+            'aguardando': self._waiters,
+            'aquisicoes': self._acquisitions,
+            'timeouts': self._timeouts,
+            'conexoes_abertas': self._opened,
+            'conexoes_descartadas': self._discarded
+        }
+
+
+class AsyncDatabase:
+    """
+    Motor assíncrono compartilhado pelo processo
+
+    Roda um event loop próprio numa thread em segundo plano, dono dos pools
+    assíncronos (réplicas de DB_REPLICA_HOSTS, ou o primário). Corrotinas de
+    qualquer outro loop (por exemplo, as views assíncronas do Flask, que
+    ganham um loop por requisição) são encaminhadas para ele, então as
+    conexões sobrevivem entre requisições e um único loop atende muitas
+    consultas em andamento ao mesmo tempo.
+    """
+
+    _loop = None
+    _thread = None
+    _pools = None
+    _pools_lock = None
+    _rodizio = itertools.count()
+    _lock = threading.Lock()
+
+    @classmethod
+    def loop(cls):
+        """Retorna o event loop do motor, iniciando a thread na primeira chamada"""
+        if cls._loop is None:
+            with cls._lock:
+                if cls._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(
+                        target=loop.run_forever, name='async-database', daemon=True
+                    )
+                    thread.start()
+                    cls._thread = thread
+                    cls._loop = loop
+        return cls._loop
+
+    @classmethod
+    async def _garantir_pools(cls):
+        """Cria os pools na primeira consulta (sempre dentro do loop do motor)"""
+        if cls._pools is not None:
+            return cls._pools
+
+        if cls._pools_lock is None:
+            cls._pools_lock = asyncio.Lock()
+        async with cls._pools_lock:
+            if cls._pools is None:
+                cls._pools = await cls._criar_pools()
+        return cls._pools
+
+    @classmethod
+    async def _criar_pools(cls):
+        destinos = replicas_configuradas() or [Database.parametros_conexao()]
+
+        pools = []
+        for parametros in destinos:
+            pool = AsyncConnectionPool(
+                _env_int('DB_ASYNC_POOL_MIN', 0),
+                _env_int('DB_ASYNC_POOL_MAX', 20),
+                timeout=_env_float('DB_POOL_TIMEOUT', 30.0),
+                **parametros
+            )
+            try:
+                await pool.abrir()
+            except Exception as error:
+                print(f"[AVISO] Pool assíncrono para {pool.nome} não pôde abrir conexões: {error}")
+            pools.append(pool)
+
+        print(f"[OK] Motor assíncrono pronto ({', '.join(pool.nome for pool in pools)})")
+        return pools
+
+    @classmethod
+    async def _executar(cls, query, params):
+        pools = await cls._garantir_pools()
+        pool = pools[next(cls._rodizio) % len(pools)]
+
+        conn = await pool.acquire()
+        descartar = False
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            try:
+                cursor.execute(query, params)
+                await _aguardar(conn)
+                return [dict(row) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except asyncio.CancelledError:
+            # Quem esperava desistiu: cancela a consulta no servidor e descarta a conexão
+            descartar = True
+            try:
+                conn.cancel()
+            except Exception:
+                pass
+            raise
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Conexão quebrada não volta para o pool
+            descartar = True
+            raise
+        finally:
+            await pool.release(conn, close=descartar)
+
+    @classmethod
+    async def _executar_com_limite(cls, query, params, timeout_ms):
+        """Cancela a consulta (no servidor, ver _executar) se passar de `timeout_ms`"""
+        if not timeout_ms:
+            return await cls._executar(query, params)
+        try:
+            return await asyncio.wait_for(cls._executar(query, params), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            raise extensions.QueryCanceledError(
+                f"canceling statement due to statement timeout ({timeout_ms} ms)"
+            ) from None
+
+    @classmethod
+    async def execute_query(cls, query, params=None, timeout_ms=None):
+        """
+        Executa uma consulta no motor assíncrono, a partir de qualquer event loop
+
+        O motor é somente leitura: as consultas vão em rodízio para as
+        réplicas, em autocommit, sem transação. Escritas são recusadas com
+        ValueError (use execute_query ou Database.transaction()).
+
+        Conexões assíncronas trabalham em autocommit (não há SET LOCAL), então
+        o limite `timeout_ms` é controlado pelo próprio loop, que cancela a
+        consulta no servidor ao estourar. Se quem espera for cancelado (ex.:
+        o cliente desconectou), a consulta também é cancelada.
+        """
+        if not somente_leitura(query):
+            raise ValueError("O motor assíncrono é somente leitura; escritas vão pelo caminho síncrono")
+        loop_motor = cls.loop()
+        corrotina = cls._executar_com_limite(query, params, timeout_ms)
+        if asyncio.get_running_loop() is loop_motor:
+            return await corrotina
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(corrotina, loop_motor))
+
+    @classmethod
+    def pool_stats(cls):
+        """Métricas dos pools assíncronos (None se o motor ainda não foi usado)"""
+        if cls._pools is None:
+            return None
+        return [dict(pool.stats(), host=pool.nome) for pool in cls._pools]
+
+    @classmethod
+    def close(cls):
+        """Fecha os pools e encerra o loop do motor"""
+        if cls._loop is None:
+            return
+        if cls._pools is not None:
+            pools = cls._pools
+
+            async def fechar():
+                # gather precisa rodar dentro do loop do motor
+                await asyncio.gather(*(pool.close() for pool in pools))
+
+            futuro = asyncio.run_coroutine_threadsafe(fechar(), cls._loop)
+            futuro.result(timeout=5)
+            cls._pools = None
+        cls._loop.call_soon_threadsafe(cls._loop.stop)
+        cls._thread.join(timeout=5)
+        cls._loop = None
+        cls._thread = None
+
+
+async def async_execute_query(query, params=None):
+    """
+    Equivalente assíncrono de execute_query, só para consultas (somente leitura)
+
+    Args:
+        query (str): Consulta SQL a ser executada
+        params (tuple): Parâmetros da query (opcional)
+
+    Returns:
+        list: Lista de resultados
+    """
+    try:
+        with metrics.medir(query):
+            return await AsyncDatabase.execute_query(
+                query, params, timeout_ms=timeouts.timeout_da_requisicao()
+            )
+    except Exception as error:
+        timeouts.registrar_falha(error)
+        print(f"[ERRO] Erro ao executar query assíncrona: {error}")
+        raise
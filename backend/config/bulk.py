@@ -0,0 +1,141 @@
+"""
+Carga em lote com COPY ... FROM STDIN
+As linhas são serializadas sob demanda, sem montar o lote inteiro em memória
+"""
+import datetime
+import itertools
+import os
+import re
+from decimal import Decimal
+
+from psycopg2.extras import execute_values
+
+_IDENTIFICADOR = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+})
+
+
+def _validar_identificador(nome):
+    """Tabelas e colunas entram no SQL como texto, então só aceitamos nomes simples"""
+    if not isinstance(nome, str) or not _IDENTIFICADOR.match(nome):
+        raise ValueError(f"Identificador inválido para carga em lote: {nome!r}")
+    return nome
+
+
+def _lista_colunas(colunas):
+    return ', '.join(_validar_identificador(coluna) for coluna in colunas)
+
+
+def _valor_copy(valor):
+    """Converte um valor Python para o formato texto do COPY"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, (int, float, Decimal)):
+        return str(valor)
+    return str(valor).translate(_ESCAPES)
+
+
+class _LeitorCopy:
+    """
+    Arquivo somente leitura sobre um iterável de tuplas, no formato do COPY
+
+    O psycopg2 chama read() em blocos; cada chamada consome apenas as
+    linhas necessárias para preencher o bloco.
+    """
+
+    def __init__(self, linhas, quantidade_colunas):
+        self._linhas = iter(linhas)
+        self._quantidade_colunas = quantidade_colunas
+        self._buffer = ''
+        self._fim = False
+        self.total = 0
+
+    def _proxima_linha(self):
+        linha = next(self._linhas)
+        if len(linha) != self._quantidade_colunas:
+            raise ValueError(
+                f"Linha {self.total + 1} tem {len(linha)} valores; "
+                f"esperados {self._quantidade_colunas}"
+            )
+        self.total += 1
+        return '\t'.join(_valor_copy(valor) for valor in linha) + '\n'
+
+    def read(self, tamanho=-1):
+        partes = [self._buffer]
+        acumulado = len(self._buffer)
+
+        while not self._fim and (tamanho is None or tamanho < 0 or acumulado < tamanho):
+            try:
+                linha = self._proxima_linha()
+            except StopIteration:
+                self._fim = True
+                break
+            partes.append(linha)
+            acumulado += len(linha)
+
+        dados = ''.join(partes)
+        if tamanho is None or tamanho < 0:
+            self._buffer = ''
+            return dados
+        self._buffer = dados[tamanho:]
+        return dados[:tamanho]
+
+
+def bulk_page_size():
+    """Linhas por INSERT ... VALUES no caminho alternativo (DB_BULK_PAGE_SIZE)"""
+    valor = os.getenv('DB_BULK_PAGE_SIZE')
+    return int(valor) if valor not in (None, '') else 1000
+
+
+def bulk_metodo_padrao():
+    """'copy' (padrão) ou 'values', para ambientes onde COPY não está disponível"""
+    valor = (os.getenv('DB_BULK_METODO') or 'copy').lower()
+    return valor if valor in ('copy', 'values') else 'copy'
+
+
+def copy_rows(cursor, tabela, colunas, linhas):
+    """
+    Carrega as linhas com COPY tabela (colunas) FROM STDIN
+
+    Returns:
+        int: quantidade de linhas carregadas
+    """
+    leitor = _LeitorCopy(linhas, len(colunas))
+    comando = f"COPY {_validar_identificador(tabela)} ({_lista_colunas(colunas)}) FROM STDIN"
+    cursor.copy_expert(comando, leitor)
+    return leitor.total
+
+
+def insert_values(cursor, tabela, colunas, linhas, on_conflict=None, page_size=None):
+    """
+    Carrega as linhas com INSERT ... VALUES de várias linhas por comando
+
+    Aceita `on_conflict` (ex.: 'DO NOTHING'), que o COPY não suporta.
+    Lê o iterável página a página.
+
+    Returns:
+        int: quantidade de linhas afetadas
+    """
+    page_size = page_size or bulk_page_size()
+    comando = f"INSERT INTO {_validar_identificador(tabela)} ({_lista_colunas(colunas)}) VALUES %s"
+    if on_conflict:
+        comando += f" ON CONFLICT {on_conflict}"
+
+    linhas = iter(linhas)
+    total = 0
+    while True:
+        pagina = list(itertools.islice(linhas, page_size))
+        if not pagina:
+            break
+        execute_values(cursor, comando, pagina, page_size=len(pagina))
+        total += max(cursor.rowcount, 0)
+    return total
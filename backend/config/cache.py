@@ -0,0 +1,177 @@
+"""
+Cache em memória de resultados de consultas
+Entradas com validade (TTL), limite de tamanho (LRU) e invalidação pelas
+tabelas das quais cada resultado depende
+"""
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend.config.database import Database, replicas_configuradas
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def janela_replica():
+    """
+    Segundos após uma escrita em que as réplicas podem ainda não tê-la
+    aplicado (DB_REPLICA_MAX_LAG_MS, padrão 5000; 0 sem DB_REPLICA_HOSTS)
+    """
+    if not replicas_configuradas():
+        return 0.0
+    return _env_int('DB_REPLICA_MAX_LAG_MS', 5000) / 1000
+
+
+def cache_ativo():
+    """DB_DASHBOARD_CACHE=0 desliga o cache (útil para depuração)"""
+    return os.getenv('DB_DASHBOARD_CACHE', '1').lower() not in ('0', 'false', 'nao', 'não')
+
+
+class ResultCache:
+    """
+    Cache LRU de resultados com TTL por entrada, seguro entre threads
+
+    Cada entrada registra as tabelas de que depende; invalidar(tabela)
+    remove todas elas. Um resultado calculado enquanto uma de suas tabelas
+    era invalidada não é guardado (seria um resultado já antigo).
+
+    Guarda e devolve cópias: quem alterar o resultado recebido não altera
+    a entrada vista pelas outras requisições.
+
+    Com réplicas, um resultado de tabela invalidada há menos de
+    janela_replica() também não é guardado: ele pode ter sido lido de uma
+    réplica que ainda não aplicou a escrita, e ficaria no cache pelo ttl
+    inteiro em vez de só durante o atraso da réplica.
+    """
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._por_tabela = {}
+        self._geracoes = {}
+        self._epoca = 0
+        self._invalidada_em = {}
+        self._estatisticas = {
+            'hits': 0, 'misses': 0, 'evictions': 0, 'expiradas': 0, 'invalidadas': 0, 'recusadas_replica': 0
+        }
+
+    def geracoes(self, tabelas):
+        """Versão atual de cada tabela; passe o resultado para guardar()"""
+        with self._lock:
+            return self._versao(tabelas)
+
+    def _versao(self, tabelas):
+        return (self._epoca,) + tuple(self._geracoes.get(tabela, 0) for tabela in tabelas)
+
+    def obter(self, chave):
+        """Retorna (True, valor) se houver entrada válida, senão (False, None)"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self._estatisticas['misses'] += 1
+                return False, None
+
+            expira_em, valor, _ = entrada
+            if expira_em <= time.monotonic():
+                self._remover(chave)
+                self._estatisticas['expiradas'] += 1
+                self._estatisticas['misses'] += 1
+                return False, None
+
+            self._entradas.move_to_end(chave)
+            self._estatisticas['hits'] += 1
+        return True, copy.deepcopy(valor)
+
+    def guardar(self, chave, valor, ttl, tabelas=(), geracoes=None):
+        """
+        Guarda `valor` por `ttl` segundos
+
+        Se `geracoes` (obtidas antes de calcular o valor) não baterem com as
+        atuais, alguma tabela mudou no meio do caminho e nada é guardado.
+        """
+        if self.capacidade <= 0 or ttl <= 0:
+            return
+        janela = janela_replica()
+        valor = copy.deepcopy(valor)
+        with self._lock:
+            if geracoes is not None and geracoes != self._versao(tabelas):
+                return
+            if janela and any(
+                time.monotonic() - self._invalidada_em.get(tabela, float('-inf')) < janela
+                for tabela in tabelas
+            ):
+                self._estatisticas['recusadas_replica'] += 1
+                return
+
+            if chave in self._entradas:
+                self._remover(chave)
+            while len(self._entradas) >= self.capacidade:
+                antiga = next(iter(self._entradas))
+                self._remover(antiga)
+                self._estatisticas['evictions'] += 1
+
+            self._entradas[chave] = (time.monotonic() + ttl, valor, tuple(tabelas))
+            for tabela in tabelas:
+                self._por_tabela.setdefault(tabela, set()).add(chave)
+
+    def invalidar(self, *tabelas):
+        """Remove as entradas que dependem de qualquer uma das tabelas"""
+        agora = time.monotonic()
+        with self._lock:
+            for tabela in tabelas:
+                self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+                self._invalidada_em[tabela] = agora
+                for chave in list(self._por_tabela.get(tabela, ())):
+                    self._remover(chave)
+                    self._estatisticas['invalidadas'] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._epoca += 1
+            self._entradas.clear()
+            self._por_tabela.clear()
+
+    def _remover(self, chave):
+        _, _, tabelas = self._entradas.pop(chave)
+        for tabela in tabelas:
+            chaves = self._por_tabela.get(tabela)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_tabela[tabela]
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def stats(self):
+        with self._lock:
+            dados = dict(self._estatisticas)
+            dados['entradas'] = len(self._entradas)
+        dados['capacidade'] = self.capacidade
+        consultas = dados['hits'] + dados['misses']
+        dados['taxa_acerto'] = round(dados['hits'] / consultas, 4) if consultas else 0.0
+        return dados
+
+
+# Resultados do dashboard (DB_DASHBOARD_CACHE_SIZE entradas; 0 desativa)
+dashboard_cache = ResultCache(_env_int('DB_DASHBOARD_CACHE_SIZE', 256))
+
+
+def invalidar_apos_commit(*tabelas):
+    """
+    Invalida o cache do dashboard para as tabelas alteradas
+
+    Dentro de uma transação a invalidação espera o commit (antes dele outra
+    requisição ainda leria os dados antigos e os colocaria de volta no cache).
+    """
+    transacao = Database.current_transaction()
+    if transacao is not None:
+        transacao.apos_commit(lambda: dashboard_cache.invalidar(*tabelas))
+    else:
+        dashboard_cache.invalidar(*tabelas)
@@ -0,0 +1,163 @@
+"""
+Coalescência de consultas idênticas (single-flight)
+Chamadas simultâneas de um mesmo método de model com os mesmos argumentos
+esperam uma única execução e recebem o mesmo resultado (ou o mesmo erro),
+em vez de ocupar uma conexão do pool cada uma
+"""
+import asyncio
+import copy
+import os
+import threading
+from concurrent import futures
+
+from psycopg2.extensions import QueryCanceledError
+
+from backend.config import timeouts
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def coalescencia_ativa():
+    """DB_COALESCER=0 desliga a coalescência (útil para depuração)"""
+    return os.getenv('DB_COALESCER', '1').lower() not in ('0', 'false', 'nao', 'não')
+
+
+def _espera_ms():
+    """
+    Quanto um seguidor espera pela execução em andamento: o orçamento da
+    requisição (o mesmo que a própria consulta teria) ou DB_COALESCER_ESPERA_MS
+    """
+    return timeouts.timeout_da_requisicao() or _env_int('DB_COALESCER_ESPERA_MS', 30000)
+
+
+class _LiderDesistiu(Exception):
+    """A execução compartilhada foi cancelada antes de terminar; quem esperava tenta de novo"""
+
+
+class Coalescedor:
+    """
+    Execuções em andamento por chave, compartilhadas entre threads e event loops
+
+    A primeira chamada de uma chave (líder) executa; as que chegam enquanto
+    ela roda (seguidores) esperam o mesmo concurrent.futures.Future, por no
+    máximo o orçamento de tempo da própria requisição. Cada seguidor recebe
+    uma cópia do resultado do líder.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self._estatisticas = {'lideres': 0, 'seguidores': 0, 'esperas_esgotadas': 0, 'erros_compartilhados': 0}
+
+    def _entrar(self, chave):
+        """Retorna (futuro, True) para o líder ou (futuro em andamento, False)"""
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            if futuro is not None:
+                self._estatisticas['seguidores'] += 1
+                return futuro, False
+            futuro = futures.Future()
+            self._em_andamento[chave] = futuro
+            self._estatisticas['lideres'] += 1
+            return futuro, True
+
+    def _concluir(self, chave, futuro, resultado=None, erro=None):
+        with self._lock:
+            if self._em_andamento.get(chave) is futuro:
+                del self._em_andamento[chave]
+        if erro is not None:
+            futuro.set_exception(erro)
+        else:
+            # O líder devolve o próprio objeto a quem o chamou; os seguidores copiam de outro
+            futuro.set_result(copy.deepcopy(resultado))
+
+    def _esgotada(self, espera_ms):
+        with self._lock:
+            self._estatisticas['esperas_esgotadas'] += 1
+        erro = QueryCanceledError(
+            f"tempo esgotado ({espera_ms} ms) aguardando consulta idêntica em andamento"
+        )
+        timeouts.registrar_falha(erro)
+        return erro
+
+    def _repassar(self, erro):
+        """Erro do líder, devolvido também a cada seguidor (503/504 inclusive)"""
+        with self._lock:
+            self._estatisticas['erros_compartilhados'] += 1
+        timeouts.registrar_falha(erro)
+        return erro
+
+    def executar(self, chave, funcao):
+        """Executa `funcao()` uma vez por chave entre as chamadas simultâneas"""
+        while True:
+            futuro, lider = self._entrar(chave)
+            if lider:
+                try:
+                    resultado = funcao()
+                except Exception as error:
+                    self._concluir(chave, futuro, erro=error)
+                    raise
+                except BaseException:
+                    self._concluir(chave, futuro, erro=_LiderDesistiu())
+                    raise
+                self._concluir(chave, futuro, resultado)
+                return resultado
+
+            espera_ms = _espera_ms()
+            futures.wait([futuro], timeout=espera_ms / 1000)
+            if not futuro.done():
+                raise self._esgotada(espera_ms)
+            erro = futuro.exception()
+            if erro is None:
+                return copy.deepcopy(futuro.result())
+            if not isinstance(erro, _LiderDesistiu):
+                raise self._repassar(erro)
+
+    async def executar_assincrono(self, chave, fabrica):
+        """
+        Como executar, para a corrotina criada por `fabrica()`
+
+        Seguidores podem estar em outros event loops (cada view assíncrona
+        do Flask tem o seu) ou em threads síncronas. Se o líder for
+        cancelado (ex.: o cliente desconectou), um seguidor assume.
+        """
+        while True:
+            futuro, lider = self._entrar(chave)
+            if lider:
+                try:
+                    resultado = await fabrica()
+                except Exception as error:
+                    self._concluir(chave, futuro, erro=error)
+                    raise
+                except BaseException:
+                    self._concluir(chave, futuro, erro=_LiderDesistiu())
+                    raise
+                self._concluir(chave, futuro, resultado)
+                return resultado
+
+            espera_ms = _espera_ms()
+            # asyncio.wait não cancela o futuro ao esgotar o tempo: a
+            # execução compartilhada segue para os demais seguidores
+            espera = asyncio.wrap_future(futuro)
+            await asyncio.wait([espera], timeout=espera_ms / 1000)
+            if not espera.done():
+                espera.add_done_callback(lambda concluida: concluida.cancelled() or concluida.exception())
+                raise self._esgotada(espera_ms)
+            erro = espera.exception()
+            if erro is None:
+                return copy.deepcopy(espera.result())
+            if not isinstance(erro, _LiderDesistiu):
+                raise self._repassar(erro)
+
+    def stats(self):
+        with self._lock:
+            dados = dict(self._estatisticas)
+            dados['em_andamento'] = len(self._em_andamento)
+        return dados
+
+
+# Consultas dos models decoradas com @consulta (ver consultas.consulta)
+coalescedor = Coalescedor()
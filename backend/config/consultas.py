@@ -0,0 +1,145 @@
+"""
+Decorators para consultas de models
+Cada método decorado monta a consulta uma vez e ganha cache de resultados,
+coalescência de chamadas idênticas e uma variante assíncrona
+"""
+import functools
+import inspect
+
+from backend.config import cache, coalescencia, metrics
+from backend.config.database import Database, execute_query
+
+
+def consulta(unica=False, ttl=None, tabelas=(), depois=None, alternativa=None):
+    """
+    Decorator para métodos de model que apenas montam uma consulta
+
+    O método decorado retorna (query, params). Chamado normalmente, executa
+    com execute_query e devolve as linhas; `metodo.assincrono(...)` executa
+    a mesma consulta no motor assíncrono. Com unica=True devolve só a
+    primeira linha (ou None).
+
+    Com `ttl` (segundos) o resultado fica no cache do dashboard, por
+    argumentos da chamada, até expirar ou até uma escrita em alguma das
+    `tabelas` (ver cache.invalidar_apos_commit). As duas variantes
+    compartilham o mesmo cache. Chamadas dentro de uma transação não usam
+    o cache.
+
+    `depois(linhas, **argumentos)` trata as linhas antes de devolvê-las (e
+    de guardá-las no cache); recebe os argumentos da chamada pelo nome, já
+    com os valores padrão.
+    
+    `alternativa(*args, **kwargs)` pode responder sem ir ao banco (ex.: o
+    motor colunar); devolve as linhas no mesmo formato da consulta, ou None
+    para executá-la normalmente.
+    
+    Chamadas simultâneas com os mesmos argumentos (síncronas ou não)
+    compartilham uma única execução (ver coalescencia.py).
+    """
+    def decorator(metodo):
+        assinatura = inspect.signature(metodo)
+
+        def argumentos(args, kwargs):
+            vinculados = assinatura.bind(*args, **kwargs)
+            vinculados.apply_defaults()
+            return vinculados.arguments
+
+        def formatar(linhas, args, kwargs):
+            if depois is not None:
+                linhas = depois(linhas, **argumentos(args, kwargs))
+            if unica:
+                return linhas[0] if linhas else None
+            return linhas
+
+        def chave(args, kwargs):
+            # Pelos argumentos já vinculados: f(6), f(limite_meses=6) e f() usam a mesma entrada
+            return (metodo.__qualname__, tuple(argumentos(args, kwargs).items()))
+
+        def usar_cache():
+            # Dentro de uma transação a consulta enxerga escritas ainda não
+            # confirmadas (que podem ser desfeitas): nem lê nem guarda no cache
+            return ttl is not None and cache.cache_ativo() and Database.current_transaction() is None
+
+        @functools.wraps(metodo)
+        def sincrono(*args, **kwargs):
+            ativo = usar_cache()
+            if ativo:
+                encontrado, valor = cache.dashboard_cache.obter(chave(args, kwargs))
+                if encontrado:
+                    return valor
+            geracoes = cache.dashboard_cache.geracoes(tabelas)
+
+            def calcular():
+                linhas = alternativa(*args, **kwargs) if alternativa is not None else None
+                if linhas is not None:
+                    resultado = formatar(linhas, args, kwargs)
+                else:
+                    query, params = metodo(*args, **kwargs)
+                    with metrics.origem(metodo.__qualname__):
+                        resultado = formatar(execute_query(query, params), args, kwargs)
+
+                if ativo:
+                    cache.dashboard_cache.guardar(chave(args, kwargs), resultado, ttl, tabelas, geracoes)
+                return resultado
+
+            # Dentro de uma transação a consulta enxerga as escritas dela: não é compartilhada
+            if not coalescencia.coalescencia_ativa() or Database.current_transaction() is not None:
+                return calcular()
+            # Com a versão das tabelas: depois de uma escrita, quem chega não
+            # aproveita uma execução que começou antes dela
+            return coalescencia.coalescedor.executar((chave(args, kwargs), geracoes), calcular)
+
+        async def assincrono(*args, **kwargs):
+            ativo = usar_cache()
+            if ativo:
+                encontrado, valor = cache.dashboard_cache.obter(chave(args, kwargs))
+                if encontrado:
+                    return valor
+            geracoes = cache.dashboard_cache.geracoes(tabelas)
+
+            async def calcular():
+                linhas = alternativa(*args, **kwargs) if alternativa is not None else None
+                if linhas is not None:
+                    resultado = formatar(linhas, args, kwargs)
+                else:
+                    # Só quem usa a variante assíncrona carrega o motor
+                    from backend.config.async_database import async_execute_query
+
+                    query, params = metodo(*args, **kwargs)
+                    with metrics.origem(metodo.__qualname__):
+                        resultado = formatar(await async_execute_query(query, params), args, kwargs)
+
+                if ativo:
+                    cache.dashboard_cache.guardar(chave(args, kwargs), resultado, ttl, tabelas, geracoes)
+                return resultado
+
+            if not coalescencia.coalescencia_ativa():
+                return await calcular()
+            return await coalescencia.coalescedor.executar_assincrono((chave(args, kwargs), geracoes), calcular)
+
+        sincrono.assincrono = assincrono
+        return sincrono
+    return decorator
+
+
+def derivada(origem):
+    """
+    Decorator para métodos de model calculados a partir de outra @consulta
+
+    O método decorado recebe o resultado de `origem(...)` como único
+    argumento e monta a resposta em Python; os argumentos da chamada vão
+    para a origem (ex.: filtros). Vários endpoints compartilham assim uma
+    única leitura do banco (e a mesma entrada no cache da origem);
+    `metodo.assincrono(...)` obtém a origem pelo motor assíncrono.
+    """
+    def decorator(metodo):
+        @functools.wraps(metodo)
+        def sincrono(*args, **kwargs):
+            return metodo(origem(*args, **kwargs))
+
+        async def assincrono(*args, **kwargs):
+            return metodo(await origem.assincrono(*args, **kwargs))
+
+        sincrono.assincrono = assincrono
+        return sincrono
+    return decorator
@@ -1,50 +1,531 @@
 """
 Configuração de conexão com PostgreSQL
 """
-import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
+import itertools
+import re
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_app_context
+from psycopg2.extras import RealDictCursor, execute_batch
 import os
 
+from backend.config import bulk, metrics, timeouts
+from backend.config.pool import ConnectionPool, PoolTimeoutError
+from backend.config.statement_cache import CachedConnection, PreparedStatementCache, statement_cache_size
+
+# Transação ativa na thread atual (permite que várias chamadas de model
+# participem da mesma unidade de trabalho)
+_contexto = threading.local()
+
+# Nomes únicos para os cursores do lado do servidor (DECLARE ... CURSOR)
+_cursores_nomeados = itertools.count(1)
+
+
+# Comandos que não alteram dados (podem ir para uma réplica)
+_COMANDOS_LEITURA = ('SELECT', 'SHOW', 'VALUES', 'EXPLAIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK')
+_ESCRITA_EM_CTE = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE)\b', re.IGNORECASE)
+
+
+def somente_leitura(query):
+    """Indica se a query apenas lê dados (SELECT, ou WITH sem INSERT/UPDATE/DELETE)"""
+    partes = query.lstrip(' \t\r\n(').split(None, 1)
+    palavra = partes[0].upper() if partes else ''
+    if palavra == 'WITH':
+        return not _ESCRITA_EM_CTE.search(query)
+    return palavra in _COMANDOS_LEITURA
+
+
+def parametros_primario():
+    """Parâmetros de conexão com o primário (DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD)"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432'),
+        'database': os.getenv('DB_NAME', 'sistema_avaliacao'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', 'postgres'),
+    }
+
+
+def replicas_configuradas():
+    """
+    Lê DB_REPLICA_HOSTS ("host[:porta],host[:porta]") e monta os parâmetros
+    de conexão de cada réplica (banco/usuário/senha: DB_REPLICA_* ou DB_*)
+    """
+    hosts = [item.strip() for item in os.getenv('DB_REPLICA_HOSTS', '').split(',') if item.strip()]
+    replicas = []
+    for item in hosts:
+        host, _, porta = item.partition(':')
+        replicas.append({
+            'host': host,
+            'port': porta or os.getenv('DB_PORT', '5432'),
+            'database': os.getenv('DB_REPLICA_NAME') or os.getenv('DB_NAME', 'sistema_avaliacao'),
+            'user': os.getenv('DB_REPLICA_USER') or os.getenv('DB_USER', 'postgres'),
+            'password': os.getenv('DB_REPLICA_PASSWORD') or os.getenv('DB_PASSWORD', 'postgres'),
+        })
+    return replicas
+
+
+def _env_int_opcional(nome):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else None
+
+
+def stream_itersize():
+    """Linhas buscadas por ida ao servidor em iter_query (DB_STREAM_ITERSIZE)"""
+    valor = os.getenv('DB_STREAM_ITERSIZE')
+    return int(valor) if valor not in (None, '') else 2000
+
+
+class Transaction:
+    """
+    Unidade de trabalho sobre uma única conexão do pool
+    
+    Tudo o que é executado através dela é confirmado (ou desfeito) junto,
+    ao final do bloco `with Database.transaction() as tx:` mais externo
+    """
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self._savepoints = 0
+        self._apos_commit = []
+        self.escreveu = False
+    
+    def cursor(self, dict_rows=True):
+        """Abre um cursor na conexão da transação (linhas como dicionário por padrão)"""
+        if dict_rows:
+            return self.connection.cursor(cursor_factory=RealDictCursor)
+        return self.connection.cursor()
+    
+    def _executar(self, cursor, query, params):
+        """Executa via cache de prepared statements da conexão, quando houver"""
+        if not self.escreveu and not somente_leitura(query):
+            self.escreveu = True
+        cache = getattr(self.connection, 'statement_cache', None)
+        with metrics.medir(query):
+            if cache is None:
+                cursor.execute(query, params)
+            else:
+                cache.execute(cursor, query, params)
+    
+    def fetch_all(self, query, params=None):
+        """Executa uma consulta e retorna todas as linhas como lista de dicionários"""
+        with self.cursor() as cursor:
+            self._executar(cursor, query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def fetch_one(self, query, params=None):
+        """Executa uma consulta e retorna a primeira linha (ou None)"""
+        with self.cursor() as cursor:
+            self._executar(cursor, query, params)
+            row = cursor.fetchone()
+            return dict(row) if row else None
+    
+    def fetch_value(self, query, params=None):
+        """Executa uma consulta e retorna a primeira coluna da primeira linha"""
+        with self.cursor(dict_rows=False) as cursor:
+            self._executar(cursor, query, params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
+    def execute(self, query, params=None):
+        """Executa um comando e retorna o número de linhas afetadas"""
+        with self.cursor(dict_rows=False) as cursor:
+            self._executar(cursor, query, params)
+            return cursor.rowcount
+    
+    def iter_rows(self, query, params=None, itersize=None, origem_query=None):
+        """
+        Percorre o resultado com um cursor do lado do servidor
+        
+        As linhas chegam em lotes de `itersize` (padrão: DB_STREAM_ITERSIZE),
+        então a memória usada não cresce com o tamanho do resultado. O
+        gerador precisa ser consumido dentro da transação.
+        """
+        nome = f"stream_{next(_cursores_nomeados)}"
+        with self.connection.cursor(name=nome, cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = itersize or stream_itersize()
+            with metrics.medir(query, origem_query):
+                cursor.execute(query, params)
+            for row in cursor:
+                yield row
+    
+    def execute_many(self, query, params_list, page_size=None):
+        """
+        Executa o mesmo comando para cada tupla de parâmetros
+        
+        Os comandos são enviados em páginas (execute_batch), não um por ida
+        ao servidor. Para inserções grandes prefira bulk_insert.
+        """
+        self.escreveu = True
+        with self.cursor(dict_rows=False) as cursor, metrics.medir(query):
+            execute_batch(cursor, query, params_list, page_size=page_size or bulk.bulk_page_size())
+            return cursor.rowcount
+    
+    def bulk_insert(self, tabela, colunas, linhas, on_conflict=None, metodo=None):
+        """
+        Insere muitas linhas de uma vez
+        
+        Usa COPY ... FROM STDIN; com `on_conflict` (ex.: 'DO NOTHING') ou
+        metodo='values' (ou DB_BULK_METODO=values) usa INSERT ... VALUES
+        paginado. `linhas` pode ser qualquer iterável ou gerador de tuplas
+        na ordem de `colunas`, e é consumido aos poucos.
+        
+        Returns:
+            int: quantidade de linhas inseridas
+        """
+        metodo = metodo or bulk.bulk_metodo_padrao()
+        self.escreveu = True
+        with self.cursor(dict_rows=False) as cursor:
+            if on_conflict is None and metodo == 'copy':
+                with metrics.medir(f"COPY {tabela}"):
+                    return bulk.copy_rows(cursor, tabela, colunas, linhas)
+            with metrics.medir(f"INSERT INTO {tabela}"):
+                return bulk.insert_values(cursor, tabela, colunas, linhas, on_conflict=on_conflict)
+    
+    def apos_commit(self, funcao):
+        """Agenda `funcao` para depois do commit (descartada se houver rollback)"""
+        self._apos_commit.append(funcao)
+    
+    def _executar_apos_commit(self):
+        for funcao in self._apos_commit:
+            try:
+                funcao()
+            except Exception as error:
+                print(f"[AVISO] Erro em ação pós-commit: {error}")
+        self._apos_commit.clear()
+    
+    def definir_statement_timeout(self, milissegundos):
+        """
+        Limita o tempo de cada comando até o fim da transação (SET LOCAL)
+        
+        Um comando que passar do limite é cancelado pelo servidor com
+        QueryCanceledError, e a conexão volta ao pool normalmente.
+        """
+        with self.cursor(dict_rows=False) as cursor:
+            cursor.execute("SET LOCAL statement_timeout = %s", (int(milissegundos),))
+    
+    def _aplicar_timeout_da_requisicao(self):
+        timeout = timeouts.timeout_da_requisicao()
+        if timeout:
+            self.definir_statement_timeout(timeout)
+    
+    @contextmanager
+    def savepoint(self):
+        """
+        Bloco que pode falhar sem invalidar a transação inteira
+        
+        Em caso de erro, desfaz apenas o que foi feito dentro do bloco e
+        relança a exceção
+        """
+        self._savepoints += 1
+        nome = f"sp_{self._savepoints}"
+        self.execute(f"SAVEPOINT {nome}")
+        try:
+            yield self
+        except Exception:
+            self.execute(f"ROLLBACK TO SAVEPOINT {nome}")
+            raise
+        else:
+            self.execute(f"RELEASE SAVEPOINT {nome}")
+
+
 class Database:
     """Classe para gerenciar conexões com o banco de dados PostgreSQL"""
     
     _connection_pool = None
+    _parametros = None
+    _replica_pools = []
+    _replica_rodizio = itertools.count()
+    _pool_lock = threading.RLock()
     
     @classmethod
-    def initialize_pool(cls, minconn=1, maxconn=10):
-        """Inicializa o pool de conexões"""
+    def initialize_pool(cls, minconn=None, maxconn=None):
+        """
+        Inicializa o pool de conexões
+        
+        O tamanho e os limites vêm das variáveis de ambiente DB_POOL_MIN,
+        DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_MAX_LIFETIME, DB_POOL_MAX_IDLE
+        e DB_POOL_CHECK_INTERVAL, a menos que minconn/maxconn sejam informados
+        """
+        with cls._pool_lock:
+            parametros = parametros_primario()
+            try:
+                novo_pool = ConnectionPool.from_env(
+                    minconn,
+                    maxconn,
+                    connection_factory=CachedConnection,
+                    **parametros
+                )
+            except Exception as error:
+                print(f"[ERRO] Erro ao inicializar pool de conexões: {error}")
+                raise
+            
+            if cls._connection_pool is not None:
+                cls._connection_pool.closeall()
+            cls._connection_pool = novo_pool
+            cls._parametros = parametros
+            print(f"[OK] Pool de conexões inicializado com sucesso! "
+                  f"(min={novo_pool.minconn}, max={novo_pool.maxconn}, timeout={novo_pool.timeout}s)")
+            
+            cls._initialize_replica_pools()
+    
+    @classmethod
+    def _initialize_replica_pools(cls):
+        """
+        Cria um pool por réplica listada em DB_REPLICA_HOSTS
+        
+        Tamanho: DB_REPLICA_POOL_MIN/DB_REPLICA_POOL_MAX (padrão: os do
+        primário). Uma réplica inacessível é ignorada; as leituras seguem no
+        primário.
+        """
+        for pool in cls._replica_pools:
+            pool.closeall()
+        
+        replicas = []
+        for parametros in replicas_configuradas():
+            try:
+                pool = ConnectionPool.from_env(
+                    _env_int_opcional('DB_REPLICA_POOL_MIN'),
+                    _env_int_opcional('DB_REPLICA_POOL_MAX'),
+                    options='-c default_transaction_read_only=on',
+                    connection_factory=CachedConnection,
+                    **parametros
+                )
+            except Exception as error:
+                print(f"[AVISO] Réplica {parametros['host']}:{parametros['port']} indisponível: {error}")
+                continue
+            replicas.append(pool)
+        
+        cls._replica_pools = replicas
+        if replicas:
+            print(f"[OK] {len(replicas)} réplica(s) de leitura: "
+                  f"{', '.join(pool.nome for pool in replicas)}")
+    
+    @classmethod
+    def get_connection(cls, timeout=None):
+        """
+        Obtém uma conexão do pool
+        
+        Se todas estiverem em uso, espera até `timeout` segundos (padrão:
+        DB_POOL_TIMEOUT) e então levanta PoolTimeoutError (a requisição
+        atual responde 503)
+        """
+        if cls._connection_pool is None:
+            with cls._pool_lock:
+                if cls._connection_pool is None:
+                    cls.initialize_pool()
         try:
-            cls._connection_pool = psycopg2.pool.SimpleConnectionPool(
-                minconn,
-                maxconn,
-                host=os.getenv('DB_HOST', 'localhost'),
-                port=os.getenv('DB_PORT', '5432'),
-                database=os.getenv('DB_NAME', 'sistema_avaliacao'),
-                user=os.getenv('DB_USER', 'postgres'),
-                password=os.getenv('DB_PASSWORD', 'postgres')
-            )
-            print("[OK] Pool de conexões inicializado com sucesso!")
-        except Exception as error:
-            print(f"[ERRO] Erro ao inicializar pool de conexões: {error}")
+            return cls._connection_pool.getconn(timeout)
+        except PoolTimeoutError as error:
+            timeouts.registrar_falha(error)
             raise
     
     @classmethod
-    def get_connection(cls):
-        """Obtém uma conexão do pool"""
-        if cls._connection_pool is None:
-            cls.initialize_pool()
-        return cls._connection_pool.getconn()
+    def parametros_conexao(cls):
+        """
+        Parâmetros com que o pool do primário foi criado, para conexões
+        abertas fora dele (ex.: a do LISTEN); os do ambiente, se o pool
+        ainda não existir
+        """
+        return dict(cls._parametros or parametros_primario())
     
     @classmethod
-    def return_connection(cls, connection):
+    def return_connection(cls, connection, close=False):
         """Retorna a conexão ao pool"""
         if cls._connection_pool:
-            cls._connection_pool.putconn(connection)
+            cls._connection_pool.putconn(connection, close=close)
+    
+    @classmethod
+    @contextmanager
+    def transaction(cls):
+        """
+        Abre uma unidade de trabalho: uma conexão do pool e um único commit
+        
+        Blocos aninhados (inclusive os usados internamente pelos models e por
+        execute_query) participam da transação mais externa, então um
+        controller pode compor várias chamadas de model numa só transação.
+        Se qualquer bloco levantar exceção, tudo é desfeito. Dentro de uma
+        requisição, cada comando fica limitado ao statement_timeout da rota
+        (ver backend/config/timeouts.py).
+        
+        Dentro de uma requisição Flask a conexão usada é a da requisição
+        (ver request_connection), então o pool é acessado no máximo uma vez
+        por requisição, mesmo com várias transações em sequência.
+        
+        Exemplo:
+            with Database.transaction() as tx:
+                tx.execute("UPDATE ...", (...))
+                linhas = tx.fetch_all("SELECT ...", (...))
+        """
+        atual = getattr(_contexto, 'transaction', None)
+        if atual is not None:
+            yield atual
+            return
+        
+        connection = cls.request_connection()
+        conexao_propria = connection is None
+        if conexao_propria:
+            connection = cls.get_connection()
+        
+        tx = Transaction(connection)
+        _contexto.transaction = tx
+        try:
+            tx._aplicar_timeout_da_requisicao()
+            yield tx
+            if tx.escreveu and has_app_context():
+                # Leituras seguintes desta requisição ficam no primário
+                g._db_escreveu = True
+            connection.commit()
+        except BaseException as error:
+            connection.rollback()
+            timeouts.registrar_falha(error)
+            raise
+        finally:
+            _contexto.transaction = None
+            if conexao_propria:
+                cls.return_connection(connection)
+        tx._executar_apos_commit()
+    
+    @classmethod
+    @contextmanager
+    def read_transaction(cls):
+        """
+        Transação somente leitura, servida por uma réplica quando possível
+        
+        Fica no primário quando não há réplicas configuradas, quando já
+        existe uma transação ativa (inclusive de escrita) na thread, ou
+        quando a requisição atual já gravou algo (leitura após escrita).
+        Se nenhuma réplica responder, também cai para o primário.
+        
+        Exemplo:
+            with Database.read_transaction() as tx:
+                linhas = tx.fetch_all("SELECT ...", (...))
+        """
+        atual = getattr(_contexto, 'transaction', None) or getattr(_contexto, 'leitura', None)
+        if atual is not None:
+            yield atual
+            return
+        
+        conexao = None
+        if cls._replica_pools and not (has_app_context() and g.get('_db_escreveu')):
+            conexao, pool, conexao_propria = cls._replica_connection()
+        
+        if conexao is None:
+            with cls.transaction() as tx:
+                yield tx
+            return
+        
+        tx = Transaction(conexao)
+        _contexto.leitura = tx
+        try:
+            tx._aplicar_timeout_da_requisicao()
+            yield tx
+            conexao.commit()
+        except BaseException as error:
+            conexao.rollback()
+            timeouts.registrar_falha(error)
+            raise
+        finally:
+            _contexto.leitura = None
+            if conexao_propria:
+                pool.putconn(conexao)
+    
+    @classmethod
+    def _replica_connection(cls):
+        """
+        Obtém uma conexão de réplica (em rodízio entre as réplicas)
+        
+        Dentro de uma requisição Flask a conexão fica guardada em `g`, como
+        a do primário. Retorna (conexão, pool, se_deve_ser_devolvida) ou
+        (None, None, False) se nenhuma réplica estiver disponível.
+        """
+        if has_app_context():
+            atual = g.get('_db_replica')
+            if atual is not None:
+                return atual[0], atual[1], False
+        
+        pools = cls._replica_pools
+        inicio = next(cls._replica_rodizio)
+        for deslocamento in range(len(pools)):
+            pool = pools[(inicio + deslocamento) % len(pools)]
+            try:
+                conexao = pool.getconn()
+            except Exception as error:
+                print(f"[AVISO] Réplica {pool.nome} indisponível, tentando a próxima: {error}")
+                continue
+            
+            if has_app_context():
+                g._db_replica = (conexao, pool)
+                return conexao, pool, False
+            return conexao, pool, True
+        
+        return None, None, False
+    
+    @classmethod
+    def request_connection(cls):
+        """
+        Retorna a conexão vinculada à requisição Flask atual
+        
+        A conexão é retirada do pool no primeiro uso e guardada em `g`;
+        é devolvida por release_request_connection no teardown do app.
+        Fora de um contexto Flask retorna None.
+        """
+        if not has_app_context():
+            return None
+        
+        connection = g.get('_db_connection')
+        if connection is None:
+            connection = cls.get_connection()
+            g._db_connection = connection
+        return connection
+    
+    @classmethod
+    def release_request_connection(cls, exception=None):
+        """Devolve aos pools as conexões (primário e réplica) da requisição atual"""
+        connection = g.pop('_db_connection', None)
+        if connection is not None:
+            # putconn desfaz qualquer transação deixada aberta
+            cls.return_connection(connection)
+        
+        replica = g.pop('_db_replica', None)
+        if replica is not None:
+            conexao, pool = replica
+            pool.putconn(conexao)
+        g.pop('_db_escreveu', None)
+    
+    @classmethod
+    def current_transaction(cls):
+        """Retorna a transação ativa na thread atual (ou None)"""
+        return getattr(_contexto, 'transaction', None)
+    
+    @classmethod
+    def pool_stats(cls):
+        """
+        Retorna as métricas atuais do pool (em uso, ociosas, espera etc.)
+        
+        As réplicas, se houver, aparecem em 'replicas'
+        """
+        if cls._connection_pool is None:
+            return None
+        stats = cls._connection_pool.stats()
+        stats['replicas'] = [
+            dict(pool.stats(), host=pool.nome) for pool in cls._replica_pools
+        ]
+        return stats
+    
+    @classmethod
+    def statement_cache_stats(cls):
+        """Retorna hits/misses/evictions do cache de prepared statements"""
+        stats = PreparedStatementCache.estatisticas.snapshot()
+        stats['capacidade_por_conexao'] = statement_cache_size()
+        return stats
     
     @classmethod
     def close_all_connections(cls):
         """Fecha todas as conexões do pool"""
+        for pool in cls._replica_pools:
+            pool.closeall()
         if cls._connection_pool:
             cls._connection_pool.closeall()
             print("[OK] Todas as conexões foram fechadas")
@@ -60,41 +541,62 @@ def execute_query(query, params=None, fetch=True):
     """
     Executa uma query SQL e retorna os resultados
     
+    Se houver uma transação ativa (Database.transaction()), a query participa
+    dela; caso contrário, roda numa transação própria. Consultas somente
+    leitura (fetch=True) vão para uma réplica, se configurada
+    
     Args:
         query (str): Query SQL a ser executada
         params (tuple): Parâmetros da query (opcional)
-        fetch (bool): Se True, retorna os resultados. Se False, faz commit
+        fetch (bool): Se True, retorna os resultados. Se False, retorna as linhas afetadas
     
     Returns:
         list: Lista de resultados (se fetch=True)
         int: Número de linhas afetadas (se fetch=False)
     """
-    connection = None
-    cursor = None
-    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(cursor_factory=RealDictCursor)
-        
-        cursor.execute(query, params)
+        if fetch and somente_leitura(query):
+            with Database.read_transaction() as tx:
+                return tx.fetch_all(query, params)
         
-        if fetch:
-            results = cursor.fetchall()
-            return [dict(row) for row in results]
-        else:
-            connection.commit()
-            return cursor.rowcount
-            
+        with Database.transaction() as tx:
+            if fetch:
+                return tx.fetch_all(query, params)
+            return tx.execute(query, params)
     except Exception as error:
-        if connection:
-            connection.rollback()
         print(f"[ERRO] Erro ao executar query: {error}")
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            Database.return_connection(connection)
+
+def iter_query(query, params=None, itersize=None):
+    """
+    Versão em streaming de execute_query: gera as linhas uma a uma
+    
+    Usa um cursor nomeado (do lado do servidor), buscando `itersize` linhas
+    por vez, em vez de carregar o resultado inteiro com fetchall(). A
+    transação (e a conexão, de réplica quando houver) ficam abertas até o
+    gerador ser esgotado ou fechado.
+    
+    Args:
+        query (str): Query SQL (apenas SELECT)
+        params (tuple): Parâmetros da query (opcional)
+        itersize (int): Linhas por lote (padrão: DB_STREAM_ITERSIZE)
+    
+    Yields:
+        RealDictRow: cada linha do resultado
+    """
+    # O gerador só roda quando é consumido (já fora do model), então a
+    # origem para as métricas é identificada agora
+    return _iterar(query, params, itersize, metrics.origem_chamador())
+
+def _iterar(query, params, itersize, origem_query):
+    try:
+        with Database.read_transaction() as tx:
+            yield from tx.iter_rows(query, params, itersize, origem_query)
+    except GeneratorExit:
+        raise
+    except Exception as error:
+        print(f"[ERRO] Erro ao executar query em streaming: {error}")
+        raise
 
 def execute_many(query, params_list):
     """
@@ -108,26 +610,30 @@ def execute_many(query, params_list):
     Returns:
         int: Número total de linhas afetadas
     """
-    connection = None
-    cursor = None
-    
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        cursor.executemany(query, params_list)
-        connection.commit()
-        
-        return cursor.rowcount
-            
+        with Database.transaction() as tx:
+            return tx.execute_many(query, params_list)
     except Exception as error:
-        if connection:
-            connection.rollback()
         print(f"[ERRO] Erro ao executar queries em lote: {error}")
         raise
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            Database.return_connection(connection)
 
+def bulk_insert(tabela, colunas, linhas, on_conflict=None, metodo=None):
+    """
+    Carga em lote (COPY, ou INSERT ... VALUES paginado como alternativa)
+    
+    Args:
+        tabela (str): Tabela de destino
+        colunas (list): Colunas, na ordem dos valores de cada linha
+        linhas (iterable): Tuplas de valores (pode ser um gerador)
+        on_conflict (str): Cláusula ON CONFLICT (força INSERT ... VALUES)
+        metodo (str): 'copy' ou 'values' (padrão: DB_BULK_METODO)
+    
+    Returns:
+        int: Número de linhas inseridas
+    """
+    try:
+        with Database.transaction() as tx:
+            return tx.bulk_insert(tabela, colunas, linhas, on_conflict=on_conflict, metodo=metodo)
+    except Exception as error:
+        print(f"[ERRO] Erro na carga em lote em {tabela}: {error}")
+        raise
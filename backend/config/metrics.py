@@ -0,0 +1,192 @@
+"""
+Instrumentação das queries SQL
+Mede cada comando, identifica o método de model que o originou, mantém
+histogramas em memória e registra as queries lentas
+"""
+import contextvars
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites dos buckets do histograma, em segundos
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Método de model informado explicitamente (ex.: pelo decorator @consulta)
+_origem_atual = contextvars.ContextVar('origem_query', default=None)
+
+
+def slow_query_ms():
+    """Limite (ms) a partir do qual a query é registrada como lenta (DB_SLOW_QUERY_MS)"""
+    valor = os.getenv('DB_SLOW_QUERY_MS')
+    return float(valor) if valor not in (None, '') else 500.0
+
+
+def _operacao(query):
+    partes = query.lstrip(' \t\r\n(').split(None, 1)
+    return partes[0].upper() if partes else ''
+
+
+def origem_chamador():
+    """
+    Procura na pilha o primeiro método fora de backend.config
+
+    Normalmente é o método do model (ex.: AvaliacoesModel.criar); para SQL
+    escrito direto num controller, o método do controller.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        modulo = frame.f_globals.get('__name__', '')
+        if modulo.startswith('backend.') and not modulo.startswith('backend.config.'):
+            # co_qualname só existe a partir do Python 3.11
+            return getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+        frame = frame.f_back
+    return 'desconhecido'
+
+
+@contextmanager
+def origem(nome):
+    """Atribui as queries executadas dentro do bloco ao método `nome`"""
+    token = _origem_atual.set(nome)
+    try:
+        yield
+    finally:
+        _origem_atual.reset(token)
+
+
+class _Histograma:
+    __slots__ = ('buckets', 'soma', 'total', 'erros', 'lentas', 'maximo')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.soma = 0.0
+        self.total = 0
+        self.erros = 0
+        self.lentas = 0
+        self.maximo = 0.0
+
+    def observar(self, duracao, erro, lenta):
+        for indice, limite in enumerate(BUCKETS):
+            if duracao <= limite:
+                self.buckets[indice] += 1
+                break
+        self.soma += duracao
+        self.total += 1
+        self.maximo = max(self.maximo, duracao)
+        if erro:
+            self.erros += 1
+        if lenta:
+            self.lentas += 1
+
+
+class QueryMetrics:
+    """Histogramas de duração por (método de origem, operação SQL)"""
+
+    _lock = threading.Lock()
+    _series = {}
+
+    @classmethod
+    def registrar(cls, query, duracao, erro=False, origem_query=None):
+        origem_query = origem_query or _origem_atual.get() or origem_chamador()
+        operacao = _operacao(query)
+        limite = slow_query_ms()
+        lenta = limite > 0 and duracao * 1000 >= limite
+
+        with cls._lock:
+            serie = cls._series.get((origem_query, operacao))
+            if serie is None:
+                serie = cls._series[(origem_query, operacao)] = _Histograma()
+            serie.observar(duracao, erro, lenta)
+
+        if lenta:
+            texto = ' '.join(query.split())
+            if len(texto) > 300:
+                texto = texto[:300] + '...'
+            print(f"[AVISO] Query lenta ({duracao * 1000:.1f} ms) em {origem_query}: {texto}")
+
+    @classmethod
+    def snapshot(cls):
+        """Cópia das séries: {(origem, operação): dict com buckets, soma, total...}"""
+        with cls._lock:
+            return {
+                chave: {
+                    'buckets': list(serie.buckets),
+                    'soma': serie.soma,
+                    'total': serie.total,
+                    'erros': serie.erros,
+                    'lentas': serie.lentas,
+                    'maximo': serie.maximo
+                }
+                for chave, serie in cls._series.items()
+            }
+
+    @classmethod
+    def limpar(cls):
+        with cls._lock:
+            cls._series.clear()
+
+
+@contextmanager
+def medir(query, origem_query=None):
+    """Mede o bloco que executa `query` e registra no QueryMetrics"""
+    inicio = time.perf_counter()
+    erro = False
+    try:
+        yield
+    except BaseException:
+        erro = True
+        raise
+    finally:
+        QueryMetrics.registrar(query, time.perf_counter() - inicio, erro, origem_query)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(**rotulos):
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + '}'
+
+
+def prometheus_text(extras=None):
+    """
+    Exporta as métricas no formato texto do Prometheus
+
+    Args:
+        extras (dict): gauges adicionais {nome: (ajuda, {rótulos_tuple: valor})}
+    """
+    linhas = [
+        '# HELP db_query_duration_seconds Duração das queries SQL por método de origem',
+        '# TYPE db_query_duration_seconds histogram',
+    ]
+    series = sorted(QueryMetrics.snapshot().items())
+
+    for (metodo, operacao), serie in series:
+        acumulado = 0
+        for limite, quantidade in zip(BUCKETS, serie['buckets']):
+            acumulado += quantidade
+            rotulos = _rotulos(metodo=metodo, operacao=operacao, le=limite)
+            linhas.append(f'db_query_duration_seconds_bucket{rotulos} {acumulado}')
+        rotulos = _rotulos(metodo=metodo, operacao=operacao, le='+Inf')
+        linhas.append(f'db_query_duration_seconds_bucket{rotulos} {serie["total"]}')
+        rotulos = _rotulos(metodo=metodo, operacao=operacao)
+        linhas.append(f'db_query_duration_seconds_sum{rotulos} {serie["soma"]:.6f}')
+        linhas.append(f'db_query_duration_seconds_count{rotulos} {serie["total"]}')
+
+    for nome, ajuda, campo in (
+        ('db_query_errors_total', 'Queries que terminaram em erro', 'erros'),
+        ('db_slow_queries_total', 'Queries acima de DB_SLOW_QUERY_MS', 'lentas'),
+    ):
+        linhas.append(f'# HELP {nome} {ajuda}')
+        linhas.append(f'# TYPE {nome} counter')
+        for (metodo, operacao), serie in series:
+            linhas.append(f'{nome}{_rotulos(metodo=metodo, operacao=operacao)} {serie[campo]}')
+
+    for nome, (ajuda, valores) in (extras or {}).items():
+        linhas.append(f'# HELP {nome} {ajuda}')
+        linhas.append(f'# TYPE {nome} gauge')
+        for rotulos, valor in valores.items():
+            linhas.append(f'{nome}{_rotulos(**dict(rotulos))} {valor}')
+
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,165 @@
+"""
+Notificações do PostgreSQL (LISTEN/NOTIFY)
+Uma única conexão dedicada escuta os canais e repassa as mensagens aos
+assinantes em memória (ex.: os clientes SSE do dashboard), sem que cada
+cliente ocupe uma conexão do pool
+"""
+import json
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions, sql
+
+from backend.config.database import Database
+
+# Atividades novas ou alteradas (ver DashboardModel.notificar_atividade)
+CANAL_ATIVIDADES = 'atividades'
+
+# Mensagens guardadas por assinante antes de ele ser considerado atrasado
+_TAMANHO_FILA = 100
+
+
+class Assinatura:
+    """Fila de mensagens de um assinante"""
+
+    def __init__(self, canal):
+        self.canal = canal
+        self._fila = queue.Queue(maxsize=_TAMANHO_FILA)
+        self._perdeu = threading.Event()
+
+    def _entregar(self, mensagem):
+        try:
+            self._fila.put_nowait(mensagem)
+        except queue.Full:
+            # Assinante lento: descarta e avisa na próxima leitura
+            self._marcar_perda()
+
+    def _marcar_perda(self):
+        self._perdeu.set()
+
+    def proxima(self, timeout=None):
+        """
+        Próxima mensagem (dict), ou None se nada chegar em `timeout` segundos
+
+        Levanta MensagensPerdidas se alguma mensagem foi descartada desde a
+        última leitura (fila cheia ou reconexão ao banco).
+        """
+        if self._perdeu.is_set():
+            self._perdeu.clear()
+            raise MensagensPerdidas()
+        try:
+            return self._fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MensagensPerdidas(Exception):
+    """O assinante deixou de receber mensagens e deve recarregar o estado"""
+
+
+class Ouvinte:
+    """Thread única com a conexão em LISTEN, iniciada na primeira assinatura"""
+
+    _lock = threading.Lock()
+    _assinantes = {}
+    _thread = None
+
+    @classmethod
+    def assinar(cls, canal):
+        assinatura = Assinatura(canal)
+        with cls._lock:
+            cls._assinantes.setdefault(canal, set()).add(assinatura)
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(target=cls._executar, name='ouvinte-notify', daemon=True)
+                cls._thread.start()
+        return assinatura
+
+    @classmethod
+    def cancelar(cls, assinatura):
+        with cls._lock:
+            assinantes = cls._assinantes.get(assinatura.canal)
+            if assinantes is not None:
+                assinantes.discard(assinatura)
+                if not assinantes:
+                    del cls._assinantes[assinatura.canal]
+
+    @classmethod
+    def total_assinantes(cls):
+        with cls._lock:
+            return sum(len(assinantes) for assinantes in cls._assinantes.values())
+
+    @classmethod
+    def _distribuir(cls, canal, mensagem):
+        with cls._lock:
+            assinantes = list(cls._assinantes.get(canal, ()))
+        for assinatura in assinantes:
+            if mensagem is None:
+                assinatura._marcar_perda()
+            else:
+                assinatura._entregar(mensagem)
+
+    @classmethod
+    def _conectar(cls):
+        # Mesmo banco do pool do primário (é nele que os NOTIFY são feitos)
+        conexao = psycopg2.connect(**Database.parametros_conexao())
+        conexao.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conexao
+
+    @classmethod
+    def _executar(cls):
+        espera = 1.0
+        conectado_antes = False
+        while True:
+            conexao = None
+            try:
+                conexao = cls._conectar()
+                ouvindo = set()
+                if conectado_antes:
+                    # O que foi publicado durante a queda não chega mais
+                    for canal in list(cls._assinantes):
+                        cls._distribuir(canal, None)
+                conectado_antes = True
+                espera = 1.0
+
+                while True:
+                    with cls._lock:
+                        canais = set(cls._assinantes)
+                    if not canais:
+                        # Ninguém ouvindo: libera a conexão; a próxima assinatura reinicia
+                        with cls._lock:
+                            if not cls._assinantes:
+                                cls._thread = None
+                                return
+                        continue
+
+                    with conexao.cursor() as cursor:
+                        for canal in canais - ouvindo:
+                            cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+                        for canal in ouvindo - canais:
+                            cursor.execute(sql.SQL("UNLISTEN {}").format(sql.Identifier(canal)))
+                    ouvindo = canais
+
+                    if select.select([conexao], [], [], 1.0) == ([], [], []):
+                        continue
+                    conexao.poll()
+                    while conexao.notifies:
+                        notificacao = conexao.notifies.pop(0)
+                        try:
+                            mensagem = json.loads(notificacao.payload)
+                        except ValueError:
+                            mensagem = {'payload': notificacao.payload}
+                        cls._distribuir(notificacao.channel, mensagem)
+
+            except Exception as error:
+                print(f"[ERRO] Conexão de notificações caiu, reconectando em {espera:.0f}s: {error}")
+                time.sleep(espera)
+                espera = min(espera * 2, 30.0)
+            finally:
+                if conexao is not None:
+                    try:
+                        conexao.close()
+                    except Exception:
+                        pass
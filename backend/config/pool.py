@@ -0,0 +1,297 @@
+"""
+Pool de conexões thread-safe para PostgreSQL
+Substitui o SimpleConnectionPool (que não é seguro entre threads)
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+
+class PoolTimeoutError(PoolError):
+    """Nenhuma conexão ficou disponível dentro do tempo de espera"""
+
+
+class _PooledConnection:
+    """Conexão física do pool com seus metadados de tempo"""
+
+    __slots__ = ('conn', 'criada_em', 'usada_em')
+
+    def __init__(self, conn):
+        agora = time.monotonic()
+        self.conn = conn
+        self.criada_em = agora
+        self.usada_em = agora
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def _env_float(nome, padrao):
+    valor = os.getenv(nome)
+    return float(valor) if valor not in (None, '') else padrao
+
+
+class ConnectionPool:
+    """
+    Pool de conexões bloqueante e seguro entre threads
+
+    - Quando todas as conexões estão em uso, getconn() espera até `timeout`
+      segundos em vez de falhar imediatamente
+    - Conexões ociosas há mais de `check_interval` segundos são validadas
+      com SELECT 1 antes de serem entregues
+    - Conexões mais velhas que `max_lifetime` são recicladas
+    - Conexões ociosas há mais de `max_idle` segundos (acima de minconn)
+      são fechadas
+    """
+
+    def __init__(self, minconn, maxconn, timeout=30.0, max_lifetime=1800.0,
+                 max_idle=600.0, check_interval=30.0, nome=None, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Parâmetros inválidos: é preciso 0 <= minconn <= maxconn e maxconn >= 1")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.nome = nome or f"{connect_kwargs.get('host', 'localhost')}:{connect_kwargs.get('port', 5432)}"
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._in_use = {}
+        self._total = 0
+        self._waiters = 0
+        self._closed = False
+
+        # Contadores para estatísticas
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._acquire_total = 0.0
+        self._acquire_max = 0.0
+        self._opened = 0
+        self._discarded = 0
+
+        for _ in range(minconn):
+            entry = self._connect()
+            with self._cond:
+                self._total += 1
+                self._idle.append(entry)
+
+    @classmethod
+    def from_env(cls, minconn=None, maxconn=None, **connect_kwargs):
+        """Cria o pool lendo dimensionamento e limites das variáveis de ambiente"""
+        return cls(
+            _env_int('DB_POOL_MIN', 1) if minconn is None else minconn,
+            _env_int('DB_POOL_MAX', 10) if maxconn is None else maxconn,
+            timeout=_env_float('DB_POOL_TIMEOUT', 30.0),
+            max_lifetime=_env_float('DB_POOL_MAX_LIFETIME', 1800.0),
+            max_idle=_env_float('DB_POOL_MAX_IDLE', 600.0),
+            check_interval=_env_float('DB_POOL_CHECK_INTERVAL', 30.0),
+            **connect_kwargs
+        )
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._cond:
+            self._opened += 1
+        return _PooledConnection(conn)
+
+    def _close_quietly(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _expirada(self, entry, agora):
+        return self.max_lifetime > 0 and agora - entry.criada_em > self.max_lifetime
+
+    def _utilizavel(self, entry):
+        """Verifica se uma conexão ociosa ainda pode ser entregue"""
+        if entry.conn.closed:
+            return False
+
+        agora = time.monotonic()
+        if self._expirada(entry, agora):
+            return False
+
+        if agora - entry.usada_em > self.check_interval:
+            try:
+                with entry.conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                entry.conn.rollback()
+            except Exception:
+                return False
+
+        return True
+
+    def _remover_ociosas(self):
+        """Retira da fila as conexões ociosas há tempo demais (chamar com o lock)"""
+        descartar = []
+        if self.max_idle <= 0:
+            return descartar
+
+        agora = time.monotonic()
+        while self._idle and self._total > self.minconn and agora - self._idle[0].usada_em > self.max_idle:
+            descartar.append(self._idle.popleft())
+            self._total -= 1
+            self._discarded += 1
+        return descartar
+
+    def getconn(self, timeout=None):
+        """
+        Obtém uma conexão do pool, esperando até `timeout` segundos
+
+        Raises:
+            PoolTimeoutError: se nenhuma conexão ficar disponível a tempo
+            PoolError: se o pool já foi fechado
+        """
+        timeout = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        limite = inicio + timeout
+
+        with self._cond:
+            descartar = self._remover_ociosas()
+            while True:
+                if self._closed:
+                    raise PoolError("Pool de conexões fechado")
+
+                if self._idle:
+                    # LIFO: reaproveita a conexão mais recente (mais quente)
+                    entry = self._idle.pop()
+                    break
+
+                if self._total < self.maxconn:
+                    # Reserva a vaga antes de abrir a conexão fora do lock
+                    self._total += 1
+                    entry = None
+                    break
+
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Tempo de espera esgotado ({timeout:.1f}s) aguardando conexão do pool "
+                        f"({self.maxconn} conexões em uso)"
+                    )
+
+                self._waiters += 1
+                try:
+                    self._cond.wait(restante)
+                finally:
+                    self._waiters -= 1
+
+        for item in descartar:
+            self._close_quietly(item)
+
+        try:
+            if entry is not None and not self._utilizavel(entry):
+                self._close_quietly(entry)
+                with self._cond:
+                    self._discarded += 1
+                entry = None
+
+            if entry is None:
+                entry = self._connect()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        espera = time.monotonic() - inicio
+        with self._cond:
+            self._in_use[id(entry.conn)] = entry
+            self._acquisitions += 1
+            self._acquire_total += espera
+            self._acquire_max = max(self._acquire_max, espera)
+
+        return entry.conn
+
+    def putconn(self, conn, close=False):
+        """
+        Devolve uma conexão ao pool (ou a descarta se estiver inutilizável)
+
+        Uma conexão que o pool não acompanha mais (retirada antes de um
+        closeall(), ou de um pool substituído por Database.initialize_pool)
+        é apenas fechada.
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+
+        if entry is None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+
+        descartar = close or self._closed or conn.closed or self._expirada(entry, time.monotonic())
+
+        if not descartar:
+            # Garante que nenhuma transação aberta vaze para o próximo uso
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                descartar = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    descartar = True
+
+        if descartar:
+            self._close_quietly(entry)
+            with self._cond:
+                self._total -= 1
+                self._discarded += 1
+                self._cond.notify()
+            return
+
+        entry.usada_em = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def closeall(self):
+        """Fecha todas as conexões e impede novas retiradas"""
+        with self._cond:
+            self._closed = True
+            entries = list(self._idle) + list(self._in_use.values())
+            self._idle.clear()
+            self._in_use.clear()
+            self._total = 0
+            self._cond.notify_all()
+
+        for entry in entries:
+            self._close_quietly(entry)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        """Retorna um retrato das métricas do pool para dimensionamento"""
+        with self._cond:
+            aquisicoes = self._acquisitions
+            return {
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'total': self._total,
+                'em_uso': len(self._in_use),
+                'ociosas': len(self._idle),
+                'aguardando': self._waiters,
+                'aquisicoes': aquisicoes,
+                'timeouts': self._timeouts,
+                'espera_media_ms': round(self._acquire_total / aquisicoes * 1000, 3) if aquisicoes else 0.0,
+                'espera_max_ms': round(self._acquire_max * 1000, 3),
+                'conexoes_abertas': self._opened,
+                'conexoes_descartadas': self._discarded
+            }
@@ -0,0 +1,302 @@
+"""
+Cache de prepared statements por conexão
+Evita que o PostgreSQL refaça parse e planejamento de queries repetidas
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from psycopg2 import errorcodes, extensions
+
+# Apenas estes comandos podem ser preparados com PREPARE
+_PREPARAVEIS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'VALUES')
+
+# Comandos que alteram o schema e invalidam os planos em cache
+_DDL = ('CREATE', 'ALTER', 'DROP', 'COMMENT')
+
+# Erros que indicam que o statement preparado não serve mais
+_ERROS_INVALIDACAO = (
+    errorcodes.FEATURE_NOT_SUPPORTED,        # cached plan must not change result type
+    errorcodes.INVALID_SQL_STATEMENT_NAME,   # prepared statement does not exist
+)
+
+# Savepoint em volta de cada EXECUTE dentro de transações (ver execute)
+_SAVEPOINT_EXECUTE = 'exec_stmt'
+
+_PLACEHOLDER = re.compile(r"%%|%s|'(?:[^']|'')*'")
+
+
+def _primeira_palavra(query):
+    partes = query.lstrip(' \t\r\n(').split(None, 1)
+    return partes[0].upper() if partes else ''
+
+
+def _converter_placeholders(query, com_parametros):
+    """
+    Converte os placeholders do psycopg2 (%s) para os do PREPARE ($1, $2...)
+
+    Returns:
+        tuple: (query convertida, quantidade de parâmetros), ou None se a
+        query não puder ser preparada (placeholder dentro de literal,
+        parâmetros nomeados etc.)
+    """
+    if not com_parametros:
+        # Sem parâmetros o psycopg2 não interpreta '%', a query vai como está
+        return query, 0
+
+    contador = 0
+    partes = []
+    ultimo = 0
+
+    for match in _PLACEHOLDER.finditer(query):
+        token = match.group(0)
+        partes.append(query[ultimo:match.start()])
+        ultimo = match.end()
+
+        if token.startswith("'"):
+            if '%s' in token.replace('%%', ''):
+                # Ex.: INTERVAL '%s years' só funciona com interpolação textual
+                return None
+            # O psycopg2 também troca '%%' por '%' dentro de literais
+            partes.append(token.replace('%%', '%'))
+        elif token == '%%':
+            partes.append('%')
+        else:
+            contador += 1
+            partes.append(f'${contador}')
+
+    partes.append(query[ultimo:])
+    convertida = ''.join(partes)
+
+    if '%(' in convertida:
+        return None
+
+    return convertida, contador
+
+
+class _Estatisticas:
+    """Contadores globais (somados entre todas as conexões)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidacoes': 0,
+            'nao_preparaveis': 0
+        }
+
+    def incrementar(self, chave, valor=1):
+        with self._lock:
+            self._valores[chave] += valor
+
+    def snapshot(self):
+        with self._lock:
+            dados = dict(self._valores)
+        consultas = dados['hits'] + dados['misses']
+        dados['taxa_acerto'] = round(dados['hits'] / consultas, 4) if consultas else 0.0
+        return dados
+
+
+class PreparedStatementCache:
+    """
+    Cache LRU de prepared statements de uma conexão, indexado pelo texto SQL
+
+    Na primeira execução de uma query a conexão faz PREPARE (dentro de um
+    savepoint, para que uma falha não invalide a transação do chamador);
+    nas seguintes, apenas EXECUTE. Ao exceder a capacidade, o statement
+    menos usado recentemente é desalocado.
+
+    Se o servidor recusar um statement preparado (ex.: schema alterado por
+    fora, "cached plan must not change result type"), ele sai do cache e a
+    query é executada uma vez sem preparar; a próxima chamada prepara de novo.
+    Dentro de uma transação o EXECUTE roda num savepoint para isso, criado na
+    mesma ida ao servidor e liberado junto com o comando seguinte da conexão
+    (ou pelo próprio commit/rollback), sem idas extras.
+    """
+
+    estatisticas = _Estatisticas()
+
+    # Incrementada a cada mudança de schema; caches de outra geração são descartados
+    _geracao = 0
+    _geracao_lock = threading.Lock()
+
+    # Queries que o PostgreSQL recusou preparar (não adianta tentar de novo)
+    _recusadas = set()
+
+    def __init__(self, capacidade):
+        self.capacidade = capacidade
+        self._statements = OrderedDict()
+        self._pendentes = []
+        self._sequencia = 0
+        self._geracao_local = PreparedStatementCache._geracao
+        self._savepoint_aberto = False
+
+    @classmethod
+    def invalidar_todos(cls):
+        """Marca os caches de todas as conexões como obsoletos (ex.: após DDL)"""
+        with cls._geracao_lock:
+            cls._geracao += 1
+            cls._recusadas.clear()
+        cls.estatisticas.incrementar('invalidacoes')
+
+    def __len__(self):
+        return len(self._statements)
+
+    def transacao_encerrada(self):
+        """Commit ou rollback da conexão: o savepoint do último EXECUTE deixou de existir"""
+        self._savepoint_aberto = False
+
+    def _liberar_savepoint(self, cursor):
+        """Prefixo que libera o savepoint do último EXECUTE, a enviar com o próximo comando"""
+        if not self._savepoint_aberto:
+            return ''
+        self._savepoint_aberto = False
+        if cursor.connection.info.transaction_status != extensions.TRANSACTION_STATUS_INTRANS:
+            # Transação abortada: o ROLLBACK (TO SAVEPOINT) que vier depois o descarta
+            return ''
+        return f"RELEASE SAVEPOINT {_SAVEPOINT_EXECUTE}; "
+
+    def _sincronizar(self, cursor):
+        """Desaloca statements obsoletos antes de preparar novos"""
+        if self._geracao_local != PreparedStatementCache._geracao:
+            cursor.execute("DEALLOCATE ALL")
+            self._statements.clear()
+            self._pendentes.clear()
+            self._geracao_local = PreparedStatementCache._geracao
+            return
+
+        while self._pendentes:
+            nome = self._pendentes.pop()
+            cursor.execute(f"DEALLOCATE {nome}")
+
+    def _preparar(self, cursor, query, params, prefixo=''):
+        convertida = _converter_placeholders(query, params is not None)
+        if convertida is None or (params is not None and len(params) != convertida[1]):
+            if convertida is None:
+                PreparedStatementCache._recusadas.add(query)
+                self.estatisticas.incrementar('nao_preparaveis')
+            # Nada foi enviado: o savepoint do último EXECUTE continua aberto
+            self._savepoint_aberto = bool(prefixo)
+            return None
+
+        texto, quantidade = convertida
+
+        self._sincronizar(cursor)
+
+        while len(self._statements) >= self.capacidade:
+            _, (antigo, _) = self._statements.popitem(last=False)
+            cursor.execute(f"DEALLOCATE {antigo}")
+            self.estatisticas.incrementar('evictions')
+
+        self._sequencia += 1
+        nome = f"stmt_{self._sequencia}"
+
+        try:
+            cursor.execute(
+                f"{prefixo}SAVEPOINT prepare_{nome}; PREPARE {nome} AS {texto}; RELEASE SAVEPOINT prepare_{nome}"
+            )
+        except Exception:
+            # Ex.: tipo de parâmetro que o PostgreSQL não consegue inferir
+            cursor.execute(f"ROLLBACK TO SAVEPOINT prepare_{nome}; RELEASE SAVEPOINT prepare_{nome}")
+            PreparedStatementCache._recusadas.add(query)
+            self.estatisticas.incrementar('nao_preparaveis')
+            return None
+
+        self._statements[query] = (nome, quantidade)
+        return nome, quantidade
+
+    def execute(self, cursor, query, params=None):
+        """Executa a query no cursor usando (ou criando) o prepared statement"""
+        palavra = _primeira_palavra(query)
+        prefixo = self._liberar_savepoint(cursor)
+
+        if palavra in _DDL:
+            cursor.execute(prefixo + query, params)
+            PreparedStatementCache.invalidar_todos()
+            return
+
+        if (
+            self.capacidade <= 0
+            or palavra not in _PREPARAVEIS
+            or isinstance(params, dict)
+            or query in PreparedStatementCache._recusadas
+            or cursor.connection.info.transaction_status == extensions.TRANSACTION_STATUS_INERROR
+        ):
+            cursor.execute(prefixo + query, params)
+            return
+
+        if self._geracao_local != PreparedStatementCache._geracao:
+            self._statements.clear()
+
+        entrada = self._statements.get(query)
+        if entrada is not None:
+            self._statements.move_to_end(query)
+            self.estatisticas.incrementar('hits')
+        else:
+            self.estatisticas.incrementar('misses')
+            entrada = self._preparar(cursor, query, params, prefixo)
+            if entrada is None:
+                cursor.execute(query, params)
+                return
+            prefixo = ''
+
+        nome, quantidade = entrada
+        if quantidade:
+            comando = f"EXECUTE {nome} ({', '.join(['%s'] * quantidade)})"
+            argumentos = tuple(params)
+        else:
+            comando, argumentos = f"EXECUTE {nome}", None
+
+        # Dentro de uma transação o EXECUTE roda num savepoint (na mesma ida
+        # ao servidor): se o plano não servir mais, só ele é desfeito
+        em_transacao = cursor.connection.info.transaction_status == extensions.TRANSACTION_STATUS_INTRANS
+        try:
+            if em_transacao:
+                cursor.execute(f"{prefixo}SAVEPOINT {_SAVEPOINT_EXECUTE}; {comando}", argumentos)
+            else:
+                cursor.execute(prefixo + comando, argumentos)
+        except Exception as error:
+            codigo = getattr(error, 'pgcode', None)
+            if codigo not in _ERROS_INVALIDACAO:
+                raise
+            self._statements.pop(query, None)
+            self.estatisticas.incrementar('invalidacoes')
+            if codigo == errorcodes.FEATURE_NOT_SUPPORTED:
+                # Desalocado antes do próximo PREPARE, que cria um statement novo
+                self._pendentes.append(nome)
+            if em_transacao:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT_EXECUTE}; RELEASE SAVEPOINT {_SAVEPOINT_EXECUTE}")
+            else:
+                # A falha foi o primeiro comando da transação implícita: nada mais se perde
+                cursor.connection.rollback()
+            # Ex.: schema alterado fora da aplicação; sem preparar, a query ainda funciona
+            cursor.execute(query, params)
+            return
+
+        # Liberado junto com o próximo comando (ver _liberar_savepoint)
+        self._savepoint_aberto = em_transacao
+
+
+class CachedConnection(extensions.connection):
+    """Conexão psycopg2 com um PreparedStatementCache próprio"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_cache = PreparedStatementCache(statement_cache_size())
+
+    def commit(self):
+        self.statement_cache.transacao_encerrada()
+        super().commit()
+
+    def rollback(self):
+        self.statement_cache.transacao_encerrada()
+        super().rollback()
+
+
+def statement_cache_size():
+    """Capacidade do cache por conexão (DB_STATEMENT_CACHE_SIZE; 0 desativa)"""
+    valor = os.getenv('DB_STATEMENT_CACHE_SIZE')
+    return int(valor) if valor not in (None, '') else 100
@@ -0,0 +1,129 @@
+"""
+Limites de tempo das consultas por rota
+Cada endpoint tem um orçamento de statement_timeout, aplicado com SET LOCAL
+no início de cada transação da requisição
+"""
+import contextvars
+import os
+from contextlib import contextmanager
+
+from flask import g, has_app_context, has_request_context, jsonify, request
+from psycopg2.extensions import QueryCanceledError
+
+from backend.config.pool import PoolTimeoutError
+
+# Orçamento (ms) por endpoint; 0 desativa o limite. Os demais endpoints da
+# API usam DB_STATEMENT_TIMEOUT_MS
+TIMEOUTS_POR_ENDPOINT = {
+    # Painéis do dashboard devem responder rápido
+    'dashboard_estatisticas': 5000,
+    'dashboard_avaliacoes_mes': 5000,
+    'dashboard_motivos_saida': 5000,
+    'dashboard_status_avaliacoes': 5000,
+    'dashboard_atividades_recentes': 5000,
+    'dashboard_questionarios_usados': 5000,
+    'dashboard_avaliacoes_por_questionario': 5000,
+    'dashboard_respostas_frequencia': 5000,
+    'dashboard_avaliacoes_setor': 5000,
+    'dashboard_avaliadores_por_setor': 5000,
+    # Séries temporais podem cobrir períodos longos
+    'dashboard_avaliacoes_tempo': 10000,
+    'dashboard_pontos_por_data': 10000,
+    # Snapshot: cada painel roda em paralelo com este orçamento
+    'dashboard_snapshot': 10000,
+    # Listagens em streaming ficam abertas enquanto o cliente lê
+    'avaliacoes_listar': 60000,
+    'funcionarios_listar': 60000,
+    # Cargas e limpeza não são interrompidas
+    'funcionarios_importar': 0,
+    'admin_limpar_banco': 0,
+    'admin_reconciliar_contadores': 0,
+    'admin_verificar_colunar': 0,
+}
+
+
+# Orçamento herdado por threads auxiliares, que não têm contexto de requisição
+_limite_atual = contextvars.ContextVar('statement_timeout', default=None)
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+def _timeouts_do_ambiente():
+    """DB_STATEMENT_TIMEOUTS="endpoint=ms,endpoint=ms" sobrescreve a tabela acima"""
+    timeouts = {}
+    for item in os.getenv('DB_STATEMENT_TIMEOUTS', '').split(','):
+        endpoint, _, valor = item.partition('=')
+        if endpoint.strip() and valor.strip():
+            timeouts[endpoint.strip()] = int(valor)
+    return timeouts
+
+
+def timeout_do_endpoint(endpoint):
+    """Orçamento (ms) do endpoint, ou None se não houver limite"""
+    timeouts = dict(TIMEOUTS_POR_ENDPOINT, **_timeouts_do_ambiente())
+    if endpoint in timeouts:
+        valor = timeouts[endpoint]
+    else:
+        valor = _env_int('DB_STATEMENT_TIMEOUT_MS', 15000)
+    return valor if valor and valor > 0 else None
+
+
+def timeout_da_requisicao():
+    """Orçamento (ms) da requisição Flask atual; None fora de uma requisição"""
+    limite_explicito = _limite_atual.get()
+    if limite_explicito is not None:
+        return limite_explicito or None
+    if not has_request_context() or request.endpoint is None:
+        return None
+    return timeout_do_endpoint(request.endpoint)
+
+
+@contextmanager
+def limite(milissegundos):
+    """
+    Aplica `milissegundos` às transações abertas dentro do bloco
+
+    Usado por threads que executam trabalho de uma requisição sem o
+    contexto dela (ex.: os painéis do snapshot do dashboard)
+    """
+    token = _limite_atual.set(milissegundos or 0)
+    try:
+        yield
+    finally:
+        _limite_atual.reset(token)
+
+
+def registrar_falha(error):
+    """
+    Marca a requisição atual quando a falha é de tempo (consulta cancelada
+    ou pool esgotado), para que a resposta 500 do controller vire 504/503
+    """
+    if not has_app_context() or g.get('_db_falha_tempo') is not None:
+        return
+    if isinstance(error, QueryCanceledError):
+        g._db_falha_tempo = 504
+    elif isinstance(error, PoolTimeoutError):
+        g._db_falha_tempo = 503
+
+
+def ajustar_resposta(response):
+    """
+    Troca a resposta 500 de uma requisição marcada por registrar_falha
+
+    - 504: a consulta passou do orçamento da rota e foi cancelada
+    - 503: nenhuma conexão ficou livre a tempo; o cliente pode tentar de novo
+    """
+    status = g.pop('_db_falha_tempo', None)
+    if status is None or response.status_code != 500:
+        return response
+
+    if status == 504:
+        novo = jsonify({'error': 'A consulta excedeu o tempo limite e foi cancelada'})
+    else:
+        novo = jsonify({'error': 'Banco de dados sobrecarregado, tente novamente em instantes'})
+        novo.headers['Retry-After'] = '1'
+    novo.status_code = status
+    return novo
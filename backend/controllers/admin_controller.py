@@ -1,9 +1,19 @@
 """
 Controller para Administração
 """
-from flask import jsonify
+import re
 
+from flask import Response, jsonify, request
+
+from backend.config import metrics
+from backend.config.coalescencia import coalescedor
+from backend.config.cache import dashboard_cache
+from backend.config.async_database import AsyncDatabase
 from backend.config.database import Database
+from backend.models.colunar import MotorColunar
+from backend.models.contadores import ContadoresModel
+from backend.models.motivos_saida import MotivosSaidaModel
+from backend.models.respostas_buffer import BufferRespostas
 
 
 class AdminController:
@@ -12,26 +22,22 @@ class AdminController:
     @staticmethod
     def limpar_banco_dados():
         """Exclui todos os dados do banco de dados"""
-        conn = None
         try:
-            conn = Database.get_connection()
-            if not conn:
-                return jsonify({'error': 'Não foi possível conectar ao banco de dados'}), 500
-            
-            cursor = conn.cursor()
-            
             # Ordem de exclusão respeitando foreign keys (schema modelo 2)
             # Começamos pelas tabelas mais dependentes até chegar nas de apoio
             tabelas = [
-                # Respostas de avaliações
+                # Respostas de avaliações (e o histograma delas)
                 'Resposta',
-                # Avaliações aplicadas
+                'Resposta_Frequencia',
+                # Avaliações aplicadas (e o agregado diário delas)
                 'Avaliacao',
+                'Avaliacao_Diaria',
                 # Relação pergunta/questionário
                 'Questionario_Questao',
                 # Questionários
                 'Questionario',
-                # Opções de múltipla escolha
+                # Opções de múltipla escolha (e os motivos de saída delas)
+                'Motivo_Saida_Opcao',
                 'Opcao',
                 # Questões
                 'Questao',
@@ -44,21 +50,27 @@ class AdminController:
                 'Classificacao'
             ]
             
-            # Desabilitar temporariamente as verificações de foreign key
-            cursor.execute("SET session_replication_role = 'replica';")
+            with Database.transaction() as tx:
+                # Desabilitar temporariamente as verificações de foreign key
+                tx.execute("SET session_replication_role = 'replica';")
+                
+                for tabela in tabelas:
+                    try:
+                        # Savepoint: uma tabela com erro não invalida as demais
+                        with tx.savepoint():
+                            # RESTART IDENTITY garante que os IDs (SERIAL) voltem a começar de 1
+                            tx.execute(f"TRUNCATE TABLE {tabela} RESTART IDENTITY CASCADE;")
+                    except Exception as e:
+                        # Se a tabela não existir ou houver erro, continua
+                        print(f"Aviso ao limpar {tabela}: {str(e)}")
+                
+                # Reabilitar verificações de foreign key
+                tx.execute("SET session_replication_role = 'origin';")
             
-            for tabela in tabelas:
-                try:
-                    # RESTART IDENTITY garante que os IDs (SERIAL) voltem a começar de 1
-                    cursor.execute(f"TRUNCATE TABLE {tabela} RESTART IDENTITY CASCADE;")
-                except Exception as e:
-                    # Se a tabela não existir ou houver erro, continua
-                    print(f"Aviso ao limpar {tabela}: {str(e)}")
-            
-            # Reabilitar verificações de foreign key
-            cursor.execute("SET session_replication_role = 'origin';")
-            
-            conn.commit()
+            dashboard_cache.limpar()
+            ContadoresModel.reconciliar()
+            if MotorColunar.ativo():
+                MotorColunar.carregar()
             
             return jsonify({
                 'success': True,
@@ -66,10 +78,154 @@ class AdminController:
             }), 200
             
         except Exception as e:
-            if conn:
-                conn.rollback()
             return jsonify({'error': f'Erro ao limpar banco de dados: {str(e)}'}), 500
-        finally:
-            if conn:
-                Database.return_connection(conn)
-
+    
+    @staticmethod
+    def get_pool_stats():
+        """Retorna as métricas do pool de conexões (em uso, ociosas, espera)"""
+        stats = Database.pool_stats()
+        if stats is None:
+            return jsonify({'error': 'Pool de conexões não inicializado'}), 503
+        stats['assincrono'] = AsyncDatabase.pool_stats()
+        return jsonify(stats), 200
+    
+    @staticmethod
+    def get_statement_cache_stats():
+        """Retorna os contadores do cache de prepared statements"""
+        return jsonify(Database.statement_cache_stats()), 200
+    
+    @staticmethod
+    def get_dashboard_cache_stats():
+        """Retorna os contadores do cache de resultados do dashboard (e da coalescência)"""
+        stats = dashboard_cache.stats()
+        stats['coalescencia'] = coalescedor.stats()
+        return jsonify(stats), 200
+    
+    @staticmethod
+    def limpar_dashboard_cache():
+        """Descarta todos os resultados em cache do dashboard"""
+        dashboard_cache.limpar()
+        return jsonify({'success': True}), 200
+    
+    @staticmethod
+    def reconciliar_contadores():
+        """Recalcula os contadores das estatísticas gerais e informa as divergências"""
+        try:
+            divergencias = ContadoresModel.reconciliar()
+            return jsonify({
+                'divergencias': divergencias,
+                'contadores': ContadoresModel.valores()
+            }), 200
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @staticmethod
+    def get_colunar_stats():
+        """Retorna o estado do motor colunar (linhas, memória, conferências)"""
+        return jsonify(MotorColunar.estatisticas()), 200
+    
+    @staticmethod
+    def verificar_colunar():
+        """Confere o motor colunar com o banco e informa as divergências"""
+        if not MotorColunar.ativo():
+            return jsonify({'error': 'Motor colunar desativado'}), 409
+        try:
+            divergencias = MotorColunar.verificar()
+            return jsonify({
+                'divergencias': {campo: list(valores) for campo, valores in divergencias.items()},
+                'estatisticas': MotorColunar.estatisticas()
+            }), 200
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @staticmethod
+    def get_respostas_buffer_stats():
+        """Retorna o estado do buffer de respostas (pendentes, lotes, falhas)"""
+        return jsonify(BufferRespostas.estatisticas()), 200
+    
+    @staticmethod
+    def get_motivos_saida():
+        """Lista o mapeamento de opções de resposta em motivos de saída"""
+        try:
+            return jsonify(MotivosSaidaModel.listar_mapeamento()), 200
+        except Exception as e:
+            print(f"[ERRO] Erro ao listar motivos de saída: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+    
+    @staticmethod
+    def definir_motivos_saida():
+        """
+        Substitui o mapeamento de motivos de saída
+        
+        Corpo: lista de {opcao_cod, motivo, cor?}; cada opção aparece uma vez
+        """
+        try:
+            data = request.get_json(silent=True)
+            if not isinstance(data, list):
+                return jsonify({'error': 'Envie uma lista de {opcao_cod, motivo, cor}'}), 400
+            
+            itens = []
+            for posicao, item in enumerate(data):
+                if not isinstance(item, dict):
+                    return jsonify({'error': f'Item {posicao}: formato inválido'}), 400
+                opcao_cod = item.get('opcao_cod')
+                if not isinstance(opcao_cod, int) or isinstance(opcao_cod, bool):
+                    return jsonify({'error': f'Item {posicao}: opcao_cod deve ser um número inteiro'}), 400
+                motivo = item.get('motivo')
+                motivo = motivo.strip() if isinstance(motivo, str) else ''
+                if not motivo or len(motivo) > 100:
+                    return jsonify({'error': f'Item {posicao}: motivo é obrigatório (até 100 caracteres)'}), 400
+                cor = item.get('cor') or '#9e9e9e'
+                if not isinstance(cor, str) or not re.fullmatch(r'#[0-9a-fA-F]{6}', cor):
+                    return jsonify({'error': f'Item {posicao}: cor deve estar no formato #rrggbb'}), 400
+                itens.append({'opcao_cod': opcao_cod, 'motivo': motivo, 'cor': cor})
+            
+            opcoes = [item['opcao_cod'] for item in itens]
+            if len(set(opcoes)) != len(opcoes):
+                return jsonify({'error': 'Cada opção pode ter apenas um motivo'}), 400
+            inexistentes = MotivosSaidaModel.opcoes_inexistentes(opcoes)
+            if inexistentes:
+                return jsonify({'error': 'Opções inexistentes', 'opcoes': inexistentes}), 400
+            
+            total = MotivosSaidaModel.definir_mapeamento(itens)
+            return jsonify({'success': True, 'total': total}), 200
+        except Exception as e:
+            print(f"[ERRO] Erro ao definir motivos de saída: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+    
+    @staticmethod
+    def get_metrics():
+        """
+        Exporta as métricas das queries (histogramas por método de model,
+        erros e queries lentas) e dos pools no formato texto do Prometheus
+        """
+        conexoes = {}
+        pools = []
+        stats = Database.pool_stats()
+        if stats is not None:
+            pools.append(('primario', stats))
+            pools.extend((f"replica {replica['host']}", replica) for replica in stats['replicas'])
+        pools.extend((f"assincrono {pool['host']}", pool) for pool in AsyncDatabase.pool_stats() or [])
+        
+        for nome, pool in pools:
+            for estado in ('em_uso', 'ociosas', 'aguardando'):
+                conexoes[(('pool', nome), ('estado', estado))] = pool[estado]
+        
+        cache = Database.statement_cache_stats()
+        resultados = dashboard_cache.stats()
+        extras = {
+            'db_pool_connections': ('Conexões por pool e estado', conexoes),
+            'db_statement_cache': ('Contadores do cache de prepared statements', {
+                (('contador', chave),): cache[chave]
+                for chave in ('hits', 'misses', 'evictions', 'invalidacoes', 'nao_preparaveis')
+            }),
+            'dashboard_cache': ('Contadores do cache de resultados do dashboard', {
+                (('contador', chave),): resultados[chave]
+                for chave in ('entradas', 'hits', 'misses', 'evictions', 'expiradas', 'invalidadas', 'recusadas_replica')
+            }),
+            'dashboard_coalescencia': ('Execuções compartilhadas entre consultas idênticas simultâneas', {
+                (('contador', chave),): valor for chave, valor in coalescedor.stats().items()
+            }),
+        }
+        
+        return Response(metrics.prometheus_text(extras), mimetype='text/plain; version=0.0.4')
@@ -3,7 +3,13 @@ Controller para Avaliações
 """
 from flask import jsonify, request
 
+from backend.config.database import Database
+from backend.controllers.streaming import formato_solicitado, stream_response
 from backend.models.avaliacoes import AvaliacoesModel
+from backend.models.respostas_buffer import BufferCheio, BufferRespostas
+
+# Respostas aceitas num único POST /api/avaliacoes/<id>/respostas
+MAX_RESPOSTAS_POR_LOTE = 1000
 
 
 class AvaliacoesController:
@@ -11,13 +17,18 @@ class AvaliacoesController:
     
     @staticmethod
     def listar():
-        """Lista todas as avaliações"""
+        """
+        Lista todas as avaliações
+        
+        A resposta é gerada em streaming (array JSON, ou NDJSON com
+        ?formato=ndjson), sem carregar todas as linhas em memória
+        """
         try:
             status = request.args.get('status')
             funcionario = request.args.get('funcionario', type=int)
             
-            avaliacoes = AvaliacoesModel.listar_todas(status, funcionario)
-            return jsonify(avaliacoes), 200
+            avaliacoes = AvaliacoesModel.iterar_todas(status, funcionario)
+            return stream_response(avaliacoes, formato_solicitado() or 'json')
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
@@ -29,7 +40,8 @@ class AvaliacoesController:
             if not avaliacao:
                 return jsonify({'error': 'Avaliação não encontrada'}), 404
             
-            # Buscar respostas
+            # Buscar respostas (incluindo as que ainda estão no buffer)
+            BufferRespostas.sincronizar(avaliacao_id)
             respostas = AvaliacoesModel.buscar_respostas(avaliacao_id)
             avaliacao['respostas'] = respostas
             
@@ -41,13 +53,15 @@ class AvaliacoesController:
     def deletar(avaliacao_id):
         """Deleta uma avaliação"""
         try:
-            # Verificar se a avaliação existe
-            avaliacao = AvaliacoesModel.buscar_por_id(avaliacao_id)
-            if not avaliacao:
-                return jsonify({'error': 'Avaliação não encontrada'}), 404
+            with Database.transaction():
+                # Verificar se a avaliação existe
+                avaliacao = AvaliacoesModel.buscar_por_id(avaliacao_id)
+                if not avaliacao:
+                    return jsonify({'error': 'Avaliação não encontrada'}), 404
+                
+                # Deletar avaliação (as respostas serão deletadas em cascata)
+                linhas = AvaliacoesModel.deletar(avaliacao_id)
             
-            # Deletar avaliação (as respostas serão deletadas em cascata)
-            linhas = AvaliacoesModel.deletar(avaliacao_id)
             if linhas == 0:
                 return jsonify({'error': 'Avaliação não encontrada'}), 404
             
@@ -57,7 +71,12 @@ class AvaliacoesController:
     
     @staticmethod
     def criar():
-        """Cria uma nova avaliação (Modelo 2: usa observacao_geral e rating_geral)"""
+        """
+        Cria uma nova avaliação (Modelo 2: usa observacao_geral e rating_geral)
+        
+        Aceita opcionalmente 'respostas' (lista de {questao_cod, opcao_cod}),
+        gravadas na mesma transação da avaliação
+        """
         try:
             data = request.get_json()
             
@@ -69,18 +88,32 @@ class AvaliacoesController:
             if not data.get('avaliador_cpf'):
                 return jsonify({'error': 'avaliador_cpf é obrigatório'}), 400
             
+            respostas = data.get('respostas') or []
+            for resposta in respostas:
+                if not resposta.get('questao_cod') or not resposta.get('opcao_cod'):
+                    return jsonify({'error': 'Cada resposta precisa de questao_cod e opcao_cod'}), 400
+            
             # Compatibilidade: aceita 'descricao' ou 'observacao_geral'
             observacao_geral = data.get('observacao_geral') or data.get('descricao')
             rating_geral = data.get('rating_geral') or data.get('rating')
             
-            avaliacao = AvaliacoesModel.criar(
-                data['avaliado_cpf'],
-                data['avaliador_cpf'],
-                data['questionario_cod'],
-                data.get('local'),
-                observacao_geral,
-                rating_geral
-            )
+            # Avaliação e respostas numa única transação (um commit só)
+            with Database.transaction():
+                avaliacao = AvaliacoesModel.criar(
+                    data['avaliado_cpf'],
+                    data['avaliador_cpf'],
+                    data['questionario_cod'],
+                    data.get('local'),
+                    observacao_geral,
+                    rating_geral
+                )
+                
+                for resposta in respostas:
+                    AvaliacoesModel.salvar_resposta(
+                        avaliacao[0]['cod_avaliacao'],
+                        resposta['questao_cod'],
+                        resposta['opcao_cod']
+                    )
             
             return jsonify(avaliacao[0]), 201
         except Exception as e:
@@ -122,6 +155,8 @@ class AvaliacoesController:
             # Compatibilidade: aceita 'descricao' ou 'observacao_geral'
             observacao_geral = data.get('observacao_geral') or data.get('descricao')
             
+            # Respostas na fila entram antes da troca de questionário
+            BufferRespostas.sincronizar(avaliacao_id)
             avaliacao = AvaliacoesModel.atualizar_configuracoes(
                 avaliacao_id,
                 data.get('avaliado_cpf'),
@@ -140,7 +175,14 @@ class AvaliacoesController:
     
     @staticmethod
     def salvar_resposta():
-        """Salva uma resposta de avaliação (Modelo 2: usa apenas opcao_cod)"""
+        """
+        Salva uma resposta de avaliação (Modelo 2: usa apenas opcao_cod)
+        
+        Com o buffer de respostas ativo (DB_RESPOSTAS_WRITE_BEHIND=1), a
+        resposta é conferida, entra na fila e a rota responde 202; fila cheia
+        responde 503. Nos dois caminhos valem as regras de salvar_respostas:
+        avaliação inexistente responde 404 e resposta inválida, 400
+        """
         try:
             data = request.get_json()
             
@@ -152,17 +194,105 @@ class AvaliacoesController:
             if not data.get('opcao_cod'):
                 return jsonify({'error': 'opcao_cod é obrigatório'}), 400
             
-            resposta = AvaliacoesModel.salvar_resposta(
-                data['avaliacao_cod'],
-                data['questao_cod'],
-                data['opcao_cod']
-            )
+            try:
+                avaliacao_cod, questao_cod, opcao_cod = (
+                    int(data[campo]) for campo in ('avaliacao_cod', 'questao_cod', 'opcao_cod')
+                )
+            except (TypeError, ValueError):
+                return jsonify({'error': 'avaliacao_cod, questao_cod e opcao_cod devem ser números inteiros'}), 400
+            
+            if BufferRespostas.ativo():
+                # Confere antes de enfileirar: a gravação em lote recusaria depois, sem resposta ao cliente
+                erros = AvaliacoesModel.validar_respostas(avaliacao_cod, [(questao_cod, opcao_cod)])
+                if erros is None:
+                    return jsonify({'error': 'Avaliação não encontrada'}), 404
+                if erros[0]:
+                    return jsonify({'error': erros[0]}), 400
+            
+            try:
+                if BufferRespostas.enfileirar(avaliacao_cod, questao_cod, opcao_cod):
+                    return jsonify({
+                        'avaliacao_cod': avaliacao_cod,
+                        'questao_cod': questao_cod,
+                        'opcao_cod': opcao_cod,
+                        'status': 'pendente'
+                    }), 202
+            except BufferCheio as e:
+                resposta = jsonify({'error': f'{e}, tente novamente em instantes'})
+                resposta.headers['Retry-After'] = '1'
+                return resposta, 503
+            
+            # Gravação direta: antes, o que ainda estiver na fila para esta avaliação
+            BufferRespostas.sincronizar(avaliacao_cod)
+            salvas = AvaliacoesModel.salvar_respostas(avaliacao_cod, [(questao_cod, opcao_cod)])
+            
+            if salvas is None:
+                return jsonify({'error': 'Avaliação não encontrada'}), 404
+            if salvas[0]['status'] == 'erro':
+                return jsonify({'error': salvas[0]['erro']}), 400
+            return jsonify(salvas[0]), 201
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @staticmethod
+    def salvar_respostas(avaliacao_id):
+        """
+        Salva de uma vez as respostas de uma avaliação
+        
+        Corpo: lista de {questao_cod, opcao_cod} (ou {'respostas': [...]}).
+        As respostas válidas são gravadas numa única transação; cada item
+        recebe seu resultado, na ordem enviada
+        """
+        try:
+            data = request.get_json(silent=True)
+            respostas = data.get('respostas') if isinstance(data, dict) else data
+            
+            if not isinstance(respostas, list) or not respostas:
+                return jsonify({'error': 'Envie uma lista de {questao_cod, opcao_cod}'}), 400
+            if len(respostas) > MAX_RESPOSTAS_POR_LOTE:
+                return jsonify({'error': f'No máximo {MAX_RESPOSTAS_POR_LOTE} respostas por envio'}), 400
+            
+            # Itens malformados são recusados aqui; os demais vão para o model
+            resultados = [None] * len(respostas)
+            validas = []
+            for indice, resposta in enumerate(respostas):
+                questao_cod = resposta.get('questao_cod') if isinstance(resposta, dict) else None
+                opcao_cod = resposta.get('opcao_cod') if isinstance(resposta, dict) else None
+                if not all(isinstance(valor, int) and not isinstance(valor, bool) for valor in (questao_cod, opcao_cod)):
+                    resultados[indice] = {
+                        'questao_cod': questao_cod,
+                        'opcao_cod': opcao_cod,
+                        'status': 'erro',
+                        'cod_resposta': None,
+                        'erro': 'questao_cod e opcao_cod devem ser números inteiros'
+                    }
+                else:
+                    validas.append((indice, questao_cod, opcao_cod))
+            
+            if validas:
+                BufferRespostas.sincronizar(avaliacao_id)
+                salvas = AvaliacoesModel.salvar_respostas(
+                    avaliacao_id,
+                    [(questao_cod, opcao_cod) for _, questao_cod, opcao_cod in validas]
+                )
+                if salvas is None:
+                    return jsonify({'error': 'Avaliação não encontrada'}), 404
+                for (indice, _, _), item in zip(validas, salvas):
+                    resultados[indice] = item
+            
+            for indice, item in enumerate(resultados):
+                item['indice'] = indice
+            erros = sum(1 for item in resultados if item['status'] == 'erro')
             
-            if resposta:
-                return jsonify(resposta[0]), 201
-            else:
-                return jsonify({'error': 'Erro ao salvar resposta'}), 500
+            return jsonify({
+                'avaliacao_cod': avaliacao_id,
+                'total': len(resultados),
+                'salvas': len(resultados) - erros,
+                'erros': erros,
+                'resultados': resultados
+            }), 400 if erros == len(resultados) else 200
         except Exception as e:
+            print(f"[ERRO] Erro ao salvar respostas da avaliação {avaliacao_id}: {str(e)}")
             return jsonify({'error': str(e)}), 500
     
     @staticmethod
@@ -179,8 +309,6 @@ class AvaliacoesController:
         """Retorna dados para gráfico de respostas de um questionário (agrupado por pergunta e alternativa)"""
         try:
             dados = AvaliacoesModel.buscar_respostas_agrupadas_grafico_por_questionario(questionario_id)
-            print(f"[DEBUG] Buscando gráfico para questionário {questionario_id}")
-            print(f"[DEBUG] Total de registros retornados: {len(dados) if dados else 0}")
             return jsonify(dados), 200
         except Exception as e:
             print(f"[ERROR] Erro ao buscar gráfico de respostas: {str(e)}")
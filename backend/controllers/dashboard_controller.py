@@ -1,130 +1,378 @@
 """
 Controller para Dashboard - Estatísticas e gráficos
 """
-from flask import jsonify, request
+import asyncio
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from backend.models.dashboard import DashboardModel
+from flask import Response, current_app, jsonify, request, stream_with_context
 
+from backend.config import timeouts
+from backend.config.notificacoes import CANAL_ATIVIDADES, MensagensPerdidas, Ouvinte
+from backend.models.avaliacoes_diarias import Filtros
+from backend.models.dashboard import GRANULARIDADES, DashboardModel, formatar_atividade, ler_cursor
 
-class DashboardController:
-    """Controller para gerenciar rotas do Dashboard"""
-    
-    @staticmethod
-    def get_estatisticas_gerais():
-        """Retorna estatísticas gerais do dashboard"""
-        try:
-            stats = DashboardModel.estatisticas_gerais()
-            return jsonify(stats), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_avaliacoes_mes():
-        """Retorna avaliações por mês"""
-        try:
-            meses = request.args.get('meses', 6, type=int)
-            data = DashboardModel.avaliacoes_por_mes(meses)
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_motivos_saida():
-        """Retorna principais motivos de saída"""
-        try:
-            data = DashboardModel.motivos_saida_principais()
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_status_avaliacoes():
-        """Retorna distribuição de status das avaliações"""
-        try:
-            data = DashboardModel.status_avaliacoes()
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_atividades_recentes():
-        """Retorna atividades recentes"""
-        try:
-            limite = request.args.get('limite', 10, type=int)
-            data = DashboardModel.atividades_recentes(limite)
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_questionarios_usados():
-        """Retorna frequência de uso dos questionários"""
-        try:
-            data = DashboardModel.questionarios_mais_usados()
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_avaliacoes_por_questionario():
-        """Retorna quantidade de avaliações por questionário para gráfico de pizza"""
+# Pontos do gráfico de pontos por data: padrão e teto de ?max_pontos=
+MAX_PONTOS_PADRAO = 500
+MAX_PONTOS_LIMITE = 5000
+
+# Intervalo (s) dos comentários que mantêm aberta a conexão SSE sem atividade
+SSE_KEEPALIVE_S = 15
+
+# Threads compartilhadas pelos snapshots (limita as conexões que eles ocupam)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _snapshot_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                valor = os.getenv('DB_SNAPSHOT_WORKERS')
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(valor) if valor not in (None, '') else 4,
+                    thread_name_prefix='dashboard-snapshot'
+                )
+    return _executor
+
+
+def _filtros_dashboard():
+    """
+    Filtros comuns dos painéis, vindos da query string: ?setor=,
+    ?questionario=<id>, ?avaliador=<cpf>, ?data_inicial= e ?data_final=
+    (AAAA-MM-DD, inclusivas)
+
+    Returns:
+        tuple: (Filtros, ou None sem filtros; resposta 400 se algum for inválido, senão None)
+    """
+    argumentos = request.args
+    try:
+        questionario = argumentos.get('questionario') or None
+        datas = [argumentos.get(nome) or None for nome in ('data_inicial', 'data_final')]
+        filtros = Filtros(
+            setor=argumentos.get('setor') or None,
+            questionario=int(questionario) if questionario is not None else None,
+            avaliador=argumentos.get('avaliador') or None,
+            desde=datetime.date.fromisoformat(datas[0]) if datas[0] else None,
+            ate=datetime.date.fromisoformat(datas[1]) if datas[1] else None,
+        )
+    except ValueError:
+        return None, (jsonify({
+            'error': 'Filtro inválido: use ?questionario=<id> e datas no formato AAAA-MM-DD'
+        }), 400)
+    if all(valor is None for valor in filtros):
+        return None, None
+    return filtros, None
+
+
+def _parametros_pontos():
+    """
+    Parâmetros de pontos-por-data vindos da query string
+
+    ?granularidade=dia|semana|mes agrupa por período; ?max_pontos=N limita
+    a série (padrão MAX_PONTOS_PADRAO, entre 3 e MAX_PONTOS_LIMITE), para que
+    períodos longos não gerem milhares de pontos.
+    """
+    max_pontos = request.args.get('max_pontos', MAX_PONTOS_PADRAO, type=int)
+    return {
+        'data_inicial': request.args.get('data_inicial', None),
+        'data_final': request.args.get('data_final', None),
+        'limite_dias': request.args.get('limite_dias', None, type=int),
+        'granularidade': request.args.get('granularidade', 'dia'),
+        'max_pontos': min(max(max_pontos, 3), MAX_PONTOS_LIMITE)
+    }
+
+
+def _cursor_antes():
+    """?antes=<data,id> convertido em (data, id); None se ausente"""
+    texto = request.args.get('antes')
+    return ler_cursor(texto) if texto else None
+
+
+def _granularidade_invalida(parametros):
+    """Resposta 400 se ?granularidade= não for aceita, senão None"""
+    if parametros['granularidade'] in GRANULARIDADES:
+        return None
+    opcoes = ', '.join(GRANULARIDADES)
+    return jsonify({'error': f"Granularidade inválida: use {opcoes}"}), 400
+
+
+def _com_filtros(metodo, *args, **kwargs):
+    """Chamada de um painel que aceita os filtros comuns (ver _filtros_dashboard)"""
+    filtros, invalido = _filtros_dashboard()
+    if invalido:
+        return None, invalido
+    return (metodo, args, dict(kwargs, filtros=filtros)), None
+
+
+def _preparar_atividades_recentes():
+    try:
+        antes = _cursor_antes()
+    except ValueError:
+        return None, (jsonify({
+            'error': 'Cursor inválido em ?antes= (use o campo cursor da última atividade)'
+        }), 400)
+    return (DashboardModel.atividades_recentes, (request.args.get('limite', 10, type=int), antes), {}), None
+
+
+def _preparar_pontos_por_data():
+    parametros = _parametros_pontos()
+    invalida = _granularidade_invalida(parametros)
+    if invalida:
+        return None, invalida
+    return _com_filtros(DashboardModel.pontos_por_data, **parametros)
+
+
+# Painéis do dashboard: nome (o da rota individual e do snapshot) -> função
+# que lê a query string e devolve ((método do DashboardModel, args, kwargs), None)
+# ou (None, resposta de erro)
+_PAINEIS = {
+    'estatisticas': lambda: _com_filtros(DashboardModel.estatisticas_gerais),
+    'avaliacoes-mes': lambda: _com_filtros(
+        DashboardModel.avaliacoes_por_mes, request.args.get('meses', 6, type=int)
+    ),
+    'motivos-saida': lambda: ((DashboardModel.motivos_saida_principais, (), {}), None),
+    'status-avaliacoes': lambda: _com_filtros(DashboardModel.status_avaliacoes),
+    'atividades-recentes': _preparar_atividades_recentes,
+    'questionarios-usados': lambda: _com_filtros(DashboardModel.questionarios_mais_usados),
+    'avaliacoes-por-questionario': lambda: _com_filtros(DashboardModel.avaliacoes_por_questionario),
+    'respostas-frequencia': lambda: ((DashboardModel.distribuicao_respostas_escolha, (), {}), None),
+    'avaliacoes-tempo': lambda: _com_filtros(
+        DashboardModel.avaliacoes_por_tempo, request.args.get('anos', 2, type=int)
+    ),
+    'avaliacoes-setor': lambda: _com_filtros(DashboardModel.avaliacoes_por_setor),
+    'avaliadores-por-setor': lambda: _com_filtros(DashboardModel.avaliacoes_por_setor_e_avaliador),
+    'pontos-por-data': _preparar_pontos_por_data,
+}
+
+
+def _views_painel(nome, descricao):
+    """
+    Views síncrona e assíncrona de um painel, a partir da mesma preparação
+
+    A síncrona chama o método do DashboardModel; a assíncrona, a variante
+    `.assincrono` dele (motor assíncrono). Parâmetros e erros são os mesmos.
+    """
+    preparar = _PAINEIS[nome]
+
+    def sincrona():
         try:
-            data = DashboardModel.avaliacoes_por_questionario()
-            return jsonify(data), 200
+            chamada, invalido = preparar()
+            if invalido:
+                return invalido
+            metodo, args, kwargs = chamada
+            return jsonify(metodo(*args, **kwargs)), 200
         except Exception as e:
             return jsonify({'error': str(e)}), 500
-    
-    @staticmethod
-    def get_respostas_frequencia():
-        """Retorna frequência de cada resposta"""
+
+    async def assincrona():
         try:
-            data = DashboardModel.distribuicao_respostas_escolha()
-            return jsonify(data), 200
+            chamada, invalido = preparar()
+            if invalido:
+                return invalido
+            metodo, args, kwargs = chamada
+            return jsonify(await metodo.assincrono(*args, **kwargs)), 200
         except Exception as e:
             return jsonify({'error': str(e)}), 500
+
+    sincrona.__doc__ = descricao
+    assincrona.__doc__ = f"{descricao} (versão assíncrona)"
+    return staticmethod(sincrona), staticmethod(assincrona)
+
+
+def _preparar_snapshot():
+    """
+    Painéis pedidos em ?panels=a,b,c (todos, se ausente), já preparados
+
+    Returns:
+        tuple: ({nome: (método, args, kwargs)}, None) ou (None, resposta de erro)
+    """
+    _, invalido = _filtros_dashboard()
+    if invalido:
+        return None, invalido
+    pedidos = [nome.strip() for nome in request.args.get('panels', '').split(',') if nome.strip()]
+    desconhecidos = [nome for nome in pedidos if nome not in _PAINEIS]
+    if desconhecidos:
+        return None, (jsonify({'error': f"Painéis desconhecidos: {', '.join(desconhecidos)}"}), 400)
+
+    chamadas = {}
+    for nome in pedidos or _PAINEIS:
+        chamada, invalido = _PAINEIS[nome]()
+        if invalido:
+            return None, invalido
+        chamadas[nome] = chamada
+    return chamadas, None
+
+
+def _resposta_snapshot(resultados, erros, atrasados=()):
+    """
+    Documento único com os painéis; 500 apenas se todos falharem
+
+    `atrasados` são os painéis que não terminaram no orçamento da
+    requisição: aparecem em 'erros' e, se nenhum painel terminou, a
+    resposta é 503 (o cliente pode tentar de novo)
+    """
+    for nome in atrasados:
+        erros[nome] = 'Tempo esgotado'
+    if erros and not resultados:
+        resposta = jsonify({'paineis': resultados, 'erros': erros})
+        if len(atrasados) == len(erros):
+            resposta.headers['Retry-After'] = '1'
+            return resposta, 503
+        return resposta, 500
+    return jsonify({'paineis': resultados, 'erros': erros}), 200
+
+
+class DashboardController:
+    """Controller para gerenciar rotas do Dashboard"""
     
-    @staticmethod
-    def get_avaliacoes_tempo():
-        """Retorna avaliações por mês/ano"""
-        try:
-            anos = request.args.get('anos', 2, type=int)
-            data = DashboardModel.avaliacoes_por_tempo(anos)
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    get_estatisticas_gerais, get_estatisticas_gerais_async = _views_painel(
+        'estatisticas', "Retorna estatísticas gerais do dashboard"
+    )
+    get_avaliacoes_mes, get_avaliacoes_mes_async = _views_painel(
+        'avaliacoes-mes', "Retorna avaliações por mês"
+    )
+    get_motivos_saida, get_motivos_saida_async = _views_painel(
+        'motivos-saida', "Retorna principais motivos de saída"
+    )
+    get_status_avaliacoes, get_status_avaliacoes_async = _views_painel(
+        'status-avaliacoes', "Retorna distribuição de status das avaliações"
+    )
+    get_atividades_recentes, get_atividades_recentes_async = _views_painel(
+        'atividades-recentes', "Retorna atividades recentes"
+    )
+    get_questionarios_usados, get_questionarios_usados_async = _views_painel(
+        'questionarios-usados', "Retorna frequência de uso dos questionários"
+    )
+    get_avaliacoes_por_questionario, get_avaliacoes_por_questionario_async = _views_painel(
+        'avaliacoes-por-questionario', "Retorna quantidade de avaliações por questionário para gráfico de pizza"
+    )
+    get_respostas_frequencia, get_respostas_frequencia_async = _views_painel(
+        'respostas-frequencia', "Retorna frequência de cada resposta"
+    )
+    get_avaliacoes_tempo, get_avaliacoes_tempo_async = _views_painel(
+        'avaliacoes-tempo', "Retorna avaliações por mês/ano"
+    )
+    get_avaliacoes_setor, get_avaliacoes_setor_async = _views_painel(
+        'avaliacoes-setor', "Retorna avaliações por setor"
+    )
+    get_avaliadores_por_setor, get_avaliadores_por_setor_async = _views_painel(
+        'avaliadores-por-setor', "Retorna avaliadores e suas contribuições por setor"
+    )
+    get_pontos_por_data, get_pontos_por_data_async = _views_painel(
+        'pontos-por-data', "Retorna total de pontos agrupados por data"
+    )
     
     @staticmethod
-    def get_avaliacoes_setor():
-        """Retorna avaliações por setor"""
-        try:
-            data = DashboardModel.avaliacoes_por_setor()
-            return jsonify(data), 200
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+    def stream_atividades():
+        """
+        Envia as atividades em tempo real (Server-Sent Events)
+        
+        Eventos 'criada', 'atualizada' (atividade completa, como em
+        atividades-recentes) e 'removida' (só o id), vindos do LISTEN/NOTIFY
+        do PostgreSQL. O evento 'reset' avisa que mensagens foram perdidas
+        (cliente lento ou queda da conexão com o banco): o cliente deve
+        recarregar atividades-recentes. Nenhuma conexão do pool fica presa
+        ao cliente.
+        """
+        assinatura = Ouvinte.assinar(CANAL_ATIVIDADES)
+        dumps = current_app.json.dumps
+        
+        def gerar():
+            try:
+                yield 'retry: 3000\n\n'
+                while True:
+                    try:
+                        mensagem = assinatura.proxima(timeout=SSE_KEEPALIVE_S)
+                    except MensagensPerdidas:
+                        yield 'event: reset\ndata: {}\n\n'
+                        continue
+                    if mensagem is None:
+                        yield ': keepalive\n\n'
+                        continue
+                    
+                    atividade = mensagem.get('atividade') or {}
+                    if 'data' in atividade:
+                        atividade = formatar_atividade(atividade)
+                    yield f"event: {mensagem.get('evento', 'atividade')}\ndata: {dumps(atividade)}\n\n"
+            finally:
+                Ouvinte.cancelar(assinatura)
+        
+        return Response(
+            stream_with_context(gerar()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
     
     @staticmethod
-    def get_avaliadores_por_setor():
-        """Retorna avaliadores e suas contribuições por setor"""
+    def get_snapshot():
+        """
+        Retorna vários painéis num único documento (?panels=estatisticas,avaliacoes-mes,...)
+        
+        Cada painel roda numa thread do executor compartilhado, com sua
+        própria conexão do pool, então o tempo total fica próximo ao da
+        consulta mais lenta. Um painel que falha aparece em 'erros' sem
+        derrubar os demais. A espera pelos painéis (inclusive na fila do
+        executor) também respeita o orçamento da rota: os que não
+        terminarem a tempo são cancelados e marcados como atrasados.
+        """
         try:
-            data = DashboardModel.avaliacoes_por_setor_e_avaliador()
-            return jsonify(data), 200
+            paineis, invalido = _preparar_snapshot()
+            if invalido:
+                return invalido
+            
+            # As threads não têm o contexto da requisição: o orçamento vai junto
+            limite = timeouts.timeout_da_requisicao()
+            
+            def executar(metodo, args, kwargs):
+                with timeouts.limite(limite):
+                    return metodo(*args, **kwargs)
+            
+            executor = _snapshot_executor()
+            futuros = {
+                nome: executor.submit(executar, metodo, args, kwargs)
+                for nome, (metodo, args, kwargs) in paineis.items()
+            }
+            
+            prontos, _ = wait(futuros.values(), timeout=limite / 1000 if limite else None)
+            
+            resultados, erros, atrasados = {}, {}, []
+            for nome, futuro in futuros.items():
+                if futuro not in prontos:
+                    # Ainda na fila sai dela; em execução, o statement_timeout encerra
+                    futuro.cancel()
+                    atrasados.append(nome)
+                    continue
+                try:
+                    resultados[nome] = futuro.result()
+                except Exception as e:
+                    erros[nome] = str(e)
+            return _resposta_snapshot(resultados, erros, atrasados)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @staticmethod
-    def get_pontos_por_data():
-        """Retorna total de pontos agrupados por data"""
+    async def get_snapshot_async():
+        """Versão assíncrona de get_snapshot (painéis em paralelo no motor assíncrono)"""
         try:
-            data_inicial = request.args.get('data_inicial', None)
-            data_final = request.args.get('data_final', None)
-            limite_dias = request.args.get('limite_dias', None, type=int)
+            paineis, invalido = _preparar_snapshot()
+            if invalido:
+                return invalido
             
-            data = DashboardModel.pontos_por_data(
-                data_inicial=data_inicial,
-                data_final=data_final,
-                limite_dias=limite_dias
+            retornos = await asyncio.gather(
+                *(metodo.assincrono(*args, **kwargs) for metodo, args, kwargs in paineis.values()),
+                return_exceptions=True
             )
-            return jsonify(data), 200
+            
+            resultados, erros = {}, {}
+            for nome, retorno in zip(paineis, retornos):
+                if isinstance(retorno, Exception):
+                    erros[nome] = str(retorno)
+                else:
+                    resultados[nome] = retorno
+            return _resposta_snapshot(resultados, erros)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
-
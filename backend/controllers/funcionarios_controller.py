@@ -1,8 +1,11 @@
 """
 Controller para Funcionários
 """
+import json
+
 from flask import jsonify, request
 
+from backend.controllers.streaming import NDJSON_MIMETYPE, formato_solicitado, stream_response
 from backend.models.funcionarios import FuncionariosModel
 from backend.models.avaliacoes import AvaliacoesModel
 
@@ -12,13 +15,22 @@ class FuncionariosController:
     
     @staticmethod
     def listar():
-        """Lista todos os funcionários com paginação"""
+        """
+        Lista todos os funcionários com paginação
+        
+        Com ?formato=json|ndjson (ou Accept: application/x-ndjson) retorna a
+        lista completa (filtros status e departamento), sem paginação,
+        gerada em streaming
+        """
         try:
             status = request.args.get('status')
             departamento = request.args.get('departamento')
             busca = request.args.get('q')
             
-            print(f"[DEBUG] Parâmetros recebidos - status: {status}, departamento: {departamento}, busca: {busca}")
+            formato = formato_solicitado()
+            if formato:
+                funcionarios = FuncionariosModel.iterar_todos(status, departamento)
+                return stream_response(funcionarios, formato)
             
             # Parâmetros de paginação
             page = request.args.get('page', 1, type=int)
@@ -41,8 +53,6 @@ class FuncionariosController:
                 per_page=per_page
             )
             
-            print(f"[DEBUG] Resultados encontrados: {len(funcionarios)} funcionários de {total} total")
-            
             # Calcular informações de paginação
             total_pages = (total + per_page - 1) // per_page
             has_prev = page > 1
@@ -139,6 +149,30 @@ class FuncionariosController:
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @staticmethod
+    def importar():
+        """
+        Importa muitos funcionários de uma vez
+        
+        Aceita um array JSON ou NDJSON (Content-Type: application/x-ndjson,
+        um funcionário por linha). O NDJSON é lido do corpo aos poucos e
+        enviado ao banco via COPY, sem carregar o arquivo inteiro.
+        """
+        try:
+            if request.mimetype == NDJSON_MIMETYPE:
+                funcionarios = (json.loads(linha) for linha in request.stream if linha.strip())
+            else:
+                funcionarios = request.get_json()
+                if not isinstance(funcionarios, list):
+                    return jsonify({'error': 'Envie uma lista de funcionários'}), 400
+            
+            importados = FuncionariosModel.inserir_em_lote(funcionarios)
+            return jsonify({'importados': importados}), 201
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     @staticmethod
     def deletar(funcionario_id):
         """Deleta um funcionário por CPF"""
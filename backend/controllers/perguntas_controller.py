@@ -3,6 +3,7 @@ Controller para Perguntas
 """
 from flask import jsonify, request
 
+from backend.config.database import Database
 from backend.models.perguntas import PerguntasModel
 
 
@@ -127,18 +128,20 @@ class PerguntasController:
             if status is None and 'ativa' in data:
                 status = 'Ativo' if data.get('ativa') else 'Inativo'
             
-            pergunta = PerguntasModel.atualizar(
-                pergunta_id,
-                texto_questao,
-                status
-            )
-            
-            if not pergunta:
-                return jsonify({'error': 'Nenhum campo para atualizar'}), 400
-            
-            # Se tiver opções, atualizar (todas são múltipla escolha)
-            if 'opcoes' in data:
-                PerguntasModel.atualizar_opcoes(pergunta_id, data['opcoes'])
+            # Questão e opções numa única transação
+            with Database.transaction():
+                pergunta = PerguntasModel.atualizar(
+                    pergunta_id,
+                    texto_questao,
+                    status
+                )
+                
+                if not pergunta:
+                    return jsonify({'error': 'Nenhum campo para atualizar'}), 400
+                
+                # Se tiver opções, atualizar (todas são múltipla escolha)
+                if 'opcoes' in data:
+                    PerguntasModel.atualizar_opcoes(pergunta_id, data['opcoes'])
             
             return jsonify(pergunta[0]), 200
         except Exception as e:
@@ -3,6 +3,7 @@ Controller para Questionários
 """
 from flask import jsonify, request
 
+from backend.config.database import Database
 from backend.models.questionarios import QuestionariosModel
 
 
@@ -46,19 +47,21 @@ class QuestionariosController:
             if not data.get('classificacao_cod'):
                 return jsonify({'error': 'classificacao_cod é obrigatório'}), 400
             
-            questionario = QuestionariosModel.criar(
-                data['nome'],
-                data['classificacao_cod'],
-                data.get('descricao'),
-                data.get('status', 'Rascunho')
-            )
-            
-            # Vincular perguntas se fornecidas
-            if data.get('questoes_ids'):
-                QuestionariosModel.vincular_perguntas(
-                    questionario[0]['id'],
-                    data['questoes_ids']
+            # Questionário e vínculos numa única transação
+            with Database.transaction():
+                questionario = QuestionariosModel.criar(
+                    data['nome'],
+                    data['classificacao_cod'],
+                    data.get('descricao'),
+                    data.get('status', 'Rascunho')
                 )
+                
+                # Vincular perguntas se fornecidas
+                if data.get('questoes_ids'):
+                    QuestionariosModel.vincular_perguntas(
+                        questionario[0]['id'],
+                        data['questoes_ids']
+                    )
             
             return jsonify(questionario[0]), 201
         except Exception as e:
@@ -70,20 +73,21 @@ class QuestionariosController:
         try:
             data = request.get_json()
             
-            questionario = QuestionariosModel.atualizar(
-                questionario_id,
-                data.get('nome'),
-                data.get('descricao'),
-                data.get('status'),
-                data.get('classificacao_cod')
-            )
-            
-            # Atualizar perguntas vinculadas se fornecidas
-            if 'questoes_ids' in data:
-                QuestionariosModel.vincular_perguntas(
+            with Database.transaction():
+                questionario = QuestionariosModel.atualizar(
                     questionario_id,
-                    data['questoes_ids']
+                    data.get('nome'),
+                    data.get('descricao'),
+                    data.get('status'),
+                    data.get('classificacao_cod')
                 )
+                
+                # Atualizar perguntas vinculadas se fornecidas
+                if 'questoes_ids' in data:
+                    QuestionariosModel.vincular_perguntas(
+                        questionario_id,
+                        data['questoes_ids']
+                    )
             
             if not questionario:
                 return jsonify({'error': 'Nenhum campo para atualizar'}), 400
@@ -0,0 +1,89 @@
+"""
+Respostas HTTP em streaming para listas grandes
+Serializa linha a linha o que vem de iter_query, sem montar a lista inteira
+"""
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Linhas serializadas agrupadas por bloco enviado ao cliente
+_LINHAS_POR_BLOCO = 200
+
+
+def _preparar(linhas):
+    """
+    Busca a primeira linha antes de iniciar a resposta
+
+    Assim erros de SQL acontecem ainda dentro do try do controller (e viram
+    500), e não no meio de uma resposta 200 já enviada.
+    """
+    linhas = iter(linhas)
+    try:
+        primeira = next(linhas)
+    except StopIteration:
+        return None, linhas
+    return primeira, linhas
+
+
+def _em_blocos(partes):
+    bloco = []
+    for parte in partes:
+        bloco.append(parte)
+        if len(bloco) >= _LINHAS_POR_BLOCO:
+            yield ''.join(bloco)
+            bloco = []
+    if bloco:
+        yield ''.join(bloco)
+
+
+def json_array_response(linhas, status=200):
+    """Resposta com um array JSON (mesmo formato de jsonify(lista)), gerado sob demanda"""
+    primeira, resto = _preparar(linhas)
+    dumps = current_app.json.dumps
+
+    def gerar():
+        if primeira is None:
+            yield '[]'
+            return
+        yield '[' + dumps(primeira)
+        for parte in _em_blocos(',' + dumps(linha) for linha in resto):
+            yield parte
+        yield ']'
+
+    return Response(stream_with_context(gerar()), status=status, mimetype='application/json')
+
+
+def ndjson_response(linhas, status=200):
+    """Resposta NDJSON: um objeto JSON por linha"""
+    primeira, resto = _preparar(linhas)
+    dumps = current_app.json.dumps
+
+    def gerar():
+        if primeira is None:
+            return
+        yield dumps(primeira) + '\n'
+        for parte in _em_blocos(dumps(linha) + '\n' for linha in resto):
+            yield parte
+
+    return Response(stream_with_context(gerar()), status=status, mimetype=NDJSON_MIMETYPE)
+
+
+def formato_solicitado():
+    """
+    Formato de streaming pedido pelo cliente: 'ndjson', 'json' ou None
+
+    Aceita ?formato=ndjson|json ou o cabeçalho Accept: application/x-ndjson
+    """
+    formato = (request.args.get('formato') or '').lower()
+    if formato in ('ndjson', 'json'):
+        return formato
+    if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return 'ndjson'
+    return None
+
+
+def stream_response(linhas, formato='json', status=200):
+    """Escolhe entre array JSON e NDJSON"""
+    if formato == 'ndjson':
+        return ndjson_response(linhas, status)
+    return json_array_response(linhas, status)
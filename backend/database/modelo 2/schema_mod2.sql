@@ -123,10 +123,68 @@ CREATE TABLE IF NOT EXISTS Funcionario_Classificacao (
     PRIMARY KEY (funcionario_cpf, classificacao_cod)
 );
 
+-- ==========================================
+-- 5. CONTADORES (MANTIDOS PELA APLICAÇÃO)
+-- ==========================================
+
+-- Totais das estatísticas gerais do dashboard, ajustados nas mesmas
+-- transações que alteram as tabelas de origem (ver models/contadores.py)
+CREATE TABLE IF NOT EXISTS Contador (
+    nome VARCHAR(50) PRIMARY KEY,
+    valor BIGINT NOT NULL DEFAULT 0
+);
+
+-- Avaliações por avaliador: permite manter a contagem de avaliadores
+-- distintos sem COUNT(DISTINCT) sobre Avaliacao
+CREATE TABLE IF NOT EXISTS Contador_Avaliador (
+    avaliador_cpf VARCHAR(11) PRIMARY KEY,
+    total INTEGER NOT NULL
+);
+
+-- Cubo de avaliações por dia, setor do avaliado, questionário e avaliador:
+-- as séries e os painéis filtrados do dashboard leem daqui em vez de
+-- agrupar Avaliacao a cada requisição (ver models/avaliacoes_diarias.py)
+CREATE TABLE IF NOT EXISTS Avaliacao_Diaria (
+    dia DATE NOT NULL,
+    setor VARCHAR(100) NOT NULL,
+    questionario_cod INTEGER NOT NULL,
+    avaliador_cpf VARCHAR(11) NOT NULL,
+    total INTEGER NOT NULL,
+    concluidas INTEGER NOT NULL,
+    soma_rating BIGINT NOT NULL,
+    max_rating SMALLINT,
+    PRIMARY KEY (dia, setor, questionario_cod, avaliador_cpf)
+);
+
+-- Respostas por questão, opção escolhida e questionário da avaliação: os
+-- gráficos de distribuição leem daqui em vez de agrupar Resposta
+-- (ver models/respostas_frequencia.py)
+CREATE TABLE IF NOT EXISTS Resposta_Frequencia (
+    questao_cod INTEGER NOT NULL,
+    opcao_cod INTEGER NOT NULL,
+    questionario_cod INTEGER NOT NULL,
+    quantidade BIGINT NOT NULL,
+    PRIMARY KEY (questao_cod, opcao_cod, questionario_cod)
+);
+
+-- Motivo de saída associado a cada opção de resposta: o painel de motivos
+-- soma o histograma acima pelas opções mapeadas (ver models/motivos_saida.py)
+CREATE TABLE IF NOT EXISTS Motivo_Saida_Opcao (
+    opcao_cod INTEGER PRIMARY KEY,
+    motivo VARCHAR(100) NOT NULL,
+    cor VARCHAR(7) NOT NULL DEFAULT '#9e9e9e',
+    CONSTRAINT fk_motivo_opcao
+        FOREIGN KEY (opcao_cod)
+        REFERENCES Opcao(cod_opcao)
+        ON DELETE CASCADE
+);
+
 -- ==========================================
 -- ÍNDICES (Mantidos e Ajustados)
 -- ==========================================
 CREATE INDEX IF NOT EXISTS idx_opcao_questao ON Opcao(questao_cod); -- Importante para joins
 CREATE INDEX IF NOT EXISTS idx_resposta_avaliacao ON Resposta(avaliacao_cod);
 CREATE INDEX IF NOT EXISTS idx_resposta_questao ON Resposta(questao_cod);
-CREATE INDEX IF NOT EXISTS idx_resposta_opcao ON Resposta(opcao_cod); -- Novo índice para análise estatística
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_resposta_opcao ON Resposta(opcao_cod); -- Novo índice para análise estatística
+CREATE INDEX IF NOT EXISTS idx_avaliacao_data ON Avaliacao(data_completa, cod_avaliacao); -- Intervalos de datas e feed de atividades
+CREATE INDEX IF NOT EXISTS idx_avaliacao_avaliado ON Avaliacao(avaliado_cpf); -- Avaliações de um funcionário (ex.: troca de setor)
\ No newline at end of file
@@ -430,6 +430,19 @@ INSERT INTO Opcao (texto_opcao, ordem, questao_cod) VALUES
 ('Mudança de área/carreira', 5, 1),
 ('Outro motivo', 6, 1);
 
+-- Motivos de saída das opções da Questão 1 (painel de motivos do dashboard)
+INSERT INTO Motivo_Saida_Opcao (opcao_cod, motivo, cor)
+SELECT o.cod_opcao, m.motivo, m.cor
+FROM (VALUES
+    ('Melhor oportunidade em outra empresa', 'Melhor Oferta', '#e91e63'),
+    ('Falta de crescimento profissional', 'Insatisfação', '#2196f3'),
+    ('Questões salariais', 'Remuneração', '#ff9800'),
+    ('Ambiente de trabalho', 'Insatisfação', '#2196f3'),
+    ('Mudança de área/carreira', 'Mudança de Carreira', '#4caf50'),
+    ('Outro motivo', 'Outros', '#9e9e9e')
+) AS m(texto, motivo, cor)
+JOIN Opcao o ON o.questao_cod = 1 AND o.texto_opcao = m.texto;
+
 -- Opções para Questão 2 (Desligamento - Suporte)
 INSERT INTO Opcao (texto_opcao, ordem, questao_cod) VALUES
 ('Excelente', 1, 2),
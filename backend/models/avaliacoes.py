@@ -2,13 +2,20 @@
 Módulo de queries SQL para Avaliações
 Adaptado para o Modelo 2: Resposta usa opcao_cod, Avaliacao usa observacao_geral
 """
-from backend.config.database import execute_query
+from backend.config.consultas import consulta, derivada
+from backend.config.cache import invalidar_apos_commit
+from backend.config.database import Database, execute_query, iter_query
+from backend.models.avaliacoes_diarias import AvaliacoesDiariasModel
+from backend.models.colunar import MotorColunar
+from backend.models.contadores import ContadoresModel
+from backend.models.dashboard import STATUS_AVALIACAO, DashboardModel
+from backend.models.respostas_frequencia import RespostasFrequenciaModel
 
 class AvaliacoesModel:
     
     @staticmethod
-    def listar_todas(filtro_status=None, filtro_funcionario=None):
-        """Lista todas as avaliações com filtros opcionais"""
+    def _query_listagem(filtro_funcionario=None):
+        """Monta a query (e os parâmetros) da listagem de avaliações"""
         query = """
             SELECT 
                 a.cod_avaliacao AS id,
@@ -38,7 +45,19 @@ class AvaliacoesModel:
         
         query += " ORDER BY a.data_completa DESC"
         
-        return execute_query(query, tuple(params) if params else None)
+        return query, tuple(params) if params else None
+    
+    @staticmethod
+    def listar_todas(filtro_status=None, filtro_funcionario=None):
+        """Lista todas as avaliações com filtros opcionais"""
+        query, params = AvaliacoesModel._query_listagem(filtro_funcionario)
+        return execute_query(query, params)
+    
+    @staticmethod
+    def iterar_todas(filtro_status=None, filtro_funcionario=None, itersize=None):
+        """Mesma listagem de listar_todas, gerada linha a linha (cursor do servidor)"""
+        query, params = AvaliacoesModel._query_listagem(filtro_funcionario)
+        return iter_query(query, params, itersize)
     
     @staticmethod
     def buscar_por_id(avaliacao_id):
@@ -73,49 +92,69 @@ class AvaliacoesModel:
     def criar(avaliado_cpf, avaliador_cpf, questionario_cod, local=None, observacao_geral=None, rating_geral=None):
         """Cria uma nova avaliação"""
         from datetime import datetime
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
         
-        connection = None
-        cursor = None
+        query = """
+            INSERT INTO Avaliacao 
+            (local, data_completa, observacao_geral, rating_geral, avaliado_cpf, avaliador_cpf, questionario_cod)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING cod_avaliacao, data_completa, avaliado_cpf, avaliador_cpf
+        """
+        
+        data_completa = datetime.now()
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            query = """
-                INSERT INTO Avaliacao 
-                (local, data_completa, observacao_geral, rating_geral, avaliado_cpf, avaliador_cpf, questionario_cod)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING cod_avaliacao, data_completa, avaliado_cpf, avaliador_cpf
-            """
-            
-            data_completa = datetime.now()
-            
-            cursor.execute(query, (local, data_completa, observacao_geral, rating_geral, 
-                                  avaliado_cpf, avaliador_cpf, questionario_cod))
-            connection.commit()
-            
-            result = cursor.fetchone()
-            return [dict(result)] if result else []
+            with Database.transaction() as tx:
+                result = tx.fetch_one(query, (local, data_completa, observacao_geral, rating_geral,
+                                              avaliado_cpf, avaliador_cpf, questionario_cod))
+                if result:
+                    AvaliacoesModel._registrar_agregados(
+                        tx, None, AvaliacoesModel._estado_para_agregados(tx, result['cod_avaliacao'])
+                    )
+                    DashboardModel.notificar_atividade(tx, result['cod_avaliacao'], 'criada')
+                invalidar_apos_commit('Avaliacao')
+            return [result] if result else []
             
         except Exception as error:
-            if connection:
-                connection.rollback()
             print(f"[ERRO] Erro ao criar avaliação: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
+    
+    @staticmethod
+    def _estado_para_agregados(tx, avaliacao_id, bloquear=False):
+        """
+        Lê os campos da avaliação usados pelos contadores, pelo agregado
+        diário e pelo motor colunar
+        
+        Com bloquear=True a linha fica travada até o commit, para que o
+        estado anterior a uma alteração não mude no meio do caminho.
+        """
+        query = """
+            SELECT 
+                a.cod_avaliacao,
+                a.rating_geral,
+                a.avaliado_cpf,
+                a.avaliador_cpf,
+                a.questionario_cod,
+                DATE(a.data_completa) AS dia,
+                EXTRACT(EPOCH FROM a.data_completa)::FLOAT8 AS instante,
+                f.setor
+            FROM Avaliacao a
+            JOIN Funcionario f ON f.cpf = a.avaliado_cpf
+            WHERE a.cod_avaliacao = %s
+        """
+        if bloquear:
+            query += " FOR UPDATE OF a"
+        return tx.fetch_one(query, (avaliacao_id,))
+    
+    @staticmethod
+    def _registrar_agregados(tx, anterior, atual):
+        """Propaga uma escrita em Avaliacao para os contadores e os agregados"""
+        ContadoresModel.registrar(tx, 'Avaliacao', anterior, atual)
+        AvaliacoesDiariasModel.registrar(tx, anterior, atual)
+        MotorColunar.registrar(tx, anterior, atual)
     
     @staticmethod
     def atualizar_status(avaliacao_id, rating_geral=None, observacao_geral=None):
         """Atualiza uma avaliação (rating_geral e observacao_geral)"""
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
-        
         campos = []
         params = []
         
@@ -132,43 +171,34 @@ class AvaliacoesModel:
         
         params.append(avaliacao_id)
         
-        connection = None
-        cursor = None
+        query = f"""
+            UPDATE Avaliacao 
+            SET {', '.join(campos)}
+            WHERE cod_avaliacao = %s
+            RETURNING cod_avaliacao, rating_geral, observacao_geral, data_completa
+        """
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            query = f"""
-                UPDATE Avaliacao 
-                SET {', '.join(campos)}
-                WHERE cod_avaliacao = %s
-                RETURNING cod_avaliacao, rating_geral, observacao_geral, data_completa
-            """
-            
-            cursor.execute(query, tuple(params))
-            connection.commit()
-            
-            result = cursor.fetchone()
-            return [dict(result)] if result else None
+            with Database.transaction() as tx:
+                anterior = AvaliacoesModel._estado_para_agregados(tx, avaliacao_id, bloquear=True)
+                result = tx.fetch_one(query, tuple(params))
+                if result:
+                    AvaliacoesModel._registrar_agregados(
+                        tx, anterior, AvaliacoesModel._estado_para_agregados(tx, avaliacao_id)
+                    )
+                    if anterior['rating_geral'] != result['rating_geral']:
+                        # Título e cor da atividade dependem do rating
+                        DashboardModel.notificar_atividade(tx, avaliacao_id, 'atualizada')
+                    invalidar_apos_commit('Avaliacao')
+            return [result] if result else None
             
         except Exception as error:
-            if connection:
-                connection.rollback()
             print(f"[ERRO] Erro ao atualizar status da avaliação: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def atualizar_configuracoes(avaliacao_id, avaliado_cpf=None, avaliador_cpf=None, questionario_cod=None, local=None, observacao_geral=None):
         """Atualiza as configurações de uma avaliação (funcionário, avaliador, questionário, local, observacao_geral)"""
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
-        
         campos = []
         params = []
         
@@ -197,36 +227,39 @@ class AvaliacoesModel:
         
         params.append(avaliacao_id)
         
-        connection = None
-        cursor = None
+        query = f"""
+            UPDATE Avaliacao 
+            SET {', '.join(campos)}
+            WHERE cod_avaliacao = %s
+            RETURNING cod_avaliacao, avaliado_cpf, avaliador_cpf, questionario_cod, local, observacao_geral
+        """
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            query = f"""
-                UPDATE Avaliacao 
-                SET {', '.join(campos)}
-                WHERE cod_avaliacao = %s
-                RETURNING cod_avaliacao, avaliado_cpf, avaliador_cpf, questionario_cod, local, observacao_geral
-            """
-            
-            cursor.execute(query, tuple(params))
-            connection.commit()
-            
-            result = cursor.fetchone()
-            return [dict(result)] if result else None
+            with Database.transaction() as tx:
+                anterior = AvaliacoesModel._estado_para_agregados(tx, avaliacao_id, bloquear=True)
+                muda_questionario = (
+                    anterior is not None and questionario_cod is not None
+                    and anterior['questionario_cod'] != questionario_cod
+                )
+                if muda_questionario:
+                    # As respostas passam a contar no novo questionário
+                    RespostasFrequenciaModel.registrar_avaliacao(tx, avaliacao_id, -1)
+                result = tx.fetch_one(query, tuple(params))
+                if result:
+                    AvaliacoesModel._registrar_agregados(
+                        tx, anterior, AvaliacoesModel._estado_para_agregados(tx, avaliacao_id)
+                    )
+                    if muda_questionario:
+                        RespostasFrequenciaModel.registrar_avaliacao(tx, avaliacao_id, 1)
+                    if avaliado_cpf is not None or questionario_cod is not None:
+                        # A descrição da atividade usa o avaliado e o questionário
+                        DashboardModel.notificar_atividade(tx, avaliacao_id, 'atualizada')
+                    invalidar_apos_commit('Avaliacao')
+            return [result] if result else None
             
         except Exception as error:
-            if connection:
-                connection.rollback()
             print(f"[ERRO] Erro ao atualizar configurações da avaliação: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def buscar_respostas(avaliacao_id):
@@ -251,68 +284,305 @@ class AvaliacoesModel:
     @staticmethod
     def deletar(avaliacao_id):
         """Deleta uma avaliação e suas respostas (CASCADE)"""
-        query = "DELETE FROM Avaliacao WHERE cod_avaliacao = %s"
-        return execute_query(query, (avaliacao_id,), fetch=False)
+        query = """
+            DELETE FROM Avaliacao a
+            USING Funcionario f
+            WHERE a.cod_avaliacao = %s AND f.cpf = a.avaliado_cpf
+            RETURNING a.cod_avaliacao, a.rating_geral, a.avaliado_cpf, a.avaliador_cpf,
+                      a.questionario_cod, DATE(a.data_completa) AS dia,
+                      EXTRACT(EPOCH FROM a.data_completa)::FLOAT8 AS instante, f.setor
+        """
+        with Database.transaction() as tx:
+            # As respostas saem junto (CASCADE): tira-as do histograma antes
+            RespostasFrequenciaModel.registrar_avaliacao(tx, avaliacao_id, -1)
+            removidas = tx.fetch_all(query, (avaliacao_id,))
+            for linha in removidas:
+                AvaliacoesModel._registrar_agregados(tx, linha, None)
+            if removidas:
+                DashboardModel.notificar_atividade(tx, avaliacao_id, 'removida')
+                invalidar_apos_commit('Avaliacao', 'Resposta')
+        return len(removidas)
     
     @staticmethod
     def salvar_resposta(avaliacao_cod, questao_cod, opcao_cod):
         """Salva ou atualiza uma resposta de avaliação (UPSERT) - Modelo 2 usa apenas opcao_cod"""
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
-        
-        connection = None
-        cursor = None
-        
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            # Verificar se a resposta já existe (constraint UNIQUE garante uma resposta por questão)
-            query_verificar = """
-                SELECT cod_resposta 
-                FROM Resposta 
-                WHERE avaliacao_cod = %s AND questao_cod = %s
-            """
-            cursor.execute(query_verificar, (avaliacao_cod, questao_cod))
-            resposta_existente = cursor.fetchone()
-            
-            if resposta_existente:
-                # Atualizar resposta existente
-                cod_resposta = resposta_existente['cod_resposta']
+            with Database.transaction() as tx:
+                # Trava a avaliação (compartilhada): exclusão e troca de questionário esperam
+                questionario_cod = tx.fetch_value(
+                    "SELECT questionario_cod FROM Avaliacao WHERE cod_avaliacao = %s FOR SHARE",
+                    (avaliacao_cod,)
+                )
                 
-                query_atualizar = """
-                    UPDATE Resposta 
-                    SET opcao_cod = %s
-                    WHERE cod_resposta = %s
-                    RETURNING cod_resposta
-                """
-                cursor.execute(query_atualizar, (opcao_cod, cod_resposta))
-            else:
-                # Criar nova resposta
-                query_inserir = """
-                    INSERT INTO Resposta 
-                    (avaliacao_cod, questao_cod, opcao_cod)
-                    VALUES (%s, %s, %s)
-                    RETURNING cod_resposta
+                # Verificar se a resposta já existe (constraint UNIQUE garante uma resposta por questão)
+                query_verificar = """
+                    SELECT cod_resposta, opcao_cod
+                    FROM Resposta 
+                    WHERE avaliacao_cod = %s AND questao_cod = %s
+                    FOR UPDATE
                 """
-                cursor.execute(query_inserir, (avaliacao_cod, questao_cod, opcao_cod))
-            
-            connection.commit()
+                resposta_existente = tx.fetch_one(query_verificar, (avaliacao_cod, questao_cod))
+                anterior = None
+                
+                if resposta_existente:
+                    # Atualizar resposta existente
+                    cod_resposta = resposta_existente['cod_resposta']
+                    anterior = {
+                        'questao_cod': questao_cod,
+                        'opcao_cod': resposta_existente['opcao_cod'],
+                        'questionario_cod': questionario_cod
+                    }
+                    
+                    query_atualizar = """
+                        UPDATE Resposta 
+                        SET opcao_cod = %s
+                        WHERE cod_resposta = %s
+                        RETURNING cod_resposta
+                    """
+                    result = tx.fetch_one(query_atualizar, (opcao_cod, cod_resposta))
+                else:
+                    # Criar nova resposta
+                    query_inserir = """
+                        INSERT INTO Resposta 
+                        (avaliacao_cod, questao_cod, opcao_cod)
+                        VALUES (%s, %s, %s)
+                        RETURNING cod_resposta
+                    """
+                    result = tx.fetch_one(query_inserir, (avaliacao_cod, questao_cod, opcao_cod))
+                
+                if result:
+                    RespostasFrequenciaModel.registrar(tx, anterior, {
+                        'questao_cod': questao_cod,
+                        'opcao_cod': opcao_cod,
+                        'questionario_cod': questionario_cod
+                    })
+                invalidar_apos_commit('Resposta')
             
             # Retornar a resposta atualizada
-            result = cursor.fetchone()
-            return [dict(result)] if result else None
+            return [result] if result else None
             
         except Exception as error:
-            if connection:
-                connection.rollback()
             print(f"[ERRO] Erro ao salvar resposta: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
+    
+    @staticmethod
+    def _verificar_respostas(tx, questionario_cod, respostas):
+        """
+        Regras de uma resposta: a opção existe, é da questão, a questão faz
+        parte do questionário e não se repete no lote
+
+        Returns:
+            list: mensagem de erro (ou None) para cada resposta, na ordem recebida
+        """
+        query_opcoes = """
+            SELECT 
+                o.cod_opcao,
+                o.questao_cod,
+                qq.questao_cod IS NOT NULL AS no_questionario
+            FROM Opcao o
+            LEFT JOIN Questionario_Questao qq
+                ON qq.questao_cod = o.questao_cod AND qq.questionario_cod = %s
+            WHERE o.cod_opcao = ANY(%s::INTEGER[])
+        """
+        opcoes = {
+            linha['cod_opcao']: linha
+            for linha in tx.fetch_all(
+                query_opcoes, (questionario_cod, sorted({opcao for _, opcao in respostas}))
+            )
+        }
+        
+        erros = []
+        vistas = set()
+        for questao_cod, opcao_cod in respostas:
+            opcao = opcoes.get(opcao_cod)
+            if opcao is None:
+                erros.append('Opção não encontrada')
+            elif opcao['questao_cod'] != questao_cod:
+                erros.append('A opção não pertence à questão')
+            elif not opcao['no_questionario']:
+                erros.append('A questão não faz parte do questionário da avaliação')
+            elif questao_cod in vistas:
+                erros.append('Questão repetida no lote')
+            else:
+                vistas.add(questao_cod)
+                erros.append(None)
+        return erros
+    
+    @staticmethod
+    def validar_respostas(avaliacao_cod, respostas):
+        """
+        Confere respostas sem gravá-las, com as mesmas regras de salvar_respostas
+        
+        Usado antes de pôr uma resposta na fila do buffer, para recusar na
+        hora o que a gravação recusaria depois.
+        
+        Returns:
+            list: mensagem de erro (ou None) para cada resposta, na ordem recebida
+            None: se a avaliação não existir
+        """
+        try:
+            with Database.transaction() as tx:
+                questionario_cod = tx.fetch_value(
+                    "SELECT questionario_cod FROM Avaliacao WHERE cod_avaliacao = %s",
+                    (avaliacao_cod,)
+                )
+                if questionario_cod is None:
+                    return None
+                return AvaliacoesModel._verificar_respostas(tx, questionario_cod, respostas)
+        except Exception as error:
+            print(f"[ERRO] Erro ao validar respostas: {error}")
+            raise
+    
+    @staticmethod
+    def salvar_respostas(avaliacao_cod, respostas):
+        """
+        Salva (UPSERT) várias respostas de uma avaliação numa única transação
+        
+        Todas as respostas válidas são gravadas por um único
+        INSERT ... ON CONFLICT (avaliacao_cod, questao_cod) DO UPDATE. Uma
+        resposta é recusada se a opção não existir, não for da questão, se a
+        questão não fizer parte do questionário da avaliação ou se a questão
+        já apareceu antes no mesmo lote.
+        
+        Args:
+            avaliacao_cod (int): avaliação respondida
+            respostas (list): tuplas (questao_cod, opcao_cod)
+        
+        Returns:
+            list: um dict por resposta, na ordem recebida, com questao_cod,
+                opcao_cod, status ('inserida', 'atualizada', 'inalterada' ou
+                'erro'), cod_resposta e, se recusada, erro
+            None: se a avaliação não existir
+        """
+        # As CTEs enxergam o mesmo snapshot: `anteriores` traz as opções de
+        # antes do UPSERT, e `gravadas` só as linhas que de fato mudaram
+        query_upsert = """
+            WITH entrada AS (
+                SELECT * FROM unnest(%s::INTEGER[], %s::INTEGER[]) AS t(questao_cod, opcao_cod)
+            ),
+            anteriores AS (
+                SELECT r.cod_resposta, r.questao_cod, r.opcao_cod
+                FROM Resposta r
+                JOIN entrada e ON e.questao_cod = r.questao_cod
+                WHERE r.avaliacao_cod = %s
+            ),
+            gravadas AS (
+                INSERT INTO Resposta (avaliacao_cod, questao_cod, opcao_cod)
+                SELECT %s, questao_cod, opcao_cod FROM entrada ORDER BY questao_cod
+                ON CONFLICT (avaliacao_cod, questao_cod) DO UPDATE
+                    SET opcao_cod = EXCLUDED.opcao_cod
+                    WHERE Resposta.opcao_cod <> EXCLUDED.opcao_cod
+                RETURNING cod_resposta, questao_cod
+            )
+            SELECT 
+                e.questao_cod,
+                COALESCE(g.cod_resposta, a.cod_resposta) AS cod_resposta,
+                a.opcao_cod AS opcao_anterior,
+                g.cod_resposta IS NOT NULL AS gravada
+            FROM entrada e
+            LEFT JOIN anteriores a ON a.questao_cod = e.questao_cod
+            LEFT JOIN gravadas g ON g.questao_cod = e.questao_cod
+        """
+        
+        try:
+            with Database.transaction() as tx:
+                # Trava a avaliação: outras escritas nas respostas dela esperam o
+                # commit, então `anteriores` não perde nenhuma linha concorrente
+                questionario_cod = tx.fetch_value(
+                    "SELECT questionario_cod FROM Avaliacao WHERE cod_avaliacao = %s FOR NO KEY UPDATE",
+                    (avaliacao_cod,)
+                )
+                if questionario_cod is None:
+                    return None
+                
+                resultado = []
+                validas = {}
+                erros = AvaliacoesModel._verificar_respostas(tx, questionario_cod, respostas)
+                for (questao_cod, opcao_cod), erro in zip(respostas, erros):
+                    item = {'questao_cod': questao_cod, 'opcao_cod': opcao_cod, 'status': 'erro', 'cod_resposta': None}
+                    if erro:
+                        item['erro'] = erro
+                    else:
+                        validas[questao_cod] = item
+                    resultado.append(item)
+                
+                if not validas:
+                    return resultado
+                
+                questoes = list(validas)
+                gravadas = tx.fetch_all(query_upsert, (
+                    questoes, [validas[questao]['opcao_cod'] for questao in questoes],
+                    avaliacao_cod, avaliacao_cod
+                ))
+                
+                alteracoes = []
+                for linha in gravadas:
+                    item = validas[linha['questao_cod']]
+                    item['cod_resposta'] = linha['cod_resposta']
+                    if linha['opcao_anterior'] is None:
+                        item['status'] = 'inserida'
+                    elif linha['gravada']:
+                        item['status'] = 'atualizada'
+                    else:
+                        item['status'] = 'inalterada'
+                        continue
+                    anterior = None
+                    if linha['opcao_anterior'] is not None:
+                        anterior = {
+                            'questao_cod': item['questao_cod'],
+                            'opcao_cod': linha['opcao_anterior'],
+                            'questionario_cod': questionario_cod
+                        }
+                    alteracoes.append((anterior, {
+                        'questao_cod': item['questao_cod'],
+                        'opcao_cod': item['opcao_cod'],
+                        'questionario_cod': questionario_cod
+                    }))
+                
+                if alteracoes:
+                    RespostasFrequenciaModel.registrar_lote(tx, alteracoes)
+                    invalidar_apos_commit('Resposta')
+            
+            return resultado
+            
+        except Exception as error:
+            print(f"[ERRO] Erro ao salvar respostas: {error}")
+            raise
+    
+    @staticmethod
+    def inserir_respostas_em_lote(respostas):
+        """
+        Insere muitas respostas de uma vez (COPY)
+        
+        Args:
+            respostas: iterável (pode ser gerador) de tuplas
+                (avaliacao_cod, questao_cod, opcao_cod)
+        
+        Returns:
+            int: quantidade de respostas inseridas
+        """
+        try:
+            contagens = {}
+            
+            def contar(linhas):
+                # Conta as respostas enquanto o COPY as consome, para o histograma
+                for linha in linhas:
+                    chave = tuple(linha[:3])
+                    contagens[chave] = contagens.get(chave, 0) + 1
+                    yield linha
+            
+            with Database.transaction() as tx:
+                invalidar_apos_commit('Resposta')
+                total = tx.bulk_insert(
+                    'Resposta',
+                    ('avaliacao_cod', 'questao_cod', 'opcao_cod'),
+                    contar(respostas)
+                )
+                RespostasFrequenciaModel.registrar_insercoes(tx, contagens)
+                return total
+        except Exception as error:
+            print(f"[ERRO] Erro ao inserir respostas em lote: {error}")
+            raise
     
     @staticmethod
     def contar_por_rating():
@@ -330,52 +600,34 @@ class AvaliacoesModel:
         return execute_query(query)
     
     @staticmethod
-    def contar_por_status():
+    @derivada(DashboardModel.metricas_status)
+    def contar_por_status(metricas):
         """Retorna contagem simulada de status baseado em rating_geral e data"""
-        query = """
-            SELECT 
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN 'Concluída'
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN 'Pendente'
-                    ELSE 'Em Andamento'
-                END AS status,
-                COUNT(*) AS total
-            FROM Avaliacao
-            GROUP BY 
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN 'Concluída'
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN 'Pendente'
-                    ELSE 'Em Andamento'
-                END
-            ORDER BY 
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN 1
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN 2
-                    ELSE 3
-                END
-        """
-        
-        return execute_query(query)
+        return [
+            {'status': rotulo, 'total': metricas[campo]}
+            for campo, _, rotulo, _ in STATUS_AVALIACAO
+            if metricas[campo]
+        ]
     
     @staticmethod
     def avaliacoes_por_mes(ano=None):
-        """Retorna quantidade de avaliações por mês"""
-        query = """
+        """Retorna quantidade de avaliações por mês (lidas do agregado diário)"""
+        query = f"""
             SELECT 
-                TO_CHAR(data_completa, 'MM') AS mes,
-                TO_CHAR(data_completa, 'Mon') AS mes_nome,
-                COUNT(*) AS total
-            FROM Avaliacao
-            WHERE data_completa IS NOT NULL
+                TO_CHAR(diaria.dia, 'MM') AS mes,
+                TO_CHAR(diaria.dia, 'Mon') AS mes_nome,
+                SUM(diaria.total)::BIGINT AS total
+            FROM {AvaliacoesDiariasModel.fonte()}
         """
         
         params = []
         if ano:
-            query += " AND EXTRACT(YEAR FROM data_completa) = %s"
-            params.append(ano)
+            # Intervalo em vez de EXTRACT(YEAR ...): usa a chave primária do agregado
+            query += " WHERE diaria.dia >= make_date(%s, 1, 1) AND diaria.dia < make_date(%s + 1, 1, 1)"
+            params.extend([int(ano), int(ano)])
         
         query += """
-            GROUP BY TO_CHAR(data_completa, 'MM'), TO_CHAR(data_completa, 'Mon')
+            GROUP BY TO_CHAR(diaria.dia, 'MM'), TO_CHAR(diaria.dia, 'Mon')
             ORDER BY mes
         """
         
@@ -397,62 +649,49 @@ class AvaliacoesModel:
         Retorna dados de todas as avaliações que usam esta questão
         Modelo 2: Todas as questões são múltipla escolha, usando tabela Opcao
         """
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
-        
-        connection = None
-        cursor = None
-        
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            # Buscar a questão e suas opções
-            query_questao = """
-                SELECT 
-                    q.cod_questao AS questao_id,
-                    q.texto_questao AS pergunta
-                FROM Questao q
-                WHERE q.cod_questao = %s
-            """
-            
-            cursor.execute(query_questao, (questao_id,))
-            questao_data = cursor.fetchone()
-            
-            if not questao_data:
-                return []
-            
-            # Buscar todas as opções da questão
-            query_opcoes = """
-                SELECT 
-                    o.cod_opcao,
-                    o.texto_opcao,
-                    o.ordem
-                FROM Opcao o
-                WHERE o.questao_cod = %s
-                ORDER BY o.ordem, o.cod_opcao
-            """
-            
-            cursor.execute(query_opcoes, (questao_id,))
-            opcoes = cursor.fetchall()
+            with Database.read_transaction() as tx:
+                # Buscar a questão e suas opções
+                query_questao = """
+                    SELECT 
+                        q.cod_questao AS questao_id,
+                        q.texto_questao AS pergunta
+                    FROM Questao q
+                    WHERE q.cod_questao = %s
+                """
+                
+                questao_data = tx.fetch_one(query_questao, (questao_id,))
+                
+                if not questao_data:
+                    return []
+                
+                # Buscar todas as opções da questão
+                query_opcoes = """
+                    SELECT 
+                        o.cod_opcao,
+                        o.texto_opcao,
+                        o.ordem
+                    FROM Opcao o
+                    WHERE o.questao_cod = %s
+                    ORDER BY o.ordem, o.cod_opcao
+                """
+                
+                opcoes = tx.fetch_all(query_opcoes, (questao_id,))
+                
+                # Contagem de respostas por opção (histograma, somado entre questionários)
+                query_respostas = f"""
+                    SELECT 
+                        freq.opcao_cod,
+                        SUM(freq.quantidade)::BIGINT AS quantidade
+                    FROM {RespostasFrequenciaModel.fonte()}
+                    WHERE freq.questao_cod = %s
+                    GROUP BY freq.opcao_cod
+                """
+                
+                respostas = tx.fetch_all(query_respostas, (questao_id,))
             
             resultado = []
             
-            # Buscar contagem de respostas por opção
-            query_respostas = """
-                SELECT 
-                    r.opcao_cod,
-                    o.texto_opcao AS alternativa_selecionada,
-                    COUNT(*) AS quantidade
-                FROM Resposta r
-                INNER JOIN Opcao o ON r.opcao_cod = o.cod_opcao
-                WHERE r.questao_cod = %s
-                GROUP BY r.opcao_cod, o.texto_opcao
-            """
-            
-            cursor.execute(query_respostas, (questao_id,))
-            respostas = cursor.fetchall()
-            
             # Criar dicionário de contagens por cod_opcao
             contagens = {r['opcao_cod']: r['quantidade'] for r in respostas}
             
@@ -471,114 +710,38 @@ class AvaliacoesModel:
             
         except Exception as error:
             print(f"[ERRO] Erro ao buscar respostas por questão: {error}")
-            import traceback
-            traceback.print_exc()
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
+    @staticmethod
+    @consulta(ttl=300, tabelas=('Resposta', 'Resposta_Frequencia', 'Questionario_Questao', 'Questao', 'Opcao'))
     def buscar_respostas_agrupadas_grafico_por_questionario(questionario_id):
         """Busca respostas agrupadas por pergunta e alternativa para gráfico
         Retorna dados de todas as avaliações que usam o questionário especificado
         Modelo 2: Todas as questões são múltipla escolha, usando tabela Opcao
-        """
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
         
-        connection = None
-        cursor = None
+        Uma única consulta: cada opção das questões do questionário com a
+        contagem do histograma (0 quando ninguém a escolheu), em cache por
+        questionário até a próxima escrita em respostas
+        """
+        query = f"""
+            SELECT 
+                q.cod_questao AS questao_id,
+                q.texto_questao AS pergunta,
+                o.cod_opcao AS opcao_cod,
+                o.texto_opcao AS alternativa_selecionada,
+                COALESCE(freq.quantidade, 0)::BIGINT AS quantidade
+            FROM Questionario_Questao qq
+            INNER JOIN Questao q ON qq.questao_cod = q.cod_questao
+            INNER JOIN Opcao o ON q.cod_questao = o.questao_cod
+            LEFT JOIN {RespostasFrequenciaModel.fonte()}
+                ON freq.questao_cod = q.cod_questao
+                AND freq.opcao_cod = o.cod_opcao
+                AND freq.questionario_cod = qq.questionario_cod
+            WHERE qq.questionario_cod = %s
+            ORDER BY q.cod_questao, o.ordem, o.cod_opcao
+        """
         
-        try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            # Buscar todas as questões do questionário com suas opções
-            query_perguntas = """
-                SELECT 
-                    q.cod_questao AS questao_id,
-                    q.texto_questao AS pergunta,
-                    o.cod_opcao,
-                    o.texto_opcao,
-                    o.ordem
-                FROM Questionario_Questao qq
-                INNER JOIN Questao q ON qq.questao_cod = q.cod_questao
-                LEFT JOIN Opcao o ON q.cod_questao = o.questao_cod
-                WHERE qq.questionario_cod = %s
-                ORDER BY q.cod_questao, o.ordem, o.cod_opcao
-            """
-            
-            cursor.execute(query_perguntas, (questionario_id,))
-            resultados = cursor.fetchall()
-            
-            # Agrupar por questão
-            questoes_dict = {}
-            for row in resultados:
-                questao_id = row['questao_id']
-                if questao_id not in questoes_dict:
-                    questoes_dict[questao_id] = {
-                        'questao_id': questao_id,
-                        'pergunta': row['pergunta'],
-                        'opcoes': []
-                    }
-                
-                if row['cod_opcao']:
-                    questoes_dict[questao_id]['opcoes'].append({
-                        'cod_opcao': row['cod_opcao'],
-                        'texto_opcao': row['texto_opcao'],
-                        'ordem': row['ordem']
-                    })
-            
-            resultado = []
-            
-            # Para cada questão, buscar contagem de respostas por opção
-            for questao_id, questao_data in questoes_dict.items():
-                # Buscar contagem de respostas por opção
-                query_respostas = """
-                    SELECT 
-                        r.opcao_cod,
-                        o.texto_opcao AS alternativa_selecionada,
-                        COUNT(*) AS quantidade
-                    FROM Resposta r
-                    INNER JOIN Avaliacao a ON r.avaliacao_cod = a.cod_avaliacao
-                    INNER JOIN Opcao o ON r.opcao_cod = o.cod_opcao
-                    WHERE a.questionario_cod = %s
-                        AND r.questao_cod = %s
-                    GROUP BY r.opcao_cod, o.texto_opcao
-                """
-                
-                cursor.execute(query_respostas, (questionario_id, questao_id))
-                respostas = cursor.fetchall()
-                
-                # Criar dicionário de contagens por cod_opcao
-                contagens = {r['opcao_cod']: r['quantidade'] for r in respostas}
-                
-                # Para cada opção disponível, criar um registro (mesmo se quantidade for 0)
-                for opcao in questao_data['opcoes']:
-                    quantidade = contagens.get(opcao['cod_opcao'], 0)
-                    resultado.append({
-                        'questao_id': questao_id,
-                        'pergunta': questao_data['pergunta'],
-                        'opcao_cod': opcao['cod_opcao'],
-                        'alternativa_selecionada': opcao['texto_opcao'],
-                        'quantidade': quantidade
-                    })
-            
-            print(f"[DEBUG] Total de registros retornados para questionário {questionario_id}: {len(resultado)}")
-            return resultado
-            
-        except Exception as error:
-            print(f"[ERRO] Erro ao buscar respostas agrupadas: {error}")
-            import traceback
-            traceback.print_exc()
-            raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
+        return query, (questionario_id,)
     
     @staticmethod
     def buscar_respostas_agrupadas_grafico(avaliacao_id):
@@ -0,0 +1,297 @@
+"""
+Agregado diário de avaliações (Avaliacao_Diaria)
+Cubo com uma linha por dia, setor do avaliado, questionário e avaliador,
+com quantidade, soma e máximo de rating_geral; mantido a cada escrita em
+Avaliacao. Os filtros do dashboard (ver Filtros) são aplicados sobre ele
+
+Uso para reconstruir (backfill):
+    python -m backend.models.avaliacoes_diarias [--desde AAAA-MM-DD] [--ate AAAA-MM-DD]
+"""
+import argparse
+import collections
+import datetime
+
+from dotenv import load_dotenv
+
+from backend.config.cache import invalidar_apos_commit
+from backend.config.database import Database
+
+# Mesmas colunas do agregado, calculadas direto de Avaliacao
+_SELECT_AGREGADO = """
+    SELECT
+        DATE(a.data_completa) AS dia,
+        COALESCE(f.setor, '') AS setor,
+        a.questionario_cod,
+        a.avaliador_cpf,
+        COUNT(*) AS total,
+        COUNT(a.rating_geral) AS concluidas,
+        COALESCE(SUM(a.rating_geral), 0) AS soma_rating,
+        MAX(a.rating_geral) AS max_rating
+    FROM Avaliacao a
+    JOIN Funcionario f ON f.cpf = a.avaliado_cpf
+"""
+
+_GROUP_BY_AGREGADO = " GROUP BY DATE(a.data_completa), COALESCE(f.setor, ''), a.questionario_cod, a.avaliador_cpf"
+
+_COLUNAS = "dia, setor, questionario_cod, avaliador_cpf, total, concluidas, soma_rating, max_rating"
+
+_CHAVE = "dia = %s AND setor = %s AND questionario_cod = %s AND avaliador_cpf = %s"
+
+
+# Filtros comuns dos painéis do dashboard (None = sem filtro); setor ''
+# seleciona as avaliações de funcionários sem setor
+Filtros = collections.namedtuple(
+    'Filtros', ('setor', 'questionario', 'avaliador', 'desde', 'ate'), defaults=(None,) * 5
+)
+
+
+class AvaliacoesDiariasModel:
+
+    # Só depois de conferido (ou reconstruído) o agregado é usado nas consultas
+    pronto = False
+
+    @staticmethod
+    def fonte():
+        """
+        Trecho FROM com as colunas do agregado, apelidado `diaria`
+
+        Usa a tabela Avaliacao_Diaria quando ela está pronta; senão calcula
+        o mesmo formato a partir de Avaliacao, como antes do agregado existir.
+        """
+        if AvaliacoesDiariasModel.pronto:
+            return "Avaliacao_Diaria diaria"
+        return f"({_SELECT_AGREGADO} WHERE a.data_completa IS NOT NULL {_GROUP_BY_AGREGADO}) diaria"
+
+    @staticmethod
+    def fonte_periodo(desde=None, ate=None, ultimos_dias=None, filtros=None):
+        """
+        Como fonte(), já restrita a um período (datas inclusivas) e aos
+        `filtros` do dashboard
+
+        Os filtros de data são intervalos sobre a coluna indexada (dia no
+        agregado, data_completa em Avaliacao), nunca DATE(coluna), para usar
+        os índices.
+
+        Returns:
+            tuple: (trecho FROM, params)
+        """
+        filtros = filtros or Filtros()
+        pronto = AvaliacoesDiariasModel.pronto
+        condicoes = []
+
+        def filtrar(valor, no_agregado, em_avaliacao):
+            condicoes.append((no_agregado if pronto else em_avaliacao, valor))
+
+        for data in (desde, filtros.desde):
+            if data:
+                filtrar(data, "dia >= %s", "a.data_completa >= %s::DATE")
+        for data in (ate, filtros.ate):
+            if data:
+                filtrar(data, "dia <= %s", "a.data_completa < %s::DATE + 1")
+        if ultimos_dias:
+            filtrar(ultimos_dias, "dia >= CURRENT_DATE - %s::INTEGER",
+                    "a.data_completa >= CURRENT_DATE - %s::INTEGER")
+        if filtros.setor is not None:
+            filtrar(filtros.setor, "setor = %s", "COALESCE(f.setor, '') = %s")
+        if filtros.questionario is not None:
+            filtrar(filtros.questionario, "questionario_cod = %s", "a.questionario_cod = %s")
+        if filtros.avaliador is not None:
+            filtrar(filtros.avaliador, "avaliador_cpf = %s", "a.avaliador_cpf = %s")
+
+        if not condicoes:
+            return AvaliacoesDiariasModel.fonte(), ()
+        where = ' AND '.join(condicao for condicao, _ in condicoes)
+        params = tuple(valor for _, valor in condicoes)
+        if pronto:
+            return f"(SELECT * FROM Avaliacao_Diaria WHERE {where}) diaria", params
+        # Como no agregado, avaliações sem data ficam de fora
+        where = f"a.data_completa IS NOT NULL AND {where}"
+        return f"({_SELECT_AGREGADO} WHERE {where} {_GROUP_BY_AGREGADO}) diaria", params
+
+    @staticmethod
+    def registrar(tx, anterior=None, atual=None):
+        """
+        Ajusta o agregado após uma escrita em Avaliacao, na mesma transação
+
+        Args:
+            anterior (dict): estado antes da escrita (None em inserções)
+            atual (dict): estado depois da escrita (None em exclusões)
+            Ambos com dia, setor, questionario_cod, avaliador_cpf e rating_geral.
+        """
+        AvaliacoesDiariasModel.registrar_lote(tx, [(anterior, atual)])
+
+    @staticmethod
+    def registrar_lote(tx, alteracoes):
+        """Como registrar, para um iterável de pares (anterior, atual)"""
+        grupos = {}
+
+        def somar(linha, sinal):
+            if linha is None or linha.get('dia') is None:
+                return
+            chave = (linha['dia'], linha.get('setor') or '', linha['questionario_cod'], linha['avaliador_cpf'])
+            grupo = grupos.setdefault(chave, {
+                'total': 0, 'concluidas': 0, 'soma': 0, 'maximo': None, 'removido': None
+            })
+            grupo['total'] += sinal
+            rating = linha.get('rating_geral')
+            if rating is None:
+                return
+            grupo['concluidas'] += sinal
+            grupo['soma'] += sinal * rating
+            campo = 'maximo' if sinal > 0 else 'removido'
+            if grupo[campo] is None or rating > grupo[campo]:
+                grupo[campo] = rating
+
+        for anterior, atual in alteracoes:
+            if anterior == atual:
+                continue
+            somar(anterior, -1)
+            somar(atual, 1)
+
+        # Ordem fixa: transações concorrentes bloqueiam as linhas na mesma ordem
+        for chave in sorted(grupos):
+            grupo = grupos[chave]
+            if grupo['total'] == grupo['concluidas'] == grupo['soma'] == 0 \
+                    and grupo['maximo'] == grupo['removido']:
+                continue
+            AvaliacoesDiariasModel._aplicar(tx, chave, grupo)
+
+        if grupos:
+            invalidar_apos_commit('Avaliacao_Diaria')
+
+    @staticmethod
+    def _aplicar(tx, chave, grupo):
+        linha = tx.fetch_one(f"""
+            INSERT INTO Avaliacao_Diaria ({_COLUNAS})
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (dia, setor, questionario_cod, avaliador_cpf) DO UPDATE SET
+                total = Avaliacao_Diaria.total + EXCLUDED.total,
+                concluidas = Avaliacao_Diaria.concluidas + EXCLUDED.concluidas,
+                soma_rating = Avaliacao_Diaria.soma_rating + EXCLUDED.soma_rating,
+                max_rating = GREATEST(Avaliacao_Diaria.max_rating, EXCLUDED.max_rating)
+            RETURNING total, max_rating
+        """, chave + (grupo['total'], grupo['concluidas'], grupo['soma'], grupo['maximo']))
+
+        if linha['total'] <= 0:
+            tx.execute(f"DELETE FROM Avaliacao_Diaria WHERE {_CHAVE}", chave)
+            return
+
+        # O máximo só diminui se o valor removido era o máximo: recalcula o grupo
+        removido = grupo['removido']
+        if removido is not None and linha['max_rating'] is not None and removido >= linha['max_rating']:
+            tx.execute("""
+                UPDATE Avaliacao_Diaria d
+                SET max_rating = (
+                    SELECT MAX(a.rating_geral)
+                    FROM Avaliacao a
+                    JOIN Funcionario f ON f.cpf = a.avaliado_cpf
+                    WHERE a.data_completa >= d.dia
+                      AND a.data_completa < d.dia + 1
+                      AND a.questionario_cod = d.questionario_cod
+                      AND a.avaliador_cpf = d.avaliador_cpf
+                      AND COALESCE(f.setor, '') = d.setor
+                )
+                WHERE d.dia = %s AND d.setor = %s AND d.questionario_cod = %s AND d.avaliador_cpf = %s
+            """, chave)
+
+    @staticmethod
+    def reconstruir(desde=None, ate=None):
+        """
+        Reconstrói o agregado (backfill), um mês por transação
+
+        Cada mês trava a tabela do agregado só enquanto é refeito; escritas
+        concorrentes esperam e depois aplicam seus ajustes normalmente.
+
+        Returns:
+            int: quantidade de linhas geradas
+        """
+        with Database.transaction() as tx:
+            limites = tx.fetch_one(
+                "SELECT MIN(DATE(data_completa)) AS inicio, MAX(DATE(data_completa)) AS fim FROM Avaliacao"
+            )
+        inicio = desde or limites['inicio']
+        fim = ate or limites['fim']
+        if inicio is None or fim is None:
+            with Database.transaction() as tx:
+                tx.execute("LOCK TABLE Avaliacao_Diaria IN EXCLUSIVE MODE")
+                if desde is None and ate is None:
+                    tx.execute("DELETE FROM Avaliacao_Diaria")
+                invalidar_apos_commit('Avaliacao_Diaria')
+            return 0
+
+        total = 0
+        mes = inicio.replace(day=1)
+        while mes <= fim:
+            proximo = (mes + datetime.timedelta(days=32)).replace(day=1)
+            de, ate_dia = max(mes, inicio), min(proximo - datetime.timedelta(days=1), fim)
+
+            with Database.transaction() as tx:
+                tx.execute("LOCK TABLE Avaliacao_Diaria IN EXCLUSIVE MODE")
+                tx.execute("DELETE FROM Avaliacao_Diaria WHERE dia BETWEEN %s AND %s", (de, ate_dia))
+                total += tx.execute(f"""
+                    INSERT INTO Avaliacao_Diaria ({_COLUNAS})
+                    {_SELECT_AGREGADO}
+                    WHERE a.data_completa >= %s AND a.data_completa < %s::DATE + 1
+                    {_GROUP_BY_AGREGADO}
+                """, (de, ate_dia))
+                invalidar_apos_commit('Avaliacao_Diaria')
+            mes = proximo
+
+        if desde is None and ate is None:
+            # Dias fora do intervalo atual de Avaliacao (ex.: avaliações removidas)
+            with Database.transaction() as tx:
+                tx.execute("DELETE FROM Avaliacao_Diaria WHERE dia < %s OR dia > %s", (inicio, fim))
+        return total
+
+    @staticmethod
+    def verificar():
+        """
+        Confere o agregado ao iniciar o servidor e o reconstrói se estiver
+        defasado (ex.: dados carregados direto no banco, ou um ajuste
+        incremental errado)
+
+        Compara cada linha (dia, setor, questionário e avaliador) com o
+        mesmo agrupamento calculado de Avaliacao: quantidade, concluídas,
+        soma e máximo de rating_geral. Se a tabela não existir, as consultas
+        seguem calculando a partir de Avaliacao.
+        """
+        try:
+            with Database.transaction() as tx:
+                linhas = tx.fetch_one(f"""
+                    WITH origem AS (
+                        {_SELECT_AGREGADO}
+                        WHERE a.data_completa IS NOT NULL
+                        {_GROUP_BY_AGREGADO}
+                    )
+                    SELECT
+                        (SELECT COALESCE(SUM(total), 0) FROM Avaliacao_Diaria) AS agregado,
+                        (SELECT COALESCE(SUM(total), 0) FROM origem) AS avaliacoes,
+                        COUNT(*) AS divergentes
+                    FROM Avaliacao_Diaria d
+                    FULL JOIN origem o USING (dia, setor, questionario_cod, avaliador_cpf)
+                    WHERE (d.total, d.concluidas, d.soma_rating, d.max_rating)
+                        IS DISTINCT FROM (o.total, o.concluidas, o.soma_rating, o.max_rating)
+                """)
+            if linhas['divergentes']:
+                print(f"[AVISO] Agregado diário defasado ({linhas['divergentes']} grupos divergentes; "
+                      f"{linhas['agregado']} de {linhas['avaliacoes']} avaliações), reconstruindo...")
+                AvaliacoesDiariasModel.reconstruir()
+        except Exception as error:
+            print(f"[AVISO] Agregado diário indisponível, séries calculadas sobre Avaliacao: {error}")
+            return
+        AvaliacoesDiariasModel.pronto = True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconstrói o agregado diário de avaliações')
+    parser.add_argument('--desde', type=datetime.date.fromisoformat, default=None)
+    parser.add_argument('--ate', type=datetime.date.fromisoformat, default=None)
+    argumentos = parser.parse_args()
+
+    load_dotenv()
+    Database.initialize_pool()
+    try:
+        linhas = AvaliacoesDiariasModel.reconstruir(argumentos.desde, argumentos.ate)
+        print(f"[OK] Agregado diário reconstruído: {linhas} linhas")
+    finally:
+        Database.close_all_connections()
@@ -6,13 +6,9 @@ class AvaliadoresModel:
         """
         Lista funcionários que possuem certificados (são avaliadores)
         """
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
         try:
-            with conn.cursor() as cursor:
-                cursor.execute("""
+            with Database.read_transaction() as tx:
+                return tx.fetch_all("""
                     SELECT DISTINCT
                         f.cpf,
                         f.nome,
@@ -30,38 +26,17 @@ class AvaliadoresModel:
                     ORDER BY f.nome
                 """)
                 
-                avaliadores = []
-                for row in cursor.fetchall():
-                    avaliadores.append({
-                        'cpf': row[0],
-                        'nome': row[1],
-                        'email': row[2],
-                        'setor': row[3],
-                        'status': row[4],
-                        'total_certificados': row[5],
-                        'ultimo_certificado': row[6],
-                        'treinamentos_unicos': row[7]
-                    })
-                
-                return avaliadores
-                
         except Exception as e:
             raise Exception(f"Erro ao listar avaliadores: {str(e)}")
-        finally:
-            Database.return_connection(conn)
     
     @staticmethod
     def buscar_avaliador_por_cpf(cpf):
         """
         Busca um avaliador específico por CPF
         """
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
         try:
-            with conn.cursor() as cursor:
-                cursor.execute("""
+            with Database.transaction() as tx:
+                return tx.fetch_one("""
                     SELECT 
                         f.cpf,
                         f.nome,
@@ -78,37 +53,17 @@ class AvaliadoresModel:
                     GROUP BY f.cpf, f.nome, f.email, f.setor, f.status
                 """, (cpf,))
                 
-                row = cursor.fetchone()
-                if row:
-                    return {
-                        'cpf': row[0],
-                        'nome': row[1],
-                        'email': row[2],
-                        'setor': row[3],
-                        'status': row[4],
-                        'total_certificados': row[5],
-                        'ultimo_certificado': row[6],
-                        'treinamentos_unicos': row[7]
-                    }
-                return None
-                
         except Exception as e:
             raise Exception(f"Erro ao buscar avaliador: {str(e)}")
-        finally:
-            Database.return_connection(conn)
     
     @staticmethod
     def listar_certificados_avaliador(cpf):
         """
         Lista todos os certificados de um avaliador específico
         """
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
         try:
-            with conn.cursor() as cursor:
-                cursor.execute("""
+            with Database.transaction() as tx:
+                return tx.fetch_all("""
                     SELECT 
                         t.cod_treinamento,
                         t.nome as nome_treinamento,
@@ -122,20 +77,5 @@ class AvaliadoresModel:
                     ORDER BY t.data_realizacao DESC
                 """, (cpf,))
                 
-                certificados = []
-                for row in cursor.fetchall():
-                    certificados.append({
-                        'cod_treinamento': row[0],
-                        'nome_treinamento': row[1],
-                        'data_realizacao': row[2],
-                        'validade': row[3],
-                        'local': row[4],
-                        'n_certificado': row[5]
-                    })
-                
-                return certificados
-                
         except Exception as e:
             raise Exception(f"Erro ao listar certificados: {str(e)}")
-        finally:
-            Database.return_connection(conn)
\ No newline at end of file
@@ -0,0 +1,650 @@
+"""
+Motor colunar (opcional) para os agregados do dashboard
+Carrega as colunas de Avaliacao usadas pelo dashboard em arrays NumPy,
+aplica as escritas depois de cada commit e responde alguns painéis com
+agrupamentos vetorizados, sem ida ao banco
+
+Ativado com DB_COLUNAR=1 (exige `pip install numpy`). Memória limitada por
+DB_COLUNAR_MEMORIA_MB; conferência periódica com o SQL a cada
+DB_COLUNAR_VERIFICAR_S segundos.
+
+As datas relativas (CURRENT_DATE, NOW()) usam o relógio local do servidor
+da aplicação, que deve estar no mesmo fuso do banco.
+"""
+import datetime
+import os
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from backend.config.database import Database
+
+_EPOCA = datetime.date(1970, 1, 1)
+
+# Marcadores de ausência (NULL) nas colunas inteiras
+_SEM_DATA = -2 ** 31
+_SEM_RATING = -1
+_SEM_SETOR = -1
+
+# Nomes do TO_CHAR(..., 'Mon') do PostgreSQL
+_MESES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Colunas por avaliação: (nome, tipo NumPy)
+_COLUNAS = (
+    ('cod', 'int64'),
+    ('dia', 'int32'),          # dias desde 1970-01-01 (DATE(data_completa))
+    ('instante', 'float64'),   # data_completa em segundos (NaN se nula)
+    ('rating', 'int16'),
+    ('avaliado', 'int32'),     # índice do CPF em _Tabela.cpfs
+    ('avaliador', 'int32'),
+    ('questionario', 'int32'),
+    ('setor', 'int32'),        # índice em _Tabela.setores (setor do avaliado)
+    ('valido', 'bool'),        # False = removida, aguardando compactação
+)
+
+_CONSULTA_CARGA = """
+    SELECT
+        a.cod_avaliacao,
+        DATE(a.data_completa) AS dia,
+        EXTRACT(EPOCH FROM a.data_completa)::FLOAT8 AS instante,
+        a.rating_geral,
+        a.avaliado_cpf,
+        a.avaliador_cpf,
+        a.questionario_cod,
+        f.setor
+    FROM Avaliacao a
+    JOIN Funcionario f ON f.cpf = a.avaliado_cpf
+    ORDER BY a.cod_avaliacao
+"""
+
+_CONSULTA_CONFERENCIA = """
+    SELECT
+        COUNT(*) AS total,
+        COUNT(a.rating_geral) AS concluidas,
+        COALESCE(SUM(a.rating_geral), 0)::BIGINT AS soma_rating,
+        COALESCE(SUM(a.cod_avaliacao), 0)::BIGINT AS soma_cod,
+        COALESCE(SUM(a.questionario_cod), 0)::BIGINT AS soma_questionario,
+        COALESCE(SUM(DATE(a.data_completa) - DATE '1970-01-01'), 0)::BIGINT AS soma_dia,
+        COALESCE(SUM(LENGTH(f.setor)), 0)::BIGINT AS soma_setor
+    FROM Avaliacao a
+    JOIN Funcionario f ON f.cpf = a.avaliado_cpf
+"""
+
+
+class MemoriaInsuficiente(Exception):
+    """As colunas passariam de DB_COLUNAR_MEMORIA_MB"""
+
+
+def _env_float(nome, padrao):
+    valor = os.getenv(nome)
+    return float(valor) if valor not in (None, '') else padrao
+
+
+def _dia(data):
+    if data is None:
+        return _SEM_DATA
+    if isinstance(data, str):
+        data = datetime.date.fromisoformat(data)
+    return (data - _EPOCA).days
+
+
+def _data(dia):
+    return _EPOCA + datetime.timedelta(days=int(dia))
+
+
+def _anos_atras(data, anos):
+    """data - anos (29/02 vira 28/02, como no PostgreSQL)"""
+    try:
+        return data.replace(year=data.year - anos)
+    except ValueError:
+        return data.replace(year=data.year - anos, day=28)
+
+
+class _Tabela:
+    """
+    Colunas de Avaliacao ordenadas por cod, com crescimento amortizado
+
+    As consultas leem uma visão publicada (somente leitura) que pode
+    compartilhar os arrays da tabela. Escritas que mudariam linhas visíveis
+    trocam antes os arrays por cópias (copy-on-write); acréscimos no fim
+    escrevem além das linhas publicadas e não copiam nada.
+    """
+
+    def __init__(self, capacidade, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.n = 0
+        self.removidas = 0
+        self.cpfs = {}
+        self.setores = []
+        self._indice_setor = {}
+        self.colunas = {}
+        # Visão publicada (colunas, setores) e se ela usa os arrays atuais
+        self._publicada = None
+        self._compartilhada = False
+        self._alocar(max(capacidade, 1024))
+
+    def _alocar(self, capacidade):
+        bytes_necessarios = sum(np.dtype(tipo).itemsize for _, tipo in _COLUNAS) * capacidade
+        if bytes_necessarios > self.limite_bytes:
+            raise MemoriaInsuficiente(
+                f"{capacidade} linhas exigem {bytes_necessarios / 2 ** 20:.1f} MB "
+                f"(limite {self.limite_bytes / 2 ** 20:.1f} MB)"
+            )
+        novas = {nome: np.zeros(capacidade, dtype=tipo) for nome, tipo in _COLUNAS}
+        for nome, coluna in self.colunas.items():
+            novas[nome][:self.n] = coluna[:self.n]
+        self.colunas = novas
+        self.capacidade = capacidade
+        self._compartilhada = False
+
+    def _alterar(self):
+        """Chamado antes de escrever em linhas já publicadas"""
+        if self._compartilhada:
+            self.colunas = {nome: coluna.copy() for nome, coluna in self.colunas.items()}
+            self._compartilhada = False
+        self._publicada = None
+
+    def nbytes(self):
+        return sum(coluna.nbytes for coluna in self.colunas.values())
+
+    def _codigo_cpf(self, cpf):
+        codigo = self.cpfs.get(cpf)
+        if codigo is None:
+            codigo = self.cpfs[cpf] = len(self.cpfs)
+        return codigo
+
+    def _codigo_setor(self, setor):
+        if setor is None:
+            return _SEM_SETOR
+        codigo = self._indice_setor.get(setor)
+        if codigo is None:
+            codigo = self._indice_setor[setor] = len(self.setores)
+            self.setores.append(setor)
+        return codigo
+
+    def _valores(self, linha):
+        rating = linha.get('rating_geral')
+        instante = linha.get('instante')
+        return {
+            'cod': linha['cod_avaliacao'],
+            'dia': _dia(linha.get('dia')),
+            'instante': float(instante) if instante is not None else np.nan,
+            'rating': rating if rating is not None else _SEM_RATING,
+            'avaliado': self._codigo_cpf(linha['avaliado_cpf']),
+            'avaliador': self._codigo_cpf(linha['avaliador_cpf']),
+            'questionario': linha['questionario_cod'],
+            'setor': self._codigo_setor(linha.get('setor')),
+            'valido': True,
+        }
+
+    def anexar(self, linhas):
+        """Acrescenta linhas já ordenadas por cod, todas maiores que as atuais"""
+        if not linhas:
+            return
+        if self.n + len(linhas) > self.capacidade:
+            self._alocar(max(self.capacidade * 2, self.n + len(linhas)))
+        valores = [self._valores(linha) for linha in linhas]
+        fim = self.n + len(valores)
+        for nome, _ in _COLUNAS:
+            self.colunas[nome][self.n:fim] = [valor[nome] for valor in valores]
+        self.n = fim
+        self._publicada = None
+
+    def _posicao(self, cod):
+        cods = self.colunas['cod'][:self.n]
+        posicao = int(np.searchsorted(cods, cod))
+        if posicao < self.n and cods[posicao] == cod:
+            return posicao
+        return None
+
+    def gravar(self, linha):
+        """Insere ou substitui a avaliação `linha` (estado completo, com cod_avaliacao)"""
+        posicao = self._posicao(linha['cod_avaliacao'])
+        if posicao is None:
+            if self.n == 0 or linha['cod_avaliacao'] > self.colunas['cod'][self.n - 1]:
+                self.anexar([linha])
+                return
+            # cod fora de ordem (raro): abre espaço na posição certa
+            if self.n + 1 > self.capacidade:
+                self._alocar(self.capacidade * 2)
+            self._alterar()
+            posicao = int(np.searchsorted(self.colunas['cod'][:self.n], linha['cod_avaliacao']))
+            for coluna in self.colunas.values():
+                coluna[posicao + 1:self.n + 1] = coluna[posicao:self.n].copy()
+            self.n += 1
+        else:
+            self._alterar()
+            if not self.colunas['valido'][posicao]:
+                self.removidas -= 1
+
+        for nome, valor in self._valores(linha).items():
+            self.colunas[nome][posicao] = valor
+
+    def remover(self, cod):
+        posicao = self._posicao(cod)
+        if posicao is None or not self.colunas['valido'][posicao]:
+            return
+        self._alterar()
+        self.colunas['valido'][posicao] = False
+        self.removidas += 1
+        if self.removidas * 4 > self.n:
+            self._compactar()
+
+    def _compactar(self):
+        self._alterar()
+        manter = self.colunas['valido'][:self.n]
+        total = int(manter.sum())
+        for coluna in self.colunas.values():
+            coluna[:total] = coluna[:self.n][manter]
+        self.n = total
+        self.removidas = 0
+
+    def mudar_setor(self, cpf, setor):
+        codigo = self.cpfs.get(cpf)
+        if codigo is None:
+            return
+        alvo = self.colunas['avaliado'][:self.n] == codigo
+        if not alvo.any():
+            return
+        self._alterar()
+        self.colunas['setor'][:self.n][alvo] = self._codigo_setor(setor)
+
+    def visao(self):
+        """
+        Colunas das avaliações existentes (sem as removidas) e nomes dos setores
+
+        A mesma visão serve todas as consultas até a próxima escrita; os
+        arrays são somente leitura e não mudam depois de publicados.
+        """
+        if self._publicada is None:
+            if self.removidas == 0:
+                colunas = {nome: coluna[:self.n] for nome, coluna in self.colunas.items()}
+                self._compartilhada = True
+            else:
+                manter = self.colunas['valido'][:self.n]
+                colunas = {nome: coluna[:self.n][manter] for nome, coluna in self.colunas.items()}
+            for coluna in colunas.values():
+                coluna.flags.writeable = False
+            self._publicada = (colunas, tuple(self.setores))
+        return self._publicada
+
+
+class MotorColunar:
+
+    _lock = threading.RLock()
+    _tabela = None
+    # Escritas confirmadas durante uma carga, reaplicadas ao fim dela
+    _pendentes = None
+    _thread = None
+    _estatisticas = {'consultas': 0, 'cargas': 0, 'verificacoes': 0, 'divergencias': 0}
+    _ultima_verificacao = None
+
+    @staticmethod
+    def habilitado():
+        return os.getenv('DB_COLUNAR', '').lower() in ('1', 'true', 'sim') and np is not None
+
+    @staticmethod
+    def ativo():
+        """Se as colunas estão carregadas e respondendo consultas"""
+        return MotorColunar._tabela is not None
+
+    @staticmethod
+    def limite_bytes():
+        return int(_env_float('DB_COLUNAR_MEMORIA_MB', 256) * 2 ** 20)
+
+    @staticmethod
+    def iniciar():
+        """
+        Carrega as colunas e agenda as conferências periódicas
+
+        Sem DB_COLUNAR=1 (ou sem NumPy) não faz nada e o dashboard segue
+        consultando o PostgreSQL.
+        """
+        if os.getenv('DB_COLUNAR', '').lower() not in ('1', 'true', 'sim'):
+            return
+        if np is None:
+            print("[AVISO] DB_COLUNAR ativo, mas o pacote numpy não está instalado; "
+                  "o dashboard continua consultando o banco")
+            return
+
+        try:
+            MotorColunar.carregar()
+        except Exception as error:
+            print(f"[AVISO] Motor colunar indisponível, dashboard consultará o banco: {error}")
+
+        intervalo = _env_float('DB_COLUNAR_VERIFICAR_S', 600)
+        if intervalo <= 0 or MotorColunar._thread is not None:
+            return
+
+        def executar():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    MotorColunar.verificar()
+                except Exception as error:
+                    print(f"[ERRO] Erro na conferência do motor colunar: {error}")
+
+        MotorColunar._thread = threading.Thread(target=executar, name='conferencia-colunar', daemon=True)
+        MotorColunar._thread.start()
+
+    @staticmethod
+    def carregar():
+        """
+        (Re)carrega as colunas a partir do banco
+
+        Escritas confirmadas durante a carga são guardadas e reaplicadas no
+        fim (cada uma traz o estado completo da linha, então reaplicar uma
+        que já estava na leitura não muda nada).
+
+        Returns:
+            bool: se as colunas couberam no limite de memória
+        """
+        with MotorColunar._lock:
+            MotorColunar._pendentes = []
+
+        try:
+            with Database.transaction() as tx:
+                total = tx.fetch_value("SELECT COUNT(*) FROM Avaliacao") or 0
+                tabela = _Tabela(int(total * 1.25), MotorColunar.limite_bytes())
+                lote = []
+                for linha in tx.iter_rows(_CONSULTA_CARGA, origem_query='MotorColunar.carregar'):
+                    lote.append(linha)
+                    if len(lote) >= 10000:
+                        tabela.anexar(lote)
+                        lote = []
+                tabela.anexar(lote)
+        except MemoriaInsuficiente as error:
+            with MotorColunar._lock:
+                MotorColunar._pendentes = None
+                MotorColunar._tabela = None
+            print(f"[AVISO] Motor colunar desativado: {error}")
+            return False
+        except Exception:
+            with MotorColunar._lock:
+                MotorColunar._pendentes = None
+            raise
+
+        with MotorColunar._lock:
+            try:
+                for evento in MotorColunar._pendentes:
+                    MotorColunar._executar_evento(tabela, evento)
+            except MemoriaInsuficiente as error:
+                MotorColunar._pendentes = None
+                MotorColunar._tabela = None
+                print(f"[AVISO] Motor colunar desativado: {error}")
+                return False
+            MotorColunar._pendentes = None
+            MotorColunar._tabela = tabela
+            MotorColunar._estatisticas['cargas'] += 1
+
+        print(f"[OK] Motor colunar carregado: {tabela.n} avaliações, {tabela.nbytes() / 2 ** 20:.1f} MB")
+        return True
+
+    @staticmethod
+    def registrar(tx, anterior=None, atual=None):
+        """
+        Agenda a escrita em Avaliacao para depois do commit de `tx`
+
+        Args:
+            anterior, atual (dict): estados com cod_avaliacao, dia, instante,
+                rating_geral, avaliado_cpf, avaliador_cpf, questionario_cod
+                e setor; atual=None remove a avaliação
+        """
+        if MotorColunar._tabela is None and MotorColunar._pendentes is None:
+            return
+        if atual is not None:
+            evento = ('gravar', dict(atual))
+        elif anterior is not None:
+            evento = ('remover', anterior['cod_avaliacao'])
+        else:
+            return
+        tx.apos_commit(lambda: MotorColunar._aplicar(evento))
+
+    @staticmethod
+    def mudar_setor(tx, cpf, setor):
+        """Agenda a troca de setor de um funcionário para depois do commit"""
+        if MotorColunar._tabela is None and MotorColunar._pendentes is None:
+            return
+        tx.apos_commit(lambda: MotorColunar._aplicar(('setor', (cpf, setor))))
+
+    @staticmethod
+    def _aplicar(evento):
+        with MotorColunar._lock:
+            if MotorColunar._pendentes is not None:
+                MotorColunar._pendentes.append(evento)
+            if MotorColunar._tabela is None:
+                return
+            try:
+                MotorColunar._executar_evento(MotorColunar._tabela, evento)
+            except MemoriaInsuficiente as error:
+                MotorColunar._tabela = None
+                print(f"[AVISO] Motor colunar desativado: {error}")
+
+    @staticmethod
+    def _executar_evento(tabela, evento):
+        tipo, dados = evento
+        if tipo == 'gravar':
+            tabela.gravar(dados)
+        elif tipo == 'remover':
+            tabela.remover(dados)
+        else:
+            tabela.mudar_setor(*dados)
+
+    @staticmethod
+    def verificar():
+        """
+        Confere as colunas com o banco (totais e somas de controle) e
+        recarrega se houver divergência
+
+        Returns:
+            dict: campos divergentes {campo: (motor, banco)}
+        """
+        if MotorColunar._tabela is None:
+            return {}
+        with Database.transaction() as tx:
+            banco = tx.fetch_one(_CONSULTA_CONFERENCIA)
+
+        with MotorColunar._lock:
+            tabela = MotorColunar._tabela
+            if tabela is None:
+                return {}
+            v, setores = tabela.visao()
+            concluidas = v['rating'] != _SEM_RATING
+            com_data = v['dia'] != _SEM_DATA
+            comprimentos = np.array([len(setor) for setor in setores] + [0], dtype=np.int64)
+            motor = {
+                'total': len(v['cod']),
+                'concluidas': int(concluidas.sum()),
+                'soma_rating': int(v['rating'][concluidas].astype(np.int64).sum()),
+                'soma_cod': int(v['cod'].sum()),
+                'soma_questionario': int(v['questionario'].astype(np.int64).sum()),
+                'soma_dia': int(v['dia'][com_data].astype(np.int64).sum()),
+                'soma_setor': int(comprimentos[v['setor']].sum()),
+            }
+            MotorColunar._estatisticas['verificacoes'] += 1
+            MotorColunar._ultima_verificacao = datetime.datetime.now().isoformat(timespec='seconds')
+
+        divergencias = {
+            campo: (valor, int(banco[campo])) for campo, valor in motor.items() if valor != int(banco[campo])
+        }
+        if divergencias:
+            MotorColunar._estatisticas['divergencias'] += 1
+            print(f"[AVISO] Motor colunar divergente do banco, recarregando: {divergencias}")
+            MotorColunar.carregar()
+        return divergencias
+
+    @staticmethod
+    def estatisticas():
+        with MotorColunar._lock:
+            tabela = MotorColunar._tabela
+            dados = dict(MotorColunar._estatisticas)
+            dados.update({
+                'habilitado': MotorColunar.habilitado(),
+                'ativo': tabela is not None,
+                'linhas': (tabela.n - tabela.removidas) if tabela else 0,
+                'capacidade': tabela.capacidade if tabela else 0,
+                'bytes': tabela.nbytes() if tabela else 0,
+                'limite_bytes': MotorColunar.limite_bytes(),
+                'ultima_verificacao': MotorColunar._ultima_verificacao,
+            })
+        return dados
+
+    # ==========================================
+    # CONSULTAS (mesmo formato das do DashboardModel; None = use o banco,
+    # como nas chamadas com filtros, respondidas pelo cubo)
+    # ==========================================
+
+    @staticmethod
+    def _visao():
+        with MotorColunar._lock:
+            tabela = MotorColunar._tabela
+            if tabela is None:
+                return None, None
+            MotorColunar._estatisticas['consultas'] += 1
+            # Sem cópia: a visão publicada não muda (ver _Tabela)
+            return tabela.visao()
+
+    @staticmethod
+    def metricas_status(filtros=None):
+        if filtros:
+            return None
+        v, _ = MotorColunar._visao()
+        if v is None:
+            return None
+        concluidas = v['rating'] != _SEM_RATING
+        pendentes = ~concluidas & (v['instante'] < time.time() - 7 * 86400)
+        return [{
+            'concluidas': int(concluidas.sum()),
+            'pendentes': int(pendentes.sum()),
+            'em_andamento': int((~concluidas & ~pendentes).sum()),
+            'total': len(v['cod']),
+        }]
+
+    @staticmethod
+    def avaliacoes_por_setor(filtros=None):
+        if filtros:
+            return None
+        v, setores = MotorColunar._visao()
+        if v is None:
+            return None
+        com_setor = v['setor'] != _SEM_SETOR
+        setor = v['setor'][com_setor]
+        rating = v['rating'][com_setor]
+        concluidas = rating != _SEM_RATING
+
+        totais = np.bincount(setor, minlength=len(setores))
+        qtd_concluidas = np.bincount(setor[concluidas], minlength=len(setores))
+        somas = np.bincount(setor[concluidas], weights=rating[concluidas], minlength=len(setores))
+
+        linhas = []
+        for codigo in np.flatnonzero(totais):
+            total, feitas = int(totais[codigo]), int(qtd_concluidas[codigo])
+            media = None
+            if feitas:
+                media = (Decimal(int(somas[codigo])) / Decimal(feitas)).quantize(
+                    Decimal('0.01'), rounding=ROUND_HALF_UP
+                )
+            linhas.append({
+                'departamento': setores[codigo],
+                'total': total,
+                'concluidas': feitas,
+                'pendentes': total - feitas,
+                'pontuacao_media': media,
+            })
+        linhas.sort(key=lambda linha: (-(linha['pontuacao_media'] or 0), -linha['total']))
+        return linhas
+
+    @staticmethod
+    def pontos_por_data(data_inicial=None, data_final=None, limite_dias=None,
+                        granularidade='dia', max_pontos=None, filtros=None):
+        if filtros or granularidade not in ('dia', 'semana', 'mes'):
+            return None
+        v, _ = MotorColunar._visao()
+        if v is None:
+            return None
+
+        filtro = (v['rating'] != _SEM_RATING) & (v['dia'] != _SEM_DATA)
+        if data_inicial or data_final:
+            if data_inicial:
+                filtro &= v['dia'] >= _dia(data_inicial)
+            if data_final:
+                filtro &= v['dia'] <= _dia(data_final)
+        elif limite_dias:
+            filtro &= v['dia'] >= _dia(datetime.date.today()) - limite_dias
+
+        dias = v['dia'][filtro].astype(np.int64)
+        if granularidade == 'semana':
+            # 1970-01-01 foi quinta-feira; semanas começam na segunda
+            dias = dias - (dias + 3) % 7
+        elif granularidade == 'mes':
+            dias = dias.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+        periodos, grupo = np.unique(dias, return_inverse=True)
+        pontos = np.bincount(grupo, weights=v['rating'][filtro], minlength=len(periodos))
+        quantidades = np.bincount(grupo, minlength=len(periodos))
+        formato = '%m/%Y' if granularidade == 'mes' else '%d/%m/%Y'
+
+        linhas = []
+        for indice, periodo in enumerate(periodos):
+            data = _data(periodo)
+            linhas.append({
+                'data': data.isoformat(),
+                'data_formatada': data.strftime(formato),
+                'total_pontos': int(pontos[indice]),
+                'total_avaliacoes': int(quantidades[indice]),
+            })
+        return linhas
+
+    @staticmethod
+    def _meses(v):
+        """Mês (contado desde 1970-01) de cada avaliação com data"""
+        com_data = v['dia'] != _SEM_DATA
+        meses = v['dia'][com_data].astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+        return meses, v['dia'][com_data]
+
+    @staticmethod
+    def avaliacoes_por_mes(limite_meses=6, filtros=None):
+        if filtros:
+            return None
+        v, _ = MotorColunar._visao()
+        if v is None:
+            return None
+        hoje = datetime.date.today()
+        atual = (hoje.year - 1970) * 12 + hoje.month - 1
+        primeiro = atual - limite_meses + 1
+
+        meses, _ = MotorColunar._meses(v)
+        meses = meses[(meses >= primeiro) & (meses <= atual)]
+        contagem = np.bincount(meses - primeiro, minlength=max(limite_meses, 0))
+        return [
+            {'mes': _MESES[(primeiro + indice) % 12], 'valor': int(contagem[indice])}
+            for indice in range(max(limite_meses, 0))
+        ]
+
+    @staticmethod
+    def avaliacoes_por_tempo(anos=2, filtros=None):
+        if filtros:
+            return None
+        v, _ = MotorColunar._visao()
+        if v is None:
+            return None
+        desde = _dia(_anos_atras(datetime.date.today(), anos))
+        meses, dias = MotorColunar._meses(v)
+        periodos, contagem = np.unique(meses[dias >= desde], return_counts=True)
+
+        linhas = []
+        for periodo, total in zip(periodos, contagem):
+            ano, mes = 1970 + int(periodo) // 12, int(periodo) % 12 + 1
+            linhas.append({
+                'periodo': f'{ano:04d}-{mes:02d}',
+                'periodo_formatado': f'{_MESES[mes - 1]} {ano:04d}',
+                'ano': ano,
+                'mes': mes,
+                'total': int(total),
+            })
+        return linhas
@@ -0,0 +1,235 @@
+"""
+Contadores mantidos pela aplicação
+Guardam os totais de estatisticas_gerais, atualizados nas mesmas transações
+que alteram Questao, Questionario, Funcionario e Avaliacao
+"""
+import os
+import threading
+import time
+
+from backend.config.cache import invalidar_apos_commit
+from backend.config.database import Database
+
+# Condições que cada contador conta, por tabela de origem
+_REGRAS = {
+    'Questao': (
+        ('perguntas_cadastradas', lambda linha: linha.get('status') == 'Ativo'),
+    ),
+    'Questionario': (
+        ('formularios_ativos', lambda linha: linha.get('status') == 'Ativo'),
+    ),
+    'Funcionario': (
+        ('funcionarios_ativos', lambda linha: linha.get('status') == 'Ativo'),
+    ),
+    'Avaliacao': (
+        ('avaliacoes_pendentes', lambda linha: linha.get('rating_geral') is None),
+        ('avaliacoes_concluidas', lambda linha: linha.get('rating_geral') is not None),
+    ),
+}
+
+# Valores corretos, calculados do zero (usados na reconciliação)
+_CONSULTA_VALORES_REAIS = """
+    SELECT 'perguntas_cadastradas' AS nome, COUNT(*) AS valor FROM Questao WHERE status = 'Ativo'
+    UNION ALL
+    SELECT 'formularios_ativos', COUNT(*) FROM Questionario WHERE status = 'Ativo'
+    UNION ALL
+    SELECT 'avaliacoes_pendentes', COUNT(*) FROM Avaliacao WHERE rating_geral IS NULL
+    UNION ALL
+    SELECT 'avaliacoes_concluidas', COUNT(*) FROM Avaliacao WHERE rating_geral IS NOT NULL
+    UNION ALL
+    SELECT 'funcionarios_ativos', COUNT(*) FROM Funcionario WHERE status = 'Ativo'
+    UNION ALL
+    SELECT 'avaliadores_ativos', COUNT(*) FROM Contador_Avaliador
+"""
+
+
+class ContadoresModel:
+
+    # Só depois da primeira reconciliação os contadores são confiáveis
+    pronto = False
+
+    _thread = None
+
+    @staticmethod
+    def registrar(tx, tabela, anterior=None, atual=None):
+        """
+        Atualiza os contadores após uma escrita em `tabela`, na mesma transação
+
+        Args:
+            tx: transação onde a escrita foi feita
+            tabela (str): 'Questao', 'Questionario', 'Funcionario' ou 'Avaliacao'
+            anterior (dict): linha antes da escrita (None em inserções)
+            atual (dict): linha depois da escrita (None em exclusões); campos
+                ausentes são considerados inalterados
+        """
+        if anterior is not None and atual is not None:
+            atual = dict(anterior, **atual)
+        ContadoresModel.registrar_lote(tx, tabela, [(anterior, atual)])
+
+    @staticmethod
+    def registrar_lote(tx, tabela, alteracoes):
+        """Como registrar, para um iterável de pares (anterior, atual)"""
+        deltas = {}
+        avaliadores = []
+
+        for anterior, atual in alteracoes:
+            for nome, conta in _REGRAS[tabela]:
+                delta = (1 if atual is not None and conta(atual) else 0) - \
+                        (1 if anterior is not None and conta(anterior) else 0)
+                if delta:
+                    deltas[nome] = deltas.get(nome, 0) + delta
+
+            if tabela == 'Avaliacao':
+                cpf_anterior = anterior.get('avaliador_cpf') if anterior else None
+                cpf_atual = atual.get('avaliador_cpf') if atual else None
+                if cpf_anterior != cpf_atual:
+                    if cpf_anterior:
+                        avaliadores.append((cpf_anterior, -1))
+                    if cpf_atual:
+                        avaliadores.append((cpf_atual, 1))
+
+        for cpf, delta in sorted(avaliadores):
+            mudanca = ContadoresModel._ajustar_avaliador(tx, cpf, delta)
+            if mudanca:
+                deltas['avaliadores_ativos'] = deltas.get('avaliadores_ativos', 0) + mudanca
+
+        ContadoresModel._aplicar(tx, deltas)
+
+    @staticmethod
+    def _ajustar_avaliador(tx, cpf, delta):
+        """
+        Ajusta o total de avaliações do avaliador
+
+        Returns:
+            int: +1 se ele passou a ter avaliações, -1 se deixou de ter, 0 caso contrário
+        """
+        if delta > 0:
+            total = tx.fetch_value("""
+                INSERT INTO Contador_Avaliador (avaliador_cpf, total)
+                VALUES (%s, 1)
+                ON CONFLICT (avaliador_cpf) DO UPDATE SET total = Contador_Avaliador.total + 1
+                RETURNING total
+            """, (cpf,))
+            return 1 if total == 1 else 0
+
+        total = tx.fetch_value("""
+            UPDATE Contador_Avaliador SET total = total - 1
+            WHERE avaliador_cpf = %s
+            RETURNING total
+        """, (cpf,))
+        if total is not None and total <= 0:
+            tx.execute("DELETE FROM Contador_Avaliador WHERE avaliador_cpf = %s", (cpf,))
+            return -1
+        return 0
+
+    @staticmethod
+    def _aplicar(tx, deltas):
+        deltas = {nome: delta for nome, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        # Ordem fixa: transações concorrentes bloqueiam as linhas na mesma ordem
+        nomes = sorted(deltas)
+        valores = ', '.join(['(%s, %s)'] * len(nomes))
+        params = []
+        for nome in nomes:
+            params.extend((nome, deltas[nome]))
+
+        tx.execute(f"""
+            UPDATE Contador c
+            SET valor = c.valor + d.delta
+            FROM (VALUES {valores}) AS d(nome, delta)
+            WHERE c.nome = d.nome
+        """, tuple(params))
+        invalidar_apos_commit('Contador')
+
+    @staticmethod
+    def reconciliar():
+        """
+        Recalcula os contadores do zero e corrige divergências
+
+        Bloqueia as tabelas de contadores durante o recálculo, então escritas
+        concorrentes esperam e aplicam seus ajustes sobre os valores corretos.
+
+        Returns:
+            dict: divergências corrigidas {contador: valor_real - valor_anterior}
+        """
+        with Database.transaction() as tx:
+            tx.execute("LOCK TABLE Contador, Contador_Avaliador IN EXCLUSIVE MODE")
+
+            tx.execute("DELETE FROM Contador_Avaliador")
+            tx.execute("""
+                INSERT INTO Contador_Avaliador (avaliador_cpf, total)
+                SELECT avaliador_cpf, COUNT(*)
+                FROM Avaliacao
+                WHERE avaliador_cpf IS NOT NULL
+                GROUP BY avaliador_cpf
+            """)
+
+            anteriores = {
+                linha['nome']: linha['valor']
+                for linha in tx.fetch_all("SELECT nome, valor FROM Contador")
+            }
+            reais = {
+                linha['nome']: linha['valor']
+                for linha in tx.fetch_all(_CONSULTA_VALORES_REAIS)
+            }
+
+            divergencias = {
+                nome: valor - anteriores.get(nome, 0)
+                for nome, valor in reais.items()
+                if anteriores.get(nome) != valor
+            }
+            if divergencias:
+                tx.execute_many("""
+                    INSERT INTO Contador (nome, valor) VALUES (%s, %s)
+                    ON CONFLICT (nome) DO UPDATE SET valor = EXCLUDED.valor
+                """, [(nome, reais[nome]) for nome in sorted(divergencias)])
+                invalidar_apos_commit('Contador')
+
+        if divergencias and ContadoresModel.pronto:
+            print(f"[AVISO] Contadores corrigidos na reconciliação: {divergencias}")
+        ContadoresModel.pronto = True
+        return divergencias
+
+    @staticmethod
+    def iniciar_reconciliacao():
+        """
+        Reconcilia uma vez agora e agenda reconciliações periódicas
+
+        O intervalo vem de DB_CONTADORES_RECONCILIAR_S (segundos; padrão 3600,
+        0 desativa as periódicas). Se as tabelas de contadores não existirem,
+        estatisticas_gerais continua contando direto nas tabelas.
+        """
+        try:
+            ContadoresModel.reconciliar()
+        except Exception as error:
+            print(f"[AVISO] Contadores indisponíveis, estatísticas serão calculadas nas tabelas: {error}")
+            return
+
+        valor = os.getenv('DB_CONTADORES_RECONCILIAR_S')
+        intervalo = float(valor) if valor not in (None, '') else 3600.0
+        if intervalo <= 0 or ContadoresModel._thread is not None:
+            return
+
+        def executar():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    ContadoresModel.reconciliar()
+                except Exception as error:
+                    print(f"[ERRO] Erro na reconciliação dos contadores: {error}")
+
+        ContadoresModel._thread = threading.Thread(
+            target=executar, name='reconciliacao-contadores', daemon=True
+        )
+        ContadoresModel._thread.start()
+
+    @staticmethod
+    def valores():
+        """Todos os contadores (lidos diretamente, sem recalcular)"""
+        with Database.read_transaction() as tx:
+            return {
+                linha['nome']: linha['valor']
+                for linha in tx.fetch_all("SELECT nome, valor FROM Contador ORDER BY nome")
+            }
@@ -1,184 +1,366 @@
 """
 Módulo de queries SQL para Dashboard
 Adaptado para o novo schema
+
+Os resultados ficam em cache (ttl em segundos) e são invalidados quando as
+tabelas listadas em `tabelas` recebem escrita
+"""
+import datetime
+
+from backend.config.consultas import consulta, derivada
+from backend.config.notificacoes import CANAL_ATIVIDADES
+from backend.models.avaliacoes_diarias import AvaliacoesDiariasModel
+from backend.models.colunar import MotorColunar
+from backend.models.contadores import ContadoresModel
+from backend.models.respostas_frequencia import RespostasFrequenciaModel
+from backend.models.series import lttb
+
+# Status (simulados) das avaliações: campo de metricas_status, rótulo no
+# dashboard, rótulo em AvaliacoesModel.contar_por_status e cor, na ordem de exibição
+STATUS_AVALIACAO = (
+    ('concluidas', 'Concluídas', 'Concluída', '#4caf50'),
+    ('pendentes', 'Pendentes', 'Pendente', '#ff9800'),
+    ('em_andamento', 'Em Andamento', 'Em Andamento', '#2196f3'),
+)
+
+# Uma atividade por avaliação (tempo e cursor são montados em formatar_atividade)
+_SELECT_ATIVIDADES = """
+    SELECT 
+        'avaliacao' AS tipo,
+        a.cod_avaliacao AS id,
+        'Avaliação ' || CASE 
+            WHEN a.rating_geral IS NOT NULL THEN 'concluída'
+            ELSE 'realizada'
+        END AS titulo,
+        f.nome || ' - ' || q.nome AS descricao,
+        a.data_completa AS data,
+        CASE 
+            WHEN a.rating_geral IS NOT NULL THEN '#4caf50'
+            ELSE '#2196f3'
+        END AS cor
+    FROM Avaliacao a
+    JOIN Funcionario f ON a.avaliado_cpf = f.cpf
+    JOIN Questionario q ON a.questionario_cod = q.cod_questionario
 """
-from backend.config.database import execute_query
+
+# Períodos aceitos em pontos_por_data: expressão do início do período e
+# formato de data_formatada
+GRANULARIDADES = {
+    'dia': ("diaria.dia", 'DD/MM/YYYY'),
+    'semana': ("DATE_TRUNC('week', diaria.dia)::DATE", 'DD/MM/YYYY'),
+    'mes': ("DATE_TRUNC('month', diaria.dia)::DATE", 'MM/YYYY'),
+}
+
+
+def _reduzir_pontos(linhas, max_pontos=None, **_):
+    if not max_pontos:
+        return linhas
+    return lttb(
+        linhas, max_pontos,
+        x=lambda linha: datetime.date.fromisoformat(linha['data']).toordinal(),
+        y=lambda linha: linha['total_pontos']
+    )
+
+
+
+def tempo_relativo(data, agora=None):
+    """'Há alguns minutos', 'Há N horas' ou 'Há N dias' desde `data`"""
+    decorrido = (agora or datetime.datetime.now(datetime.timezone.utc)) - data
+    if decorrido < datetime.timedelta(hours=1):
+        return 'Há alguns minutos'
+    if decorrido < datetime.timedelta(days=1):
+        return f'Há {int(decorrido.total_seconds() // 3600)} horas'
+    return f'Há {decorrido.days} dias'
+
+
+def cursor_atividade(atividade):
+    """Cursor da atividade para ?antes=: data em UTC e id, separados por vírgula"""
+    data = atividade['data'].astimezone(datetime.timezone.utc)
+    return f"{data.strftime('%Y-%m-%dT%H:%M:%S.%fZ')},{atividade['id']}"
+
+
+def ler_cursor(texto):
+    """
+    Converte o cursor de ?antes= em (data, id)
+    
+    Raises:
+        ValueError: se o texto não for um cursor válido
+    """
+    data, _, identificador = texto.strip().rpartition(',')
+    data = datetime.datetime.fromisoformat(data)
+    if data.tzinfo is None:
+        data = data.replace(tzinfo=datetime.timezone.utc)
+    return data, int(identificador)
+
+
+def formatar_atividade(atividade, agora=None):
+    """
+    Completa a atividade com `tempo` e `cursor`
+    
+    Aceita também a atividade vinda de uma notificação, com a data em texto
+    ISO 8601 (row_to_json), que é convertida para datetime.
+    """
+    if isinstance(atividade['data'], str):
+        atividade['data'] = datetime.datetime.fromisoformat(atividade['data'])
+    atividade['tempo'] = tempo_relativo(atividade['data'], agora)
+    atividade['cursor'] = cursor_atividade(atividade)
+    return atividade
+
+
+def _formatar_atividades(linhas, **_):
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    return [formatar_atividade(linha, agora) for linha in linhas]
+
 
 class DashboardModel:
     
     @staticmethod
-    def estatisticas_gerais():
-        """Retorna estatísticas gerais do sistema"""
+    @consulta(unica=True, ttl=30,
+              tabelas=('Contador', 'Questao', 'Questionario', 'Avaliacao', 'Avaliacao_Diaria', 'Funcionario'))
+    def estatisticas_gerais(filtros=None):
+        """
+        Retorna estatísticas gerais do sistema
+        
+        Lê a tabela Contador (uma linha por total, mantida a cada escrita);
+        enquanto os contadores não foram reconciliados, conta nas tabelas.
+        Com `filtros` (ver Filtros), os totais de avaliações e avaliadores
+        vêm do cubo de avaliações
+        """
+        query = DashboardModel._query_estatisticas()
+        if not filtros:
+            return query, None
+        
+        fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+        query = f"""
+            SELECT 
+                base.perguntas_cadastradas,
+                base.formularios_ativos,
+                cubo.avaliacoes_pendentes,
+                cubo.avaliacoes_concluidas,
+                base.funcionarios_ativos,
+                cubo.avaliadores_ativos
+            FROM ({query}) base
+            CROSS JOIN (
+                SELECT 
+                    COALESCE(SUM(diaria.total - diaria.concluidas), 0) AS avaliacoes_pendentes,
+                    COALESCE(SUM(diaria.concluidas), 0) AS avaliacoes_concluidas,
+                    COUNT(DISTINCT diaria.avaliador_cpf) AS avaliadores_ativos
+                FROM {fonte}
+            ) cubo
+        """
+        
+        return query, params
+    
+    @staticmethod
+    def _query_estatisticas():
+        """Consulta das estatísticas gerais sem filtros"""
+        if ContadoresModel.pronto:
+            query = """
+                SELECT 
+                    COALESCE(MAX(valor) FILTER (WHERE nome = 'perguntas_cadastradas'), 0) AS perguntas_cadastradas,
+                    COALESCE(MAX(valor) FILTER (WHERE nome = 'formularios_ativos'), 0) AS formularios_ativos,
+                    COALESCE(MAX(valor) FILTER (WHERE nome = 'avaliacoes_pendentes'), 0) AS avaliacoes_pendentes,
+                    COALESCE(MAX(valor) FILTER (WHERE nome = 'avaliacoes_concluidas'), 0) AS avaliacoes_concluidas,
+                    COALESCE(MAX(valor) FILTER (WHERE nome = 'funcionarios_ativos'), 0) AS funcionarios_ativos,
+                    COALESCE(MAX(valor) FILTER (WHERE nome = 'avaliadores_ativos'), 0) AS avaliadores_ativos
+                FROM Contador
+            """
+            return query
+        
+        # Avaliacao é lida uma vez só para os três totais que dependem dela
         query = """
             SELECT 
                 (SELECT COUNT(*) FROM Questao WHERE status = 'Ativo') AS perguntas_cadastradas,
                 (SELECT COUNT(*) FROM Questionario WHERE status = 'Ativo') AS formularios_ativos,
-                (SELECT COUNT(*) FROM Avaliacao WHERE rating_geral IS NULL) AS avaliacoes_pendentes,
-                (SELECT COUNT(*) FROM Avaliacao WHERE rating_geral IS NOT NULL) AS avaliacoes_concluidas,
+                a.avaliacoes_pendentes,
+                a.avaliacoes_concluidas,
                 (SELECT COUNT(*) FROM Funcionario WHERE status = 'Ativo') AS funcionarios_ativos,
-                (SELECT COUNT(DISTINCT avaliador_cpf) FROM Avaliacao WHERE avaliador_cpf IS NOT NULL) AS avaliadores_ativos
+                a.avaliadores_ativos
+            FROM (
+                SELECT 
+                    COUNT(*) FILTER (WHERE rating_geral IS NULL) AS avaliacoes_pendentes,
+                    COUNT(*) FILTER (WHERE rating_geral IS NOT NULL) AS avaliacoes_concluidas,
+                    COUNT(DISTINCT avaliador_cpf) AS avaliadores_ativos
+                FROM Avaliacao
+            ) a
         """
         
-        results = execute_query(query)
-        return results[0] if results else None
+        return query
     
     @staticmethod
-    def avaliacoes_por_mes(limite_meses=6):
-        """Retorna avaliações nos últimos N meses"""
-        query = """
+    @consulta(ttl=300, tabelas=('Avaliacao', 'Avaliacao_Diaria'), alternativa=MotorColunar.avaliacoes_por_mes)
+    def avaliacoes_por_mes(limite_meses=6, filtros=None):
+        """Retorna avaliações nos últimos N meses (lidas do agregado diário)"""
+        fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+        query = f"""
             WITH meses AS (
                 SELECT 
                     TO_CHAR(
                         CURRENT_DATE - (n || ' months')::INTERVAL, 
                         'Mon'
                     ) AS mes,
-                    DATE_TRUNC('month', CURRENT_DATE - (n || ' months')::INTERVAL) AS data_mes
+                    DATE_TRUNC('month', CURRENT_DATE - (n || ' months')::INTERVAL)::DATE AS data_mes
                 FROM generate_series(0, %s - 1) AS n
             )
             SELECT 
                 m.mes,
-                COALESCE(COUNT(a.cod_avaliacao), 0) AS valor
+                COALESCE(SUM(diaria.total), 0)::BIGINT AS valor
             FROM meses m
-            LEFT JOIN Avaliacao a ON 
-                DATE_TRUNC('month', a.data_completa) = m.data_mes
+            LEFT JOIN {fonte} ON 
+                diaria.dia >= m.data_mes
+                AND diaria.dia < (m.data_mes + INTERVAL '1 month')::DATE
             GROUP BY m.mes, m.data_mes
             ORDER BY m.data_mes
         """
         
-        return execute_query(query, (limite_meses,))
+        return query, (limite_meses,) + params
     
     @staticmethod
-    def pontos_por_data(data_inicial=None, data_final=None, limite_dias=None):
-        """Retorna total de pontos (rating_geral) agrupados por data"""
-        query = """
-            SELECT 
-                TO_CHAR(DATE(a.data_completa), 'YYYY-MM-DD') AS data,
-                TO_CHAR(DATE(a.data_completa), 'DD/MM/YYYY') AS data_formatada,
-                COALESCE(SUM(a.rating_geral), 0) AS total_pontos,
-                COUNT(a.cod_avaliacao) AS total_avaliacoes
-            FROM Avaliacao a
-            WHERE a.rating_geral IS NOT NULL
+    @consulta(ttl=120, tabelas=('Avaliacao', 'Avaliacao_Diaria'), depois=_reduzir_pontos,
+              alternativa=MotorColunar.pontos_por_data)
+    def pontos_por_data(data_inicial=None, data_final=None, limite_dias=None,
+                        granularidade='dia', max_pontos=None, filtros=None):
         """
+        Retorna total de pontos (rating_geral) agrupados por data (lidos do agregado diário)
         
-        params = []
+        Args:
+            granularidade (str): 'dia', 'semana' ou 'mes' (data = início do período)
+            max_pontos (int): se houver mais períodos que isso, a série é
+                reduzida com LTTB (ver series.lttb)
+        """
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+        periodo, formato = GRANULARIDADES[granularidade]
         
-        # Se data_inicial e data_final foram fornecidas, usar elas
-        if data_inicial and data_final:
-            query += " AND DATE(a.data_completa) >= %s AND DATE(a.data_completa) <= %s"
-            params.extend([data_inicial, data_final])
-        elif data_inicial:
-            query += " AND DATE(a.data_completa) >= %s"
-            params.append(data_inicial)
-        elif data_final:
-            query += " AND DATE(a.data_completa) <= %s"
-            params.append(data_final)
-        elif limite_dias:
-            # Se não há datas específicas mas há limite de dias, usar limite
-            query += " AND a.data_completa >= CURRENT_DATE - (INTERVAL '1 day' * %s)"
-            params.append(limite_dias)
-        # Se nenhum filtro foi fornecido, buscar todos os dados
+        # Se data_inicial e/ou data_final foram fornecidas, usar elas; senão o
+        # limite de dias; sem nenhum filtro, buscar todos os dados
+        if data_inicial or data_final:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(
+                desde=data_inicial, ate=data_final, filtros=filtros
+            )
+        else:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(ultimos_dias=limite_dias, filtros=filtros)
         
-        query += """
-            GROUP BY DATE(a.data_completa)
-            ORDER BY DATE(a.data_completa) ASC
+        query = f"""
+            SELECT 
+                TO_CHAR({periodo}, 'YYYY-MM-DD') AS data,
+                TO_CHAR({periodo}, '{formato}') AS data_formatada,
+                COALESCE(SUM(diaria.soma_rating), 0)::BIGINT AS total_pontos,
+                SUM(diaria.concluidas)::BIGINT AS total_avaliacoes
+            FROM {fonte}
+            WHERE diaria.concluidas > 0
+            GROUP BY {periodo}
+            ORDER BY {periodo} ASC
         """
         
-        results = execute_query(query, tuple(params) if params else None)
-        print(f"[DEBUG] Pontos por data - data_inicial: {data_inicial}, data_final: {data_final}, limite_dias: {limite_dias}, resultados: {len(results) if results else 0}")
-        if results and len(results) > 0:
-            print(f"[DEBUG] Primeiro resultado: {results[0]}")
-            print(f"[DEBUG] Último resultado: {results[-1]}")
-        return results
+        return query, params or None
     
     @staticmethod
+    @consulta(ttl=300, tabelas=('Resposta', 'Resposta_Frequencia', 'Motivo_Saida_Opcao', 'Opcao'))
     def motivos_saida_principais():
-        """Retorna os principais motivos de saída com percentuais (simulado baseado em descrições)"""
-        # Como não temos mais motivos_saida, vamos criar dados fictícios baseados nas avaliações
-        query = """
-            WITH motivos_simulados AS (
-                SELECT 
-                    'Melhor Oferta' AS motivo,
-                    '#e91e63' AS cor,
-                    1 AS ordem
-                UNION ALL SELECT 'Insatisfação', '#2196f3', 2
-                UNION ALL SELECT 'Mudança de Cidade', '#4caf50', 3
-                UNION ALL SELECT 'Questões Pessoais', '#ff9800', 4
-                UNION ALL SELECT 'Outros', '#9e9e9e', 5
-            ),
-            total_avaliacoes AS (
-                SELECT COUNT(*) AS total FROM Avaliacao
-            )
+        """
+        Retorna os motivos de saída com quantidades e percentuais
+        
+        Soma o histograma de respostas pelas opções mapeadas em
+        Motivo_Saida_Opcao (ver MotivosSaidaModel): o custo depende da
+        quantidade de opções mapeadas, não da quantidade de respostas
+        """
+        query = f"""
             SELECT 
                 m.motivo,
-                m.cor,
-                CASE m.ordem
-                    WHEN 1 THEN ROUND((SELECT total * 0.35 FROM total_avaliacoes))
-                    WHEN 2 THEN ROUND((SELECT total * 0.25 FROM total_avaliacoes))
-                    WHEN 3 THEN ROUND((SELECT total * 0.20 FROM total_avaliacoes))
-                    WHEN 4 THEN ROUND((SELECT total * 0.15 FROM total_avaliacoes))
-                    ELSE ROUND((SELECT total * 0.05 FROM total_avaliacoes))
-                END AS quantidade,
-                CASE m.ordem
-                    WHEN 1 THEN 35
-                    WHEN 2 THEN 25
-                    WHEN 3 THEN 20
-                    WHEN 4 THEN 15
-                    ELSE 5
-                END AS percentual
-            FROM motivos_simulados m
-            WHERE (SELECT total FROM total_avaliacoes) > 0
-            ORDER BY quantidade DESC
+                MIN(m.cor) AS cor,
+                SUM(freq.quantidade)::BIGINT AS quantidade,
+                ROUND(SUM(freq.quantidade) * 100.0 / SUM(SUM(freq.quantidade)) OVER (), 1)::FLOAT8 AS percentual
+            FROM Motivo_Saida_Opcao m
+            JOIN {RespostasFrequenciaModel.fonte()} ON freq.opcao_cod = m.opcao_cod
+            GROUP BY m.motivo
+            HAVING SUM(freq.quantidade) > 0
+            ORDER BY quantidade DESC, m.motivo
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
-    def status_avaliacoes():
-        """Retorna distribuição de avaliações por status (simulado)"""
+    @consulta(unica=True, ttl=60, tabelas=('Avaliacao', 'Avaliacao_Diaria'), alternativa=MotorColunar.metricas_status)
+    def metricas_status(filtros=None):
+        """
+        Conta as avaliações de cada status numa única leitura de Avaliacao
+        
+        Base de status_avaliacoes, taxa_conclusao_avaliacoes e
+        AvaliacoesModel.contar_por_status (ver STATUS_AVALIACAO). Com
+        `filtros`, conta no cubo de avaliações: o limite de 7 dias entre
+        pendente e em andamento passa a ser contado em dias inteiros
+        """
+        if filtros:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+            query = f"""
+                SELECT 
+                    COALESCE(SUM(diaria.concluidas), 0) AS concluidas,
+                    COALESCE(SUM(diaria.total - diaria.concluidas) FILTER (
+                        WHERE diaria.dia < CURRENT_DATE - 7
+                    ), 0) AS pendentes,
+                    COALESCE(SUM(diaria.total - diaria.concluidas) FILTER (
+                        WHERE diaria.dia >= CURRENT_DATE - 7
+                    ), 0) AS em_andamento,
+                    COALESCE(SUM(diaria.total), 0) AS total
+                FROM {fonte}
+            """
+            return query, params
+        
         query = """
             SELECT 
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN 'Concluídas'
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN 'Pendentes'
-                    ELSE 'Em Andamento'
-                END AS status,
-                COUNT(*) AS valor,
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN '#4caf50'
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN '#ff9800'
-                    ELSE '#2196f3'
-                END AS cor
+                COUNT(*) FILTER (WHERE rating_geral IS NOT NULL) AS concluidas,
+                COUNT(*) FILTER (
+                    WHERE rating_geral IS NULL AND data_completa < NOW() - INTERVAL '7 days'
+                ) AS pendentes,
+                COUNT(*) FILTER (
+                    WHERE rating_geral IS NULL
+                      AND (data_completa >= NOW() - INTERVAL '7 days' OR data_completa IS NULL)
+                ) AS em_andamento,
+                COUNT(*) AS total
             FROM Avaliacao
-            GROUP BY 
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN 'Concluídas'
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN 'Pendentes'
-                    ELSE 'Em Andamento'
-                END,
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN '#4caf50'
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN '#ff9800'
-                    ELSE '#2196f3'
-                END
-            ORDER BY 
-                CASE 
-                    WHEN rating_geral IS NOT NULL THEN 1
-                    WHEN data_completa < NOW() - INTERVAL '7 days' THEN 2
-                    ELSE 3
-                END
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
-    def avaliacoes_por_setor():
+    @derivada(metricas_status.__func__)
+    def status_avaliacoes(metricas):
+        """Retorna distribuição de avaliações por status (simulado)"""
+        return [
+            {'status': rotulo, 'valor': metricas[campo], 'cor': cor}
+            for campo, rotulo, _, cor in STATUS_AVALIACAO
+            if metricas[campo]
+        ]
+    
+    @staticmethod
+    @consulta(ttl=120, tabelas=('Avaliacao', 'Avaliacao_Diaria', 'Funcionario'),
+              alternativa=MotorColunar.avaliacoes_por_setor)
+    def avaliacoes_por_setor(filtros=None):
         """Retorna quantidade de avaliações por setor com média de pontuação"""
+        if filtros:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+            query = f"""
+                SELECT 
+                    diaria.setor AS departamento,
+                    SUM(diaria.total) AS total,
+                    SUM(diaria.concluidas) AS concluidas,
+                    SUM(diaria.total - diaria.concluidas) AS pendentes,
+                    ROUND(SUM(diaria.soma_rating)::NUMERIC / NULLIF(SUM(diaria.concluidas), 0), 2) AS pontuacao_media
+                FROM {fonte}
+                WHERE diaria.setor <> ''
+                GROUP BY diaria.setor
+                ORDER BY COALESCE(SUM(diaria.soma_rating)::NUMERIC / NULLIF(SUM(diaria.concluidas), 0), 0) DESC,
+                         total DESC
+            """
+            return query, params
+        
         query = """
             SELECT 
                 f.setor AS departamento,
                 COUNT(a.cod_avaliacao) AS total,
                 COUNT(CASE WHEN a.rating_geral IS NOT NULL THEN 1 END) AS concluidas,
-                COUNT(CASE WHEN a.rating_geral IS NULL THEN 1 END) AS pendentes,
+                COUNT(CASE WHEN a.cod_avaliacao IS NOT NULL AND a.rating_geral IS NULL THEN 1 END) AS pendentes,
                 ROUND(AVG(a.rating_geral)::NUMERIC, 2) AS pontuacao_media
             FROM Funcionario f
             LEFT JOIN Avaliacao a ON f.cpf = a.avaliado_cpf
@@ -188,9 +370,10 @@ class DashboardModel:
             ORDER BY COALESCE(AVG(a.rating_geral), 0) DESC, total DESC
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
+    @consulta(unica=True, ttl=60, tabelas=('Avaliacao',))
     def media_ratings():
         """Calcula média dos ratings das avaliações"""
         query = """
@@ -203,90 +386,105 @@ class DashboardModel:
             WHERE rating IS NOT NULL
         """
         
-        results = execute_query(query)
-        return results[0] if results else None
+        return query, None
     
     @staticmethod
+    @consulta(ttl=120, tabelas=('Resposta', 'Resposta_Frequencia', 'Questao', 'Opcao'))
     def distribuicao_respostas_escolha():
-        """Distribuição de respostas de escolha (Modelo 2: usando opcao_cod)"""
-        query = """
+        """Distribuição de respostas de escolha (lida do histograma de respostas)"""
+        query = f"""
             SELECT 
                 q.cod_questao,
                 q.texto_questao AS pergunta,
                 o.texto_opcao AS resposta,
-                COUNT(*) AS quantidade
-            FROM Resposta r
-            JOIN Questao q ON r.questao_cod = q.cod_questao
-            JOIN Opcao o ON r.opcao_cod = o.cod_opcao
+                SUM(freq.quantidade)::BIGINT AS quantidade
+            FROM {RespostasFrequenciaModel.fonte()}
+            JOIN Questao q ON freq.questao_cod = q.cod_questao
+            JOIN Opcao o ON freq.opcao_cod = o.cod_opcao
             GROUP BY q.cod_questao, q.texto_questao, o.texto_opcao
             ORDER BY q.cod_questao, quantidade DESC
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
-    def atividades_recentes(limite=10):
-        """Retorna atividades recentes do sistema"""
-        query = """
-            WITH atividades AS (
-                (
-                    SELECT 
-                        'avaliacao' AS tipo,
-                        a.cod_avaliacao AS id,
-                        'Avaliação ' || CASE 
-                            WHEN a.rating_geral IS NOT NULL THEN 'concluída'
-                            ELSE 'realizada'
-                        END AS titulo,
-                        f.nome || ' - ' || q.nome AS descricao,
-                        a.data_completa AS data,
-                        CASE 
-                            WHEN a.rating_geral IS NOT NULL THEN '#4caf50'
-                            ELSE '#2196f3'
-                        END AS cor,
-                        CASE
-                            WHEN a.data_completa > NOW() - INTERVAL '1 hour' THEN 'Há alguns minutos'
-                            WHEN a.data_completa > NOW() - INTERVAL '1 day' THEN 
-                                'Há ' || EXTRACT(HOUR FROM (NOW() - a.data_completa))::INTEGER || ' horas'
-                            ELSE 
-                                'Há ' || EXTRACT(DAY FROM (NOW() - a.data_completa))::INTEGER || ' dias'
-                        END AS tempo
-                    FROM Avaliacao a
-                    JOIN Funcionario f ON a.avaliado_cpf = f.cpf
-                    JOIN Questionario q ON a.questionario_cod = q.cod_questionario
-                    ORDER BY a.data_completa DESC
-                    LIMIT %s
-                )
-            )
-            SELECT * FROM atividades
-            ORDER BY data DESC
+    @consulta(ttl=30, tabelas=('Avaliacao', 'Funcionario', 'Questionario'), depois=_formatar_atividades)
+    def atividades_recentes(limite=10, antes=None):
+        """
+        Retorna atividades recentes do sistema, da mais nova para a mais antiga
+        
+        Paginação por cursor: `antes` é o (data, id) da última atividade da
+        página anterior (campo `cursor` de cada item, ver ler_cursor). A
+        ordem (data_completa, cod_avaliacao) segue o índice idx_avaliacao_data,
+        então cada página lê só as linhas que devolve.
+        """
+        query = _SELECT_ATIVIDADES + " WHERE a.data_completa IS NOT NULL"
+        params = []
+        if antes is not None:
+            query += " AND (a.data_completa, a.cod_avaliacao) < (%s, %s)"
+            params.extend(antes)
+        query += """
+            ORDER BY a.data_completa DESC, a.cod_avaliacao DESC
             LIMIT %s
         """
+        params.append(limite)
         
-        return execute_query(query, (limite, limite))
+        return query, tuple(params)
     
     @staticmethod
-    def taxa_conclusao_avaliacoes():
-        """Calcula taxa de conclusão de avaliações"""
-        query = """
-            SELECT 
-                COUNT(CASE WHEN rating_geral IS NOT NULL THEN 1 END) AS concluidas,
-                COUNT(CASE WHEN rating_geral IS NULL AND data_completa < NOW() - INTERVAL '7 days' THEN 1 END) AS pendentes,
-                COUNT(CASE WHEN rating_geral IS NULL AND data_completa >= NOW() - INTERVAL '7 days' THEN 1 END) AS em_andamento,
-                COUNT(*) AS total,
-                ROUND(
-                    (COUNT(CASE WHEN rating_geral IS NOT NULL THEN 1 END)::NUMERIC / 
-                     NULLIF(COUNT(*), 0)) * 100, 
-                    1
-                ) AS taxa_conclusao
-            FROM Avaliacao
+    def notificar_atividade(tx, avaliacao_id, evento):
         """
+        Publica a atividade da avaliação no canal de notificações (ver
+        config/notificacoes.py), com o mesmo formato de atividades_recentes
+        
+        Chamado dentro da transação da escrita: o PostgreSQL só entrega a
+        mensagem depois do commit.
         
-        results = execute_query(query)
-        return results[0] if results else None
+        Args:
+            evento (str): 'criada', 'atualizada' ou 'removida' (esta só com o id)
+        """
+        if evento == 'removida':
+            tx.execute(
+                "SELECT pg_notify(%s, json_build_object('evento', %s, 'atividade', json_build_object('id', %s))::TEXT)",
+                (CANAL_ATIVIDADES, evento, avaliacao_id)
+            )
+            return
+        tx.execute(f"""
+            SELECT pg_notify(%s, json_build_object('evento', %s, 'atividade', row_to_json(atividade))::TEXT)
+            FROM ({_SELECT_ATIVIDADES} WHERE a.cod_avaliacao = %s) atividade
+        """, (CANAL_ATIVIDADES, evento, avaliacao_id))
+    
+    @staticmethod
+    @derivada(metricas_status.__func__)
+    def taxa_conclusao_avaliacoes(metricas):
+        """Calcula taxa de conclusão de avaliações"""
+        total = metricas['total']
+        return dict(
+            metricas,
+            taxa_conclusao=round(metricas['concluidas'] * 100 / total, 1) if total else None
+        )
     
     @staticmethod
-    def questionarios_mais_usados():
+    @consulta(ttl=120, tabelas=('Questionario', 'Avaliacao', 'Avaliacao_Diaria'))
+    def questionarios_mais_usados(filtros=None):
         """Retorna os questionários mais utilizados"""
+        if filtros:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+            query = f"""
+                SELECT 
+                    q.cod_questionario,
+                    q.nome,
+                    COALESCE(SUM(diaria.total), 0) AS total_usos,
+                    SUM(diaria.soma_rating)::NUMERIC / NULLIF(SUM(diaria.concluidas), 0) AS media_rating
+                FROM Questionario q
+                LEFT JOIN {fonte} ON diaria.questionario_cod = q.cod_questionario
+                WHERE q.status = 'Ativo'
+                GROUP BY q.cod_questionario, q.nome
+                ORDER BY total_usos DESC
+                LIMIT 5
+            """
+            return query, params
+        
         query = """
             SELECT 
                 q.cod_questionario,
@@ -301,11 +499,28 @@ class DashboardModel:
             LIMIT 5
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
-    def avaliacoes_por_questionario():
+    @consulta(ttl=120, tabelas=('Questionario', 'Avaliacao', 'Avaliacao_Diaria'))
+    def avaliacoes_por_questionario(filtros=None):
         """Retorna quantidade de avaliações por questionário para gráfico de pizza"""
+        if filtros:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+            query = f"""
+                SELECT 
+                    q.nome AS questionario,
+                    q.cod_questionario AS id,
+                    SUM(diaria.total) AS total
+                FROM Questionario q
+                JOIN {fonte} ON diaria.questionario_cod = q.cod_questionario
+                WHERE q.status = 'Ativo'
+                GROUP BY q.cod_questionario, q.nome
+                HAVING SUM(diaria.total) > 0
+                ORDER BY total DESC
+            """
+            return query, params
+        
         query = """
             SELECT 
                 q.nome AS questionario,
@@ -319,9 +534,10 @@ class DashboardModel:
             ORDER BY total DESC
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
+    @consulta(ttl=300, tabelas=('Funcionario',))
     def funcionarios_por_status():
         """Distribuição de funcionários por status"""
         query = """
@@ -334,9 +550,10 @@ class DashboardModel:
             ORDER BY total DESC
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
+    @consulta(ttl=600, tabelas=('Treinamento', 'Funcionario_Treinamento'))
     def treinamentos_proximos_vencimento():
         """Lista treinamentos próximos ao vencimento (30 dias)"""
         query = """
@@ -353,32 +570,48 @@ class DashboardModel:
             ORDER BY t.validade
         """
         
-        return execute_query(query)
+        return query, None
     
     @staticmethod
-    def avaliacoes_por_tempo(anos=2):
-        """Retorna avaliações por mês/ano nos últimos N anos"""
-        query = """
+    @consulta(ttl=300, tabelas=('Avaliacao', 'Avaliacao_Diaria'), alternativa=MotorColunar.avaliacoes_por_tempo)
+    def avaliacoes_por_tempo(anos=2, filtros=None):
+        """Retorna avaliações por mês/ano nos últimos N anos (lidas do agregado diário)"""
+        fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+        query = f"""
             SELECT 
-                TO_CHAR(data_completa, 'YYYY-MM') AS periodo,
-                TO_CHAR(data_completa, 'Mon YYYY') AS periodo_formatado,
-                EXTRACT(YEAR FROM data_completa)::INTEGER AS ano,
-                EXTRACT(MONTH FROM data_completa)::INTEGER AS mes,
-                COUNT(*) AS total
-            FROM Avaliacao
-            WHERE data_completa >= CURRENT_DATE - INTERVAL '%s years'
-            GROUP BY TO_CHAR(data_completa, 'YYYY-MM'), 
-                     TO_CHAR(data_completa, 'Mon YYYY'),
-                     EXTRACT(YEAR FROM data_completa),
-                     EXTRACT(MONTH FROM data_completa)
+                TO_CHAR(DATE_TRUNC('month', diaria.dia), 'YYYY-MM') AS periodo,
+                TO_CHAR(DATE_TRUNC('month', diaria.dia), 'Mon YYYY') AS periodo_formatado,
+                EXTRACT(YEAR FROM DATE_TRUNC('month', diaria.dia))::INTEGER AS ano,
+                EXTRACT(MONTH FROM DATE_TRUNC('month', diaria.dia))::INTEGER AS mes,
+                SUM(diaria.total)::BIGINT AS total
+            FROM {fonte}
+            WHERE diaria.dia >= (CURRENT_DATE - INTERVAL '1 year' * %s)::DATE
+            GROUP BY DATE_TRUNC('month', diaria.dia)
             ORDER BY ano, mes
         """
         
-        return execute_query(query, (anos,))
+        return query, params + (anos,)
     
     @staticmethod
-    def avaliacoes_por_setor_e_avaliador():
+    @consulta(ttl=120, tabelas=('Avaliacao', 'Avaliacao_Diaria', 'Funcionario'))
+    def avaliacoes_por_setor_e_avaliador(filtros=None):
         """Retorna avaliações agrupadas por setor e avaliador"""
+        if filtros:
+            fonte, params = AvaliacoesDiariasModel.fonte_periodo(filtros=filtros)
+            query = f"""
+                SELECT 
+                    diaria.setor AS setor,
+                    av.nome AS avaliador_nome,
+                    av.cpf AS avaliador_cpf,
+                    SUM(diaria.total) AS total_avaliacoes
+                FROM {fonte}
+                JOIN Funcionario av ON diaria.avaliador_cpf = av.cpf
+                WHERE diaria.setor <> ''
+                GROUP BY diaria.setor, av.nome, av.cpf
+                ORDER BY diaria.setor, total_avaliacoes DESC
+            """
+            return query, params
+        
         query = """
             SELECT 
                 f.setor AS setor,
@@ -393,4 +626,4 @@ class DashboardModel:
             ORDER BY f.setor, total_avaliacoes DESC
         """
         
-        return execute_query(query)
\ No newline at end of file
+        return query, None
\ No newline at end of file
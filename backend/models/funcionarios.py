@@ -5,7 +5,11 @@ Adaptado para o novo schema: Funcionario (sem departamentos)
 import re
 import unicodedata
 
-from backend.config.database import execute_query
+from backend.config.cache import invalidar_apos_commit
+from backend.config.database import Database, execute_query, iter_query
+from backend.models.avaliacoes_diarias import AvaliacoesDiariasModel
+from backend.models.colunar import MotorColunar
+from backend.models.contadores import ContadoresModel
 
 ACCENTED_CHARS = 'áàãâäéèêëíìîïóòõôöúùûüç'
 UNACCENTED_CHARS = 'aaaaaeeeeiiiiooooouuuuc'
@@ -21,8 +25,8 @@ class FuncionariosModel:
     """Classe com queries SQL para funcionários"""
     
     @staticmethod
-    def listar_todos(filtro_status=None, filtro_setor=None):
-        """Lista todos os funcionários com filtros opcionais"""
+    def _query_listagem(filtro_status=None, filtro_setor=None):
+        """Monta a query (e os parâmetros) da listagem de funcionários"""
         query = """
             SELECT 
                 f.cpf,
@@ -48,21 +52,24 @@ class FuncionariosModel:
         
         query += " ORDER BY f.nome"
         
-        return execute_query(query, tuple(params) if params else None)
+        return query, tuple(params) if params else None
+    
+    @staticmethod
+    def listar_todos(filtro_status=None, filtro_setor=None):
+        """Lista todos os funcionários com filtros opcionais"""
+        query, params = FuncionariosModel._query_listagem(filtro_status, filtro_setor)
+        return execute_query(query, params)
+    
+    @staticmethod
+    def iterar_todos(filtro_status=None, filtro_setor=None, itersize=None):
+        """Mesma listagem de listar_todos, gerada linha a linha (cursor do servidor)"""
+        query, params = FuncionariosModel._query_listagem(filtro_status, filtro_setor)
+        return iter_query(query, params, itersize)
     
     @staticmethod
     def listar_com_paginacao(filtro_status=None, filtro_setor=None, filtro_busca=None, page=1, per_page=20):
         """Lista funcionários com paginação"""
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
-        
-        connection = None
-        cursor = None
-        
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
             # Query base (sem JOIN com departamento por enquanto, pois a tabela pode não existir)
             base_query = """
                 FROM Funcionario f
@@ -114,41 +121,35 @@ class FuncionariosModel:
                 base_query += f" AND ({' OR '.join(search_conditions)})"
                 params.extend(search_params)
             
-            # Contar total de registros
-            count_query = f"SELECT COUNT(*) as total {base_query}"
-            cursor.execute(count_query, tuple(params) if params else None)
-            total = cursor.fetchone()['total']
-            
-            # Query com paginação
-            offset = (page - 1) * per_page
-            data_query = f"""
-                SELECT 
-                    f.cpf,
-                    f.nome,
-                    f.email,
-                    f.setor,
-                    f.ctps,
-                    f.tipo,
-                    f.status
-                {base_query}
-                ORDER BY f.nome
-                LIMIT %s OFFSET %s
-            """
-            
-            params.extend([per_page, offset])
-            cursor.execute(data_query, tuple(params))
-            funcionarios = [dict(row) for row in cursor.fetchall()]
+            with Database.read_transaction() as tx:
+                # Contar total de registros
+                count_query = f"SELECT COUNT(*) as total {base_query}"
+                total = tx.fetch_value(count_query, tuple(params) if params else None)
+                
+                # Query com paginação
+                offset = (page - 1) * per_page
+                data_query = f"""
+                    SELECT 
+                        f.cpf,
+                        f.nome,
+                        f.email,
+                        f.setor,
+                        f.ctps,
+                        f.tipo,
+                        f.status
+                    {base_query}
+                    ORDER BY f.nome
+                    LIMIT %s OFFSET %s
+                """
+                
+                params.extend([per_page, offset])
+                funcionarios = tx.fetch_all(data_query, tuple(params))
             
             return funcionarios, total
             
         except Exception as error:
             print(f"[ERRO] Erro ao listar funcionários com paginação: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def buscar_por_cpf(cpf):
@@ -177,144 +178,193 @@ class FuncionariosModel:
     @staticmethod
     def criar(nome, cpf, email, setor=None, ctps=None, tipo=None, status='Ativo'):
         """Cria um novo funcionário"""
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
+        query = """
+            INSERT INTO Funcionario 
+            (cpf, nome, email, setor, ctps, tipo, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            RETURNING cpf, nome, email, status
+        """
         
-        connection = None
-        cursor = None
+        # Garantir que status esteja no formato correto
+        status_final = status if status else 'Ativo'
+        if isinstance(status_final, str):
+            status_final = status_final.capitalize()
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            query = """
-                INSERT INTO Funcionario 
-                (cpf, nome, email, setor, ctps, tipo, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING cpf, nome, email, status
-            """
-            
-            # Garantir que status esteja no formato correto
-            status_final = status if status else 'Ativo'
-            if isinstance(status_final, str):
-                status_final = status_final.capitalize()
-            
-            cursor.execute(query, (cpf, nome, email, setor, ctps, tipo, status_final))
-            connection.commit()
-            
-            result = cursor.fetchone()
-            return [dict(result)] if result else []
+            with Database.transaction() as tx:
+                result = tx.fetch_one(query, (cpf, nome, email, setor, ctps, tipo, status_final))
+                if result:
+                    ContadoresModel.registrar(tx, 'Funcionario', atual=result)
+                    invalidar_apos_commit('Funcionario')
+            return [result] if result else []
             
         except Exception as error:
-            if connection:
-                connection.rollback()
             print(f"[ERRO] Erro ao criar funcionário: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
+    
+    @staticmethod
+    def inserir_em_lote(funcionarios):
+        """
+        Insere muitos funcionários de uma vez (COPY)
+        
+        Args:
+            funcionarios: iterável (pode ser gerador) de dicts com cpf, nome,
+                email e, opcionalmente, setor, ctps, tipo e status
+        
+        Returns:
+            int: quantidade de funcionários inseridos
+        """
+        # Status das linhas enviadas, para ajustar os contadores depois da carga
+        status_inseridos = []
+        
+        def linhas():
+            for posicao, funcionario in enumerate(funcionarios, start=1):
+                for campo in ('cpf', 'nome', 'email'):
+                    if not funcionario.get(campo):
+                        raise ValueError(f"Funcionário {posicao}: {campo} é obrigatório")
+                status = funcionario.get('status') or 'Ativo'
+                status_inseridos.append(status.capitalize() if isinstance(status, str) else status)
+                yield (
+                    funcionario['cpf'],
+                    funcionario['nome'],
+                    funcionario['email'],
+                    funcionario.get('setor'),
+                    funcionario.get('ctps'),
+                    funcionario.get('tipo', 'CLT'),
+                    status.capitalize() if isinstance(status, str) else status
+                )
+        
+        try:
+            with Database.transaction() as tx:
+                total = tx.bulk_insert(
+                    'Funcionario',
+                    ('cpf', 'nome', 'email', 'setor', 'ctps', 'tipo', 'status'),
+                    linhas()
+                )
+                ContadoresModel.registrar_lote(
+                    tx, 'Funcionario', ((None, {'status': status}) for status in status_inseridos)
+                )
+                invalidar_apos_commit('Funcionario')
+                return total
+        except Exception as error:
+            print(f"[ERRO] Erro ao inserir funcionários em lote: {error}")
+            raise
+    
+    @staticmethod
+    def vincular_treinamentos_em_lote(vinculos):
+        """
+        Vincula funcionários a treinamentos em lote
+        
+        Args:
+            vinculos: iterável de tuplas (funcionario_cpf, treinamento_cod, n_certificado)
+        
+        Returns:
+            int: quantidade de vínculos inseridos
+        """
+        try:
+            with Database.transaction() as tx:
+                total = tx.bulk_insert(
+                    'Funcionario_Treinamento',
+                    ('funcionario_cpf', 'treinamento_cod', 'n_certificado'),
+                    vinculos
+                )
+                invalidar_apos_commit('Funcionario_Treinamento')
+                return total
+        except Exception as error:
+            print(f"[ERRO] Erro ao vincular treinamentos em lote: {error}")
+            raise
     
     @staticmethod
     def atualizar(cpf, **campos):
         """Atualiza um funcionário"""
-        from backend.config.database import get_db_connection, Database
-        from psycopg2.extras import RealDictCursor
-        
         campos_update = []
         params = []
         
         campos_permitidos = ['nome', 'email', 'setor', 'ctps', 'tipo', 'status']
         
-        connection = None
-        cursor = None
+        for campo, valor in campos.items():
+            if campo in campos_permitidos and valor is not None:
+                campos_update.append(f"{campo} = %s")
+                params.append(valor)
+        
+        if not campos_update:
+            return None
+        
+        params.append(cpf)
+        
+        query = f"""
+            UPDATE Funcionario 
+            SET {', '.join(campos_update)}
+            WHERE cpf = %s
+            RETURNING cpf, nome, email, status
+        """
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=RealDictCursor)
-            
-            for campo, valor in campos.items():
-                if campo in campos_permitidos and valor is not None:
-                    campos_update.append(f"{campo} = %s")
-                    params.append(valor)
-            
-            if not campos_update:
-                return None
-            
-            params.append(cpf)
-            
-            query = f"""
-                UPDATE Funcionario 
-                SET {', '.join(campos_update)}
-                WHERE cpf = %s
-                RETURNING cpf, nome, email, status
-            """
-            
-            cursor.execute(query, tuple(params))
-            connection.commit()
-            
-            result = cursor.fetchone()
-            return [dict(result)] if result else []
+            with Database.transaction() as tx:
+                anterior = None
+                if 'status' in campos and campos['status'] is not None:
+                    anterior = tx.fetch_one(
+                        "SELECT status FROM Funcionario WHERE cpf = %s FOR UPDATE", (cpf,)
+                    )
+                setor_anterior = None
+                if 'setor' in campos and campos['setor'] is not None:
+                    setor_anterior = tx.fetch_value(
+                        "SELECT COALESCE(setor, '') FROM Funcionario WHERE cpf = %s FOR UPDATE", (cpf,)
+                    )
+                result = tx.fetch_one(query, tuple(params))
+                if result:
+                    invalidar_apos_commit('Funcionario')
+                if result and anterior:
+                    ContadoresModel.registrar(tx, 'Funcionario', anterior, result)
+                if result and setor_anterior is not None and setor_anterior != campos['setor']:
+                    # As avaliações dele saem do setor antigo e entram no novo no agregado diário
+                    avaliacoes = tx.fetch_all("""
+                        SELECT DATE(data_completa) AS dia, questionario_cod, avaliador_cpf, rating_geral
+                        FROM Avaliacao
+                        WHERE avaliado_cpf = %s AND data_completa IS NOT NULL
+                    """, (cpf,))
+                    AvaliacoesDiariasModel.registrar_lote(tx, (
+                        (dict(linha, setor=setor_anterior), dict(linha, setor=campos['setor']))
+                        for linha in avaliacoes
+                    ))
+                if result and setor_anterior is not None:
+                    MotorColunar.mudar_setor(tx, cpf, campos['setor'])
+            return [result] if result else []
             
         except Exception as error:
-            if connection:
-                connection.rollback()
             print(f"[ERRO] Erro ao atualizar funcionário: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def deletar(cpf):
         """Deleta um funcionário"""
-        query = "DELETE FROM Funcionario WHERE cpf = %s"
-        return execute_query(query, (cpf,), fetch=False)
+        query = "DELETE FROM Funcionario WHERE cpf = %s RETURNING status"
+        with Database.transaction() as tx:
+            removidos = tx.fetch_all(query, (cpf,))
+            ContadoresModel.registrar_lote(tx, 'Funcionario', ((linha, None) for linha in removidos))
+            if removidos:
+                # Os vínculos com treinamentos saem junto (ON DELETE CASCADE)
+                invalidar_apos_commit('Funcionario', 'Funcionario_Treinamento')
+        return len(removidos)
     
     @staticmethod
     def contar_total_geral():
         """Conta o total geral de funcionários no sistema (sem filtros)"""
-        from backend.config.database import get_db_connection, Database
-        
-        connection = None
-        cursor = None
+        query = "SELECT COUNT(*) AS total FROM Funcionario"
         
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
-            query = "SELECT COUNT(*) AS total FROM Funcionario"
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            total = result[0] if result else 0
-            print(f"[DEBUG] Total geral de funcionários: {total}")
+            with Database.transaction() as tx:
+                total = tx.fetch_value(query) or 0
             return total
             
         except Exception as error:
             print(f"[ERRO] Erro ao contar total geral: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def contar_estatisticas_gerais():
         """Retorna estatísticas gerais: total geral, total ativo, total inativo e total em processo"""
-        from backend.config.database import get_db_connection, Database
-        
-        connection = None
-        cursor = None
-        
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
             query = """
                 SELECT 
                     COUNT(*) AS total_geral,
@@ -331,22 +381,14 @@ class FuncionariosModel:
                     ) AS total_processo
                 FROM Funcionario
             """
-            cursor.execute(query)
-            result = cursor.fetchone()
+            with Database.transaction() as tx:
+                result = tx.fetch_one(query)
             
             if result:
-                total_geral = result[0] or 0
-                total_ativo = result[1] or 0
-                total_inativo = result[2] or 0
-                total_processo = result[3] or 0
-                
-                # Debug: log dos resultados
-                print(f"[DEBUG] Estatísticas gerais - Total: {total_geral}, Ativo: {total_ativo}, Inativo: {total_inativo}, Processo: {total_processo}")
-                
-                # Debug: verificar alguns status reais
-                cursor.execute("SELECT DISTINCT status FROM Funcionario LIMIT 10")
-                status_unicos = cursor.fetchall()
-                print(f"[DEBUG] Status únicos encontrados: {[s[0] for s in status_unicos]}")
+                total_geral = result['total_geral'] or 0
+                total_ativo = result['total_ativo'] or 0
+                total_inativo = result['total_inativo'] or 0
+                total_processo = result['total_processo'] or 0
                 
                 return {
                     'total_geral': total_geral,
@@ -359,11 +401,6 @@ class FuncionariosModel:
         except Exception as error:
             print(f"[ERRO] Erro ao contar estatísticas gerais: {error}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def contar_por_status():
@@ -410,46 +447,33 @@ class FuncionariosModel:
     @staticmethod
     def listar_departamentos():
         """Lista todos os departamentos da tabela Departamento ou setores distintos se a tabela não existir"""
-        from backend.config.database import get_db_connection, Database
-        
-        connection = None
-        cursor = None
-        
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
-            # Tenta buscar da tabela departamento primeiro
-            try:
-                cursor.execute("""
-                    SELECT 
-                        cod_departamento,
-                        nome
-                    FROM departamento
-                    ORDER BY nome
-                """)
-                results = cursor.fetchall()
-                return [{'cod_departamento': row[0], 'nome': row[1]} for row in results]
-            except:
-                # Se a tabela não existe, retorna setores distintos da tabela Funcionario
-                cursor.execute("""
-                    SELECT DISTINCT
-                        setor as nome
-                    FROM Funcionario
-                    WHERE setor IS NOT NULL AND setor != ''
-                    ORDER BY setor
-                """)
-                results = cursor.fetchall()
-                # Cria um cod_departamento fictício baseado no índice
-                return [{'cod_departamento': idx + 1, 'nome': row[0]} for idx, row in enumerate(results)]
+            with Database.read_transaction() as tx:
+                # Tenta buscar da tabela departamento primeiro
+                try:
+                    # Savepoint: se a tabela não existir, a transação continua utilizável
+                    with tx.savepoint():
+                        return tx.fetch_all("""
+                            SELECT 
+                                cod_departamento,
+                                nome
+                            FROM departamento
+                            ORDER BY nome
+                        """)
+                except Exception:
+                    # Se a tabela não existe, retorna setores distintos da tabela Funcionario
+                    results = tx.fetch_all("""
+                        SELECT DISTINCT
+                            setor as nome
+                        FROM Funcionario
+                        WHERE setor IS NOT NULL AND setor != ''
+                        ORDER BY setor
+                    """)
+                    # Cria um cod_departamento fictício baseado no índice
+                    return [{'cod_departamento': idx + 1, 'nome': row['nome']} for idx, row in enumerate(results)]
         except Exception as error:
             print(f"[ERRO] Erro ao listar departamentos: {error}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                Database.return_connection(connection)
     
     @staticmethod
     def buscar_avaliacoes_funcionario(funcionario_cpf):
@@ -0,0 +1,63 @@
+"""
+Model para o mapeamento de opções de resposta em motivos de saída
+Cada opção mapeada conta para um motivo no painel de motivos do dashboard,
+somada a partir do histograma de respostas (ver respostas_frequencia.py)
+"""
+from backend.config.cache import invalidar_apos_commit
+from backend.config.database import Database
+
+
+class MotivosSaidaModel:
+    """Model para operações com o mapeamento opção -> motivo de saída"""
+
+    @staticmethod
+    def listar_mapeamento():
+        """Lista as opções mapeadas, com a questão e o texto de cada uma"""
+        query = """
+            SELECT
+                m.opcao_cod,
+                o.questao_cod,
+                o.texto_opcao,
+                m.motivo,
+                m.cor
+            FROM Motivo_Saida_Opcao m
+            JOIN Opcao o ON o.cod_opcao = m.opcao_cod
+            ORDER BY o.questao_cod, o.ordem, m.opcao_cod
+        """
+
+        with Database.read_transaction() as tx:
+            return tx.fetch_all(query)
+
+    @staticmethod
+    def opcoes_inexistentes(opcoes):
+        """Códigos de `opcoes` que não existem em Opcao"""
+        query = """
+            SELECT t.cod
+            FROM unnest(%s::INTEGER[]) AS t(cod)
+            WHERE NOT EXISTS (SELECT 1 FROM Opcao o WHERE o.cod_opcao = t.cod)
+            ORDER BY t.cod
+        """
+
+        with Database.read_transaction() as tx:
+            return [linha['cod'] for linha in tx.fetch_all(query, (list(opcoes),))]
+
+    @staticmethod
+    def definir_mapeamento(itens):
+        """
+        Substitui todo o mapeamento numa única transação
+
+        Args:
+            itens (list): dicts com opcao_cod, motivo e cor
+
+        Returns:
+            int: quantidade de opções mapeadas
+        """
+        with Database.transaction() as tx:
+            tx.execute("DELETE FROM Motivo_Saida_Opcao")
+            total = tx.bulk_insert(
+                'Motivo_Saida_Opcao',
+                ('opcao_cod', 'motivo', 'cor'),
+                ((item['opcao_cod'], item['motivo'], item['cor']) for item in itens)
+            )
+            invalidar_apos_commit('Motivo_Saida_Opcao')
+        return total
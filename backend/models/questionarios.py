@@ -1,7 +1,9 @@
 """
 Model para gerenciamento de questionários
 """
+from backend.config.cache import invalidar_apos_commit
 from backend.config.database import Database
+from backend.models.contadores import ContadoresModel
 
 class QuestionariosModel:
     """Model para operações com questionários"""
@@ -30,24 +32,8 @@ class QuestionariosModel:
         ORDER BY q.cod_questionario DESC
         """
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                colunas = [desc[0] for desc in cursor.description]
-                resultados = cursor.fetchall()
-                
-                questionarios = []
-                for row in resultados:
-                    questionario = dict(zip(colunas, row))
-                    questionarios.append(questionario)
-                
-                return questionarios
-        finally:
-            Database.return_connection(conn)
+        with Database.read_transaction() as tx:
+            return tx.fetch_all(query)
     
     @staticmethod
     def buscar_por_id(questionario_id):
@@ -68,21 +54,8 @@ class QuestionariosModel:
         GROUP BY q.cod_questionario, q.nome, q.descricao, q.status, c.nome, c.cod_classificacao
         """
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(query, (questionario_id,))
-                colunas = [desc[0] for desc in cursor.description]
-                resultado = cursor.fetchone()
-                
-                if resultado:
-                    return dict(zip(colunas, resultado))
-                return None
-        finally:
-            Database.return_connection(conn)
+        with Database.transaction() as tx:
+            return tx.fetch_one(query, (questionario_id,))
     
     @staticmethod
     def buscar_perguntas(questionario_id):
@@ -98,44 +71,20 @@ class QuestionariosModel:
         ORDER BY qu.cod_questao
         """
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(query, (questionario_id,))
-                colunas = [desc[0] for desc in cursor.description]
-                resultados = cursor.fetchall()
-                
-                perguntas = []
-                for row in resultados:
-                    pergunta = dict(zip(colunas, row))
-                    
-                    # Buscar opções da tabela Opcao
-                    opcoes_query = """
-                    SELECT cod_opcao, texto_opcao, ordem
-                    FROM Opcao
-                    WHERE questao_cod = %s
-                    ORDER BY ordem, cod_opcao
-                    """
-                    cursor.execute(opcoes_query, (pergunta['id'],))
-                    opcoes_rows = cursor.fetchall()
-                    
-                    opcoes = []
-                    for opcao_row in opcoes_rows:
-                        opcoes.append({
-                            'cod_opcao': opcao_row[0],
-                            'texto_opcao': opcao_row[1],
-                            'ordem': opcao_row[2]
-                        })
-                    
-                    pergunta['opcoes'] = opcoes
-                    perguntas.append(pergunta)
-                
-                return perguntas
-        finally:
-            Database.return_connection(conn)
+        with Database.transaction() as tx:
+            perguntas = tx.fetch_all(query, (questionario_id,))
+            
+            for pergunta in perguntas:
+                # Buscar opções da tabela Opcao
+                opcoes_query = """
+                SELECT cod_opcao, texto_opcao, ordem
+                FROM Opcao
+                WHERE questao_cod = %s
+                ORDER BY ordem, cod_opcao
+                """
+                pergunta['opcoes'] = tx.fetch_all(opcoes_query, (pergunta['id'],))
+            
+            return perguntas
     
     @staticmethod
     def criar(nome, classificacao_cod, descricao=None, status='Rascunho'):
@@ -146,21 +95,11 @@ class QuestionariosModel:
         RETURNING cod_questionario as id, nome as titulo, status, classificacao_cod
         """
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(query, (nome, descricao, status, classificacao_cod))
-                conn.commit()
-                
-                colunas = [desc[0] for desc in cursor.description]
-                resultado = cursor.fetchall()
-                
-                return [dict(zip(colunas, row)) for row in resultado]
-        finally:
-            Database.return_connection(conn)
+        with Database.transaction() as tx:
+            criados = tx.fetch_all(query, (nome, descricao, status, classificacao_cod))
+            ContadoresModel.registrar_lote(tx, 'Questionario', ((None, linha) for linha in criados))
+            invalidar_apos_commit('Questionario')
+            return criados
     
     @staticmethod
     def atualizar(questionario_id, nome=None, descricao=None, status=None, classificacao_cod=None):
@@ -196,21 +135,19 @@ class QuestionariosModel:
         RETURNING cod_questionario as id, nome as titulo, status, classificacao_cod
         """
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(query, valores)
-                conn.commit()
-                
-                colunas = [desc[0] for desc in cursor.description]
-                resultado = cursor.fetchall()
-                
-                return [dict(zip(colunas, row)) for row in resultado]
-        finally:
-            Database.return_connection(conn)
+        with Database.transaction() as tx:
+            anterior = None
+            if status is not None:
+                anterior = tx.fetch_one(
+                    "SELECT status FROM Questionario WHERE cod_questionario = %s FOR UPDATE",
+                    (questionario_id,)
+                )
+            atualizados = tx.fetch_all(query, valores)
+            if anterior:
+                ContadoresModel.registrar_lote(tx, 'Questionario', ((anterior, linha) for linha in atualizados))
+            if atualizados:
+                invalidar_apos_commit('Questionario')
+            return atualizados
         
     @staticmethod
     def vincular_perguntas(questionario_id, questoes_ids):
@@ -218,50 +155,30 @@ class QuestionariosModel:
         if not questoes_ids:
             return
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                # Limpar vínculos existentes
-                cursor.execute(
-                    "DELETE FROM Questionario_Questao WHERE questionario_cod = %s",
-                    (questionario_id,)
-                )
-                
-                # Inserir novos vínculos
-                for questao_id in questoes_ids:
-                    cursor.execute(
-                        """
-                        INSERT INTO Questionario_Questao (questionario_cod, questao_cod)
-                        VALUES (%s, %s)
-                        ON CONFLICT DO NOTHING
-                        """,
-                        (questionario_id, questao_id)
-                    )
-                
-                conn.commit()
-        finally:
-            Database.return_connection(conn)
+        with Database.transaction() as tx:
+            # Limpar vínculos existentes
+            tx.execute(
+                "DELETE FROM Questionario_Questao WHERE questionario_cod = %s",
+                (questionario_id,)
+            )
+            
+            # Inserir novos vínculos (um único INSERT de várias linhas)
+            tx.bulk_insert(
+                'Questionario_Questao',
+                ('questionario_cod', 'questao_cod'),
+                ((questionario_id, questao_id) for questao_id in questoes_ids),
+                on_conflict='DO NOTHING'
+            )
+            invalidar_apos_commit('Questionario_Questao')
     
     @staticmethod
     def verificar_uso_em_avaliacoes(questionario_id):
         """Verifica se o questionário está sendo usado em alguma avaliação"""
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT COUNT(*) FROM Avaliacao WHERE questionario_cod = %s",
-                    (questionario_id,)
-                )
-                total = cursor.fetchone()[0]
-                return total
-        finally:
-            Database.return_connection(conn)
+        with Database.transaction() as tx:
+            return tx.fetch_value(
+                "SELECT COUNT(*) FROM Avaliacao WHERE questionario_cod = %s",
+                (questionario_id,)
+            )
     
     @staticmethod
     def deletar_com_cascata(questionario_id):
@@ -269,28 +186,22 @@ class QuestionariosModel:
         Deleta um questionário APENAS se não estiver associado a avaliações.
         Se houver avaliações associadas, retorna erro.
         """
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
         try:
-            with conn.cursor() as cursor:
+            with Database.transaction() as tx:
                 # Verificar se o questionário existe
-                cursor.execute(
+                questionario = tx.fetch_one(
                     "SELECT cod_questionario, nome FROM Questionario WHERE cod_questionario = %s",
                     (questionario_id,)
                 )
-                questionario = cursor.fetchone()
                 
                 if not questionario:
                     return {'sucesso': False, 'mensagem': 'Questionário não encontrado'}
                 
                 # Verificar se há avaliações associadas
-                cursor.execute(
+                total_avaliacoes = tx.fetch_value(
                     "SELECT COUNT(*) FROM Avaliacao WHERE questionario_cod = %s",
                     (questionario_id,)
                 )
-                total_avaliacoes = cursor.fetchone()[0]
                 
                 if total_avaliacoes > 0:
                     return {
@@ -301,25 +212,24 @@ class QuestionariosModel:
                 
                 # Se não houver avaliações, pode deletar
                 # Deletar vínculos com perguntas
-                cursor.execute(
+                vinculos_deletados = tx.execute(
                     "DELETE FROM Questionario_Questao WHERE questionario_cod = %s",
                     (questionario_id,)
                 )
-                vinculos_deletados = cursor.rowcount
                 
                 # Deletar o questionário
-                cursor.execute(
-                    "DELETE FROM Questionario WHERE cod_questionario = %s",
+                removidos = tx.fetch_all(
+                    "DELETE FROM Questionario WHERE cod_questionario = %s RETURNING status",
                     (questionario_id,)
                 )
-                questionario_deletado = cursor.rowcount
-                
-                conn.commit()
+                ContadoresModel.registrar_lote(tx, 'Questionario', ((linha, None) for linha in removidos))
+                invalidar_apos_commit('Questionario', 'Questionario_Questao')
+                questionario_deletado = len(removidos)
                 
                 return {
                     'sucesso': True,
                     'questionario_id': questionario_id,
-                    'questionario_nome': questionario[1] if len(questionario) > 1 else None,
+                    'questionario_nome': questionario.get('nome'),
                     'estatisticas': {
                         'vinculos_deletados': vinculos_deletados,
                         'questionarios_deletados': questionario_deletado
@@ -327,7 +237,6 @@ class QuestionariosModel:
                 }
                 
         except Exception as e:
-            conn.rollback()
             error_msg = str(e)
             # Verificar se o erro é de constraint RESTRICT
             if 'restrict' in error_msg.lower() or 'violates foreign key constraint' in error_msg.lower():
@@ -336,25 +245,12 @@ class QuestionariosModel:
                     'mensagem': 'Não é possível excluir este questionário. Ele está sendo usado em avaliações.'
                 }
             raise Exception(f"Erro ao deletar questionário: {error_msg}")
-        finally:
-            Database.return_connection(conn)
     
     @staticmethod
     def listar_classificacoes():
         """Lista todas as classificações disponíveis"""
         query = "SELECT cod_classificacao as id, nome FROM Classificacao ORDER BY nome"
         
-        conn = Database.get_connection()
-        if not conn:
-            raise Exception("Não foi possível conectar ao banco de dados")
-        
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                colunas = [desc[0] for desc in cursor.description]
-                resultados = cursor.fetchall()
-                
-                return [dict(zip(colunas, row)) for row in resultados]
-        finally:
-            Database.return_connection(conn)
+        with Database.read_transaction() as tx:
+            return tx.fetch_all(query)
 
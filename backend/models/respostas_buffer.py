@@ -0,0 +1,317 @@
+"""
+Buffer de escrita (write-behind) das respostas de avaliações
+Com DB_RESPOSTAS_WRITE_BEHIND=1, POST /api/avaliacoes/respostas só coloca a
+resposta numa fila em memória e responde; uma thread grava a fila em lotes,
+cada lote numa única transação (ver AvaliacoesModel.salvar_respostas)
+
+- Respostas repetidas para a mesma (avaliação, questão) antes da gravação
+  viram uma só (vale a última).
+- A fila tem tamanho máximo (DB_RESPOSTAS_BUFFER_MAX); cheia, quem chega
+  espera até DB_RESPOSTAS_ESPERA_MS e depois recebe BufferCheio (503).
+- Ao encerrar o processo a fila é gravada antes de as conexões fecharem;
+  respostas que chegam durante o encerramento são gravadas na hora.
+"""
+import atexit
+import os
+import signal
+import sys
+import threading
+import time
+
+from backend.config.database import Database
+from backend.models.avaliacoes import AvaliacoesModel
+
+# Falhas seguidas de uma mesma avaliação antes de suas respostas serem descartadas
+_MAX_TENTATIVAS = 5
+
+
+class BufferCheio(Exception):
+    """A fila de respostas não liberou espaço a tempo"""
+
+
+def _env_int(nome, padrao):
+    valor = os.getenv(nome)
+    return int(valor) if valor not in (None, '') else padrao
+
+
+class BufferRespostas:
+
+    _cond = threading.Condition()
+    # avaliacao_cod -> {questao_cod: opcao_cod}, na ordem de chegada
+    _pendentes = {}
+    _total = 0
+    # Avaliações cujo lote está sendo gravado agora
+    _em_gravacao = set()
+    _tentativas = {}
+    _thread = None
+    _encerrando = False
+    _estatisticas = {
+        'recebidas': 0, 'coalescidas': 0, 'gravadas': 0, 'recusadas': 0, 'descartadas': 0,
+        'lotes': 0, 'falhas': 0, 'esperas_fila_cheia': 0, 'rejeitadas_fila_cheia': 0,
+    }
+
+    @staticmethod
+    def habilitado():
+        return os.getenv('DB_RESPOSTAS_WRITE_BEHIND', '').lower() in ('1', 'true', 'sim')
+
+    @staticmethod
+    def ativo():
+        """Se as respostas estão passando pela fila"""
+        return BufferRespostas._thread is not None and not BufferRespostas._encerrando
+
+    @staticmethod
+    def iniciar():
+        """
+        Inicia a thread de gravação e registra a descarga no encerramento
+
+        Sem DB_RESPOSTAS_WRITE_BEHIND=1 não faz nada: cada resposta é
+        gravada na própria requisição.
+        """
+        if not BufferRespostas.habilitado() or BufferRespostas._thread is not None:
+            return
+
+        BufferRespostas._thread = threading.Thread(
+            target=BufferRespostas._executar, name='buffer-respostas', daemon=True
+        )
+        BufferRespostas._thread.start()
+        atexit.register(BufferRespostas.encerrar)
+
+        # SIGTERM sem tratador encerraria o processo sem passar pelo atexit
+        if threading.current_thread() is threading.main_thread() \
+                and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+        print(f"[OK] Buffer de respostas ativo (até {_env_int('DB_RESPOSTAS_BUFFER_MAX', 5000)} pendentes)")
+
+    @staticmethod
+    def enfileirar(avaliacao_cod, questao_cod, opcao_cod):
+        """
+        Coloca uma resposta na fila
+
+        Returns:
+            bool: False se o buffer não está ativo (grave a resposta na hora)
+
+        Raises:
+            BufferCheio: se a fila continuar cheia por DB_RESPOSTAS_ESPERA_MS
+        """
+        capacidade = _env_int('DB_RESPOSTAS_BUFFER_MAX', 5000)
+        limite = time.monotonic() + _env_int('DB_RESPOSTAS_ESPERA_MS', 2000) / 1000
+        cond = BufferRespostas._cond
+        estatisticas = BufferRespostas._estatisticas
+
+        with cond:
+            esperou = False
+            while True:
+                if not BufferRespostas.ativo():
+                    return False
+
+                respostas = BufferRespostas._pendentes.get(avaliacao_cod)
+                if respostas is not None and questao_cod in respostas:
+                    respostas[questao_cod] = opcao_cod
+                    estatisticas['coalescidas'] += 1
+                    return True
+                if BufferRespostas._total < capacidade:
+                    break
+
+                # Fila cheia: acorda a gravação e espera espaço
+                if not esperou:
+                    esperou = True
+                    estatisticas['esperas_fila_cheia'] += 1
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    estatisticas['rejeitadas_fila_cheia'] += 1
+                    raise BufferCheio(f"Fila de respostas cheia ({capacidade} pendentes)")
+                cond.notify_all()
+                cond.wait(restante)
+
+            BufferRespostas._pendentes.setdefault(avaliacao_cod, {})[questao_cod] = opcao_cod
+            BufferRespostas._total += 1
+            estatisticas['recebidas'] += 1
+            if BufferRespostas._total >= _env_int('DB_RESPOSTAS_LOTE', 500):
+                cond.notify_all()
+        return True
+
+    @staticmethod
+    def sincronizar(avaliacao_cod):
+        """
+        Grava na hora as respostas pendentes de uma avaliação
+
+        Chamado antes de ler ou gravar diretamente as respostas dela, para
+        que a leitura as inclua e uma resposta antiga da fila não sobrescreva
+        uma mais nova.
+        """
+        cond = BufferRespostas._cond
+        with cond:
+            while avaliacao_cod in BufferRespostas._em_gravacao:
+                cond.wait()
+            respostas = BufferRespostas._pendentes.pop(avaliacao_cod, None)
+            if not respostas:
+                return
+            BufferRespostas._total -= len(respostas)
+            BufferRespostas._em_gravacao.add(avaliacao_cod)
+            cond.notify_all()
+
+        try:
+            BufferRespostas._gravar({avaliacao_cod: respostas})
+        except Exception:
+            BufferRespostas._devolver({avaliacao_cod: respostas})
+            raise
+        finally:
+            with cond:
+                BufferRespostas._em_gravacao.discard(avaliacao_cod)
+                cond.notify_all()
+
+    @staticmethod
+    def _gravar(lote):
+        """Grava {avaliacao_cod: {questao_cod: opcao_cod}} numa única transação"""
+        recusadas = []
+        gravadas = 0
+        with Database.transaction():
+            for avaliacao_cod in sorted(lote):
+                respostas = list(lote[avaliacao_cod].items())
+                resultado = AvaliacoesModel.salvar_respostas(avaliacao_cod, respostas)
+                if resultado is None:
+                    recusadas.append((avaliacao_cod, 'avaliação não encontrada', len(respostas)))
+                    continue
+                for item in resultado:
+                    if item['status'] == 'erro':
+                        recusadas.append((avaliacao_cod, f"questão {item['questao_cod']}: {item['erro']}", 1))
+                    else:
+                        gravadas += 1
+
+        with BufferRespostas._cond:
+            BufferRespostas._estatisticas['lotes'] += 1
+            BufferRespostas._estatisticas['gravadas'] += gravadas
+            BufferRespostas._estatisticas['recusadas'] += sum(quantidade for _, _, quantidade in recusadas)
+            for avaliacao_cod in lote:
+                BufferRespostas._tentativas.pop(avaliacao_cod, None)
+        for avaliacao_cod, motivo, _ in recusadas:
+            print(f"[AVISO] Resposta da fila recusada (avaliação {avaliacao_cod}, {motivo})")
+
+    @staticmethod
+    def _devolver(lote):
+        """Recoloca um lote que falhou na fila, sem apagar respostas mais novas"""
+        with BufferRespostas._cond:
+            for avaliacao_cod, respostas in lote.items():
+                atuais = BufferRespostas._pendentes.setdefault(avaliacao_cod, {})
+                for questao_cod, opcao_cod in respostas.items():
+                    if questao_cod not in atuais:
+                        atuais[questao_cod] = opcao_cod
+                        BufferRespostas._total += 1
+
+    @staticmethod
+    def _retirar_lote():
+        """Tira da fila avaliações inteiras até completar DB_RESPOSTAS_LOTE respostas"""
+        tamanho = _env_int('DB_RESPOSTAS_LOTE', 500)
+        lote = {}
+        quantidade = 0
+        for avaliacao_cod in list(BufferRespostas._pendentes):
+            if quantidade >= tamanho:
+                break
+            if avaliacao_cod in BufferRespostas._em_gravacao:
+                continue
+            respostas = BufferRespostas._pendentes.pop(avaliacao_cod)
+            lote[avaliacao_cod] = respostas
+            quantidade += len(respostas)
+        BufferRespostas._total -= quantidade
+        BufferRespostas._em_gravacao.update(lote)
+        return lote
+
+    @staticmethod
+    def _executar():
+        cond = BufferRespostas._cond
+        espera_falha = 1.0
+        while True:
+            with cond:
+                while not BufferRespostas._pendentes and not BufferRespostas._encerrando:
+                    cond.wait()
+                if not BufferRespostas._pendentes:
+                    return
+                # Junta respostas por um instante (ou até completar um lote)
+                if not BufferRespostas._encerrando \
+                        and BufferRespostas._total < _env_int('DB_RESPOSTAS_LOTE', 500):
+                    cond.wait(_env_int('DB_RESPOSTAS_FLUSH_MS', 200) / 1000)
+                lote = BufferRespostas._retirar_lote()
+                if not lote:
+                    # Tudo o que há está sendo gravado por sincronizar()
+                    cond.wait(_env_int('DB_RESPOSTAS_FLUSH_MS', 200) / 1000)
+                    continue
+                # Espaço liberado: quem esperava com a fila cheia pode seguir
+                cond.notify_all()
+
+            falhou = False
+            try:
+                BufferRespostas._gravar(lote)
+            except Exception as error:
+                print(f"[ERRO] Erro ao gravar lote do buffer de respostas: {error}")
+                # Grava avaliação por avaliação para isolar a que falha
+                for avaliacao_cod, respostas in lote.items():
+                    try:
+                        BufferRespostas._gravar({avaliacao_cod: respostas})
+                    except Exception as erro_avaliacao:
+                        falhou = True
+                        BufferRespostas._falhou(avaliacao_cod, respostas, erro_avaliacao)
+            finally:
+                with cond:
+                    BufferRespostas._em_gravacao.difference_update(lote)
+                    cond.notify_all()
+
+            if falhou:
+                # Banco fora do ar ou lote inválido: espera antes de tentar de novo
+                time.sleep(espera_falha)
+                espera_falha = min(espera_falha * 2, 30.0)
+            else:
+                espera_falha = 1.0
+
+    @staticmethod
+    def _falhou(avaliacao_cod, respostas, error):
+        with BufferRespostas._cond:
+            BufferRespostas._estatisticas['falhas'] += 1
+            tentativas = BufferRespostas._tentativas.get(avaliacao_cod, 0) + 1
+            BufferRespostas._tentativas[avaliacao_cod] = tentativas
+            if tentativas >= _MAX_TENTATIVAS:
+                BufferRespostas._tentativas.pop(avaliacao_cod)
+                BufferRespostas._estatisticas['descartadas'] += len(respostas)
+        if tentativas >= _MAX_TENTATIVAS:
+            print(f"[ERRO] Respostas da avaliação {avaliacao_cod} descartadas após {tentativas} "
+                  f"tentativas ({respostas}): {error}")
+        else:
+            BufferRespostas._devolver({avaliacao_cod: respostas})
+
+    @staticmethod
+    def encerrar():
+        """
+        Para de aceitar respostas e grava o que está na fila
+
+        Espera até DB_RESPOSTAS_ENCERRAR_S segundos; o que não for gravado
+        nesse prazo (ex.: banco fora do ar) é informado no log.
+        """
+        thread = BufferRespostas._thread
+        if thread is None:
+            return
+        with BufferRespostas._cond:
+            BufferRespostas._encerrando = True
+            BufferRespostas._cond.notify_all()
+
+        thread.join(_env_int('DB_RESPOSTAS_ENCERRAR_S', 30))
+        with BufferRespostas._cond:
+            restantes = BufferRespostas._total
+        if thread.is_alive() or restantes:
+            print(f"[ERRO] Buffer de respostas encerrado com {restantes} respostas não gravadas")
+        else:
+            print("[OK] Buffer de respostas gravado")
+        BufferRespostas._thread = None
+
+    @staticmethod
+    def estatisticas():
+        with BufferRespostas._cond:
+            dados = dict(BufferRespostas._estatisticas)
+            dados.update({
+                'habilitado': BufferRespostas.habilitado(),
+                'ativo': BufferRespostas.ativo(),
+                'pendentes': BufferRespostas._total,
+                'avaliacoes_pendentes': len(BufferRespostas._pendentes),
+                'em_gravacao': len(BufferRespostas._em_gravacao),
+                'capacidade': _env_int('DB_RESPOSTAS_BUFFER_MAX', 5000),
+            })
+        return dados
@@ -0,0 +1,188 @@
+"""
+Histograma de respostas (Resposta_Frequencia)
+Uma linha por questão, opção escolhida e questionário da avaliação, com a
+quantidade de respostas; mantido a cada escrita em Resposta
+
+Uso para reconstruir:
+    python -m backend.models.respostas_frequencia
+"""
+from dotenv import load_dotenv
+
+from backend.config.cache import invalidar_apos_commit
+from backend.config.database import Database
+
+# Mesmas colunas do histograma, calculadas direto de Resposta
+_SELECT_HISTOGRAMA = """
+    SELECT
+        r.questao_cod,
+        r.opcao_cod,
+        a.questionario_cod,
+        COUNT(*) AS quantidade
+    FROM Resposta r
+    JOIN Avaliacao a ON a.cod_avaliacao = r.avaliacao_cod
+    GROUP BY r.questao_cod, r.opcao_cod, a.questionario_cod
+"""
+
+_COLUNAS = "questao_cod, opcao_cod, questionario_cod, quantidade"
+
+_SOMAR = f"""
+    INSERT INTO Resposta_Frequencia ({_COLUNAS})
+    {{origem}}
+    ON CONFLICT (questao_cod, opcao_cod, questionario_cod) DO UPDATE SET
+        quantidade = Resposta_Frequencia.quantidade + EXCLUDED.quantidade
+"""
+
+
+class RespostasFrequenciaModel:
+
+    # Só depois de conferido (ou reconstruído) o histograma é usado nas consultas
+    pronto = False
+
+    @staticmethod
+    def fonte():
+        """
+        Trecho FROM com as colunas do histograma, apelidado `freq`
+
+        Usa a tabela Resposta_Frequencia quando ela está pronta; senão
+        agrupa Resposta, como antes do histograma existir.
+        """
+        if RespostasFrequenciaModel.pronto:
+            return "Resposta_Frequencia freq"
+        return f"({_SELECT_HISTOGRAMA}) freq"
+
+    @staticmethod
+    def registrar(tx, anterior=None, atual=None):
+        """
+        Ajusta o histograma após uma escrita em Resposta, na mesma transação
+
+        Args:
+            anterior (dict): resposta antes da escrita (None em inserções)
+            atual (dict): resposta depois da escrita (None em exclusões)
+            Ambos com questao_cod, opcao_cod e questionario_cod.
+        """
+        RespostasFrequenciaModel.registrar_lote(tx, [(anterior, atual)])
+
+    @staticmethod
+    def registrar_lote(tx, alteracoes):
+        """Como registrar, para um iterável de pares (anterior, atual)"""
+        grupos = {}
+        for anterior, atual in alteracoes:
+            if anterior == atual:
+                continue
+            for linha, sinal in ((anterior, -1), (atual, 1)):
+                if linha is not None:
+                    chave = (linha['questao_cod'], linha['opcao_cod'], linha['questionario_cod'])
+                    grupos[chave] = grupos.get(chave, 0) + sinal
+
+        # Ordem fixa: transações concorrentes bloqueiam as linhas na mesma ordem
+        chaves = [chave for chave in sorted(grupos) if grupos[chave]]
+        if not chaves:
+            return
+        questoes, opcoes, questionarios = (list(coluna) for coluna in zip(*chaves))
+        tx.execute(_SOMAR.format(origem="""
+            SELECT * FROM unnest(%s::INTEGER[], %s::INTEGER[], %s::INTEGER[], %s::BIGINT[])
+        """), (questoes, opcoes, questionarios, [grupos[chave] for chave in chaves]))
+        RespostasFrequenciaModel._remover_zerados(tx, questoes)
+
+    @staticmethod
+    def registrar_avaliacao(tx, avaliacao_id, sinal):
+        """
+        Soma (sinal=1) ou subtrai (sinal=-1) todas as respostas de uma
+        avaliação, no questionário que ela tem agora
+
+        Chamado antes de excluir a avaliação (as respostas somem em CASCADE)
+        e antes/depois de trocar o questionário dela. A avaliação fica
+        travada até o commit, para que nenhuma resposta entre no meio.
+        """
+        tx.execute("SELECT 1 FROM Avaliacao WHERE cod_avaliacao = %s FOR UPDATE", (avaliacao_id,))
+        questoes = tx.fetch_all(_SOMAR.format(origem="""
+            SELECT r.questao_cod, r.opcao_cod, a.questionario_cod, %s * COUNT(*)
+            FROM Resposta r
+            JOIN Avaliacao a ON a.cod_avaliacao = r.avaliacao_cod
+            WHERE r.avaliacao_cod = %s
+            GROUP BY r.questao_cod, r.opcao_cod, a.questionario_cod
+            ORDER BY r.questao_cod, r.opcao_cod, a.questionario_cod
+        """) + " RETURNING questao_cod", (sinal, avaliacao_id))
+        if questoes:
+            RespostasFrequenciaModel._remover_zerados(tx, [linha['questao_cod'] for linha in questoes])
+
+    @staticmethod
+    def registrar_insercoes(tx, contagens):
+        """
+        Soma respostas inseridas em lote
+
+        Args:
+            contagens (dict): {(avaliacao_cod, questao_cod, opcao_cod): quantidade}
+        """
+        if not contagens:
+            return
+        avaliacoes, questoes, opcoes = (list(coluna) for coluna in zip(*contagens))
+        tx.execute(_SOMAR.format(origem="""
+            SELECT t.questao_cod, t.opcao_cod, a.questionario_cod, SUM(t.quantidade)
+            FROM unnest(%s::INTEGER[], %s::INTEGER[], %s::INTEGER[], %s::BIGINT[])
+                AS t(avaliacao_cod, questao_cod, opcao_cod, quantidade)
+            JOIN Avaliacao a ON a.cod_avaliacao = t.avaliacao_cod
+            GROUP BY t.questao_cod, t.opcao_cod, a.questionario_cod
+            ORDER BY t.questao_cod, t.opcao_cod, a.questionario_cod
+        """), (avaliacoes, questoes, opcoes, list(contagens.values())))
+        invalidar_apos_commit('Resposta_Frequencia')
+
+    @staticmethod
+    def _remover_zerados(tx, questoes):
+        tx.execute(
+            "DELETE FROM Resposta_Frequencia WHERE questao_cod = ANY(%s::INTEGER[]) AND quantidade <= 0",
+            (sorted(set(questoes)),)
+        )
+        invalidar_apos_commit('Resposta_Frequencia')
+
+    @staticmethod
+    def reconstruir():
+        """
+        Refaz o histograma a partir de Resposta
+
+        Escritas concorrentes esperam o fim da reconstrução e depois aplicam
+        seus ajustes normalmente.
+
+        Returns:
+            int: quantidade de linhas geradas
+        """
+        with Database.transaction() as tx:
+            tx.execute("LOCK TABLE Resposta_Frequencia IN EXCLUSIVE MODE")
+            tx.execute("DELETE FROM Resposta_Frequencia")
+            total = tx.execute(f"INSERT INTO Resposta_Frequencia ({_COLUNAS}) {_SELECT_HISTOGRAMA}")
+            invalidar_apos_commit('Resposta_Frequencia')
+        return total
+
+    @staticmethod
+    def verificar():
+        """
+        Confere o histograma ao iniciar o servidor e o reconstrói se estiver
+        defasado (ex.: respostas carregadas direto no banco)
+
+        Se a tabela não existir, as consultas seguem agrupando Resposta.
+        """
+        try:
+            with Database.transaction() as tx:
+                linhas = tx.fetch_one("""
+                    SELECT
+                        (SELECT COALESCE(SUM(quantidade), 0) FROM Resposta_Frequencia) AS histograma,
+                        (SELECT COUNT(*) FROM Resposta) AS respostas
+                """)
+            if linhas['histograma'] != linhas['respostas']:
+                print(f"[AVISO] Histograma de respostas defasado ({linhas['histograma']} de "
+                      f"{linhas['respostas']} respostas), reconstruindo...")
+                RespostasFrequenciaModel.reconstruir()
+        except Exception as error:
+            print(f"[AVISO] Histograma de respostas indisponível, distribuição calculada sobre Resposta: {error}")
+            return
+        RespostasFrequenciaModel.pronto = True
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    Database.initialize_pool()
+    try:
+        linhas = RespostasFrequenciaModel.reconstruir()
+        print(f"[OK] Histograma de respostas reconstruído: {linhas} linhas")
+    finally:
+        Database.close_all_connections()
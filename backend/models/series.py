@@ -0,0 +1,61 @@
+"""
+Redução de séries temporais para gráficos
+Mantém o número de pontos enviado ao frontend limitado, qualquer que seja
+o período pedido
+"""
+
+
+def lttb(linhas, limite, x, y):
+    """
+    Largest-Triangle-Three-Buckets: escolhe `limite` linhas que preservam o
+    formato visual da série
+
+    O primeiro e o último ponto são sempre mantidos; entre eles a série é
+    dividida em limite - 2 faixas e de cada uma fica o ponto que forma o
+    maior triângulo com o ponto escolhido na faixa anterior e a média da
+    faixa seguinte. As linhas escolhidas são devolvidas sem alteração.
+
+    Args:
+        linhas (list): série ordenada por x
+        limite (int): quantidade máxima de pontos (mínimo 3)
+        x, y: funções que extraem as coordenadas numéricas de uma linha
+
+    Returns:
+        list: as linhas escolhidas, na ordem original
+    """
+    total = len(linhas)
+    if limite < 3 or total <= limite:
+        return list(linhas)
+
+    xs = [float(x(linha)) for linha in linhas]
+    ys = [float(y(linha)) for linha in linhas]
+    largura = (total - 2) / (limite - 2)
+
+    escolhidas = [linhas[0]]
+    anterior = 0
+    for faixa in range(limite - 2):
+        inicio = int(faixa * largura) + 1
+        fim = int((faixa + 1) * largura) + 1
+
+        # Média da faixa seguinte (na última, o ponto final)
+        prox_inicio = fim
+        prox_fim = min(int((faixa + 2) * largura) + 1, total)
+        if prox_inicio >= total - 1 or faixa == limite - 3:
+            media_x, media_y = xs[-1], ys[-1]
+        else:
+            quantidade = prox_fim - prox_inicio
+            media_x = sum(xs[prox_inicio:prox_fim]) / quantidade
+            media_y = sum(ys[prox_inicio:prox_fim]) / quantidade
+
+        ax, ay = xs[anterior], ys[anterior]
+        melhor, maior_area = inicio, -1.0
+        for indice in range(inicio, fim):
+            area = abs((ax - media_x) * (ys[indice] - ay) - (ax - xs[indice]) * (media_y - ay))
+            if area > maior_area:
+                melhor, maior_area = indice, area
+
+        escolhidas.append(linhas[melhor])
+        anterior = melhor
+
+    escolhidas.append(linhas[-1])
+    return escolhidas
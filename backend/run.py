@@ -12,7 +12,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from backend.app import app, Database
+from backend.app import app, AsyncDatabase, Database, BufferRespostas
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
@@ -30,5 +30,8 @@ if __name__ == '__main__':
         host = os.getenv('FLASK_HOST', '0.0.0.0')
         app.run(host=host, port=port, debug=debug)
     finally:
+        # Respostas ainda na fila são gravadas antes de as conexões fecharem
+        BufferRespostas.encerrar()
+        AsyncDatabase.close()
         Database.close_all_connections()
 